@@ -1,23 +1,20 @@
-import os
-from amadeus import Client, ResponseError
-from dotenv import load_dotenv
+import asyncio
 
-# Load environment variables from .env file
-load_dotenv()
+from providers.amadeus_client import amadeus_client, aclose_amadeus_clients, ProviderError
 
-amadeus = Client(
-    client_id=os.getenv("AMADEUS_CLIENT_ID"),
-    client_secret=os.getenv("AMADEUS_CLIENT_SECRET")
-)
 
-try:
-    # Example: find all airports related to "LON" (London)
-    response = amadeus.reference_data.locations.get(
-        keyword='LON',
-        subType='AIRPORT'
-    )
+async def main():
+    try:
+        # Example: find all airports related to "LON" (London)
+        airports = await amadeus_client.search_locations(keyword='LON', sub_type='AIRPORT')
 
-    for airport in response.data:
-        print(airport['iataCode'], "-", airport['name'])
-except ResponseError as error:
-    print(error)
+        for airport in airports:
+            print(airport['iataCode'], "-", airport['name'])
+    except ProviderError as error:
+        print(error)
+    finally:
+        await aclose_amadeus_clients()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+# benchmarks/bench_aggregator.py
+"""
+Offline benchmark of the multi-provider fan-out using FakeProvider adapters:
+sequential provider calls versus services.aggregator under a global deadline.
+
+    python benchmarks/bench_aggregator.py --providers 5 --latency-ms 200 --jitter-ms 400 --deadline 0.5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from providers.amadeus_client import ProviderError
+from providers.fake_provider import FakeProvider
+from services.aggregator import aggregate_search, merge_flights
+
+ROUTE = ("DLA", "CDG", "2030-01-15")
+
+
+async def sequential(providers):
+    batches = []
+    failed = False
+    for p in providers:
+        try:
+            batches.append(await p.search_flights(*ROUTE))
+        except ProviderError:
+            failed = True
+    return merge_flights(batches), failed
+
+
+async def aggregated(providers, deadline):
+    result = await aggregate_search(providers, *ROUTE, deadline=deadline)
+    return result.flights, result.partial
+
+
+async def measure(name, fn, rounds):
+    timings = []
+    partials = 0
+    flights = 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        merged, partial = await fn()
+        timings.append((time.perf_counter() - started) * 1000)
+        partials += partial
+        flights += len(merged)
+    timings.sort()
+    return {
+        "strategy": name,
+        "p50_ms": round(statistics.median(timings), 1),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 1),
+        "max_ms": round(timings[-1], 1),
+        "avg_flights": round(flights / rounds, 1),
+        "partial_rate": round(partials / rounds, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--providers", type=int, default=5)
+    parser.add_argument("--offers", type=int, default=20, help="offers per provider")
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=400)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--deadline", type=float, default=0.5, help="aggregation deadline in seconds")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    providers = [
+        FakeProvider(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, offers=args.offers,
+                     error_rate=args.error_rate, price_factor=1 + i * 0.05)
+        for i in range(args.providers)
+    ]
+    for i, p in enumerate(providers):
+        p.name = f"fake-{i + 1}"
+
+    rows = [
+        await measure("sequential", lambda: sequential(providers), args.rounds),
+        await measure("aggregated", lambda: aggregated(providers, args.deadline), args.rounds),
+    ]
+    print(f"{'strategy':<12}{'p50_ms':>10}{'p95_ms':>10}{'max_ms':>10}{'flights':>10}{'partial':>10}")
+    for r in rows:
+        print(f"{r['strategy']:<12}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['max_ms']:>10}{r['avg_flights']:>10}{r['partial_rate']:>10}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,407 @@
+# benchmarks/bench_e2e.py
+"""
+End-to-end benchmark of the API and the alert job. Starts backend/main.py under
+uvicorn in a subprocess, on a freshly seeded SQLite database and the offline
+replay provider (PROVIDER_MODE=replay), then drives it over HTTP:
+
+    flights_cached    /api/flights over a small set of repeated routes
+    flights_uncached  /api/flights with a new departure date per request
+    alerts_list       GET /api/alerts for a random user
+    notifications     GET /api/notifications for a random user
+    login             POST /api/auth/login (bcrypt verify per request)
+
+and runs full check_alerts_job passes in this process. Each scale grows the same
+database to that many alerts (alerts_per_user alerts per user), so later scales
+include the rows of earlier ones. Results are written as JSON; --compare prints
+the change against an earlier run and exits 1 when a p95 regressed past the
+threshold.
+
+Governor limits are lifted and replay latency is set for the run unless the
+corresponding env vars are already exported.
+
+    python benchmarks/bench_e2e.py --scales 1000,10000,100000 --output e2e.json
+    python benchmarks/bench_e2e.py --scales 1000 --compare e2e.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+ROUTES = [("DLA", "CDG"), ("NSI", "CDG"), ("DLA", "NSI"), ("DLA", "ADD"), ("NSI", "BRU"),
+          ("DLA", "IST"), ("GOU", "DLA"), ("NSI", "NBO"), ("DLA", "CMN"), ("MVR", "NSI")]
+PASSWORD = "bench-password"
+SEED_CHUNK = 5000
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies_ms, wall_seconds: float, count_label: str = "requests") -> dict:
+    values = sorted(latencies_ms)
+    return {
+        count_label: len(values),
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+        "mean_ms": round(sum(values) / len(values), 2) if values else 0.0,
+        "max_ms": round(values[-1], 2) if values else 0.0,
+        "throughput_rps": round(len(values) / wall_seconds, 1) if wall_seconds else 0.0,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+class Seeder:
+    """Grows the benchmark database to a number of alerts, keeping alerts per user constant"""
+
+    def __init__(self, alerts_per_user: int, notifications_per_user: int, seed: int = 11):
+        from database import create_db_and_tables
+        import models  # noqa: F401  (registers the tables)
+        from utils.security import hash_password
+
+        create_db_and_tables()
+        self.alerts_per_user = alerts_per_user
+        self.notifications_per_user = notifications_per_user
+        # bcrypt is deliberately slow; every seeded user shares one hash
+        self.password_hash = hash_password(PASSWORD)
+        self.rng = random.Random(seed)
+        self.users = 0
+        self.alerts = 0
+
+    def _insert(self, model, rows) -> None:
+        from sqlalchemy import insert
+        from database import engine
+        with engine.begin() as conn:
+            for start in range(0, len(rows), SEED_CHUNK):
+                conn.execute(insert(model), rows[start:start + SEED_CHUNK])
+
+    def grow_to(self, n_alerts: int) -> None:
+        from models import Alert, Notification, NotificationChannel, NotificationStatus, User, UserRole
+
+        now = datetime.utcnow()
+        n_users = -(-n_alerts // self.alerts_per_user)
+        users = [{"id": uid, "email": f"bench{uid}@example.com", "hashed_password": self.password_hash,
+                  "first_name": "Bench", "last_name": str(uid), "is_active": True, "role": UserRole.USER,
+                  "created_at": now, "updated_at": now}
+                 for uid in range(self.users + 1, n_users + 1)]
+        notifications = [{"user_id": u["id"], "channel": NotificationChannel.EMAIL, "recipient_address": u["email"],
+                          "payload": {"route": "DLA-CDG", "price": 150000.0, "currency": "XAF"},
+                          "status": NotificationStatus.SENT, "attempts": 0,
+                          "created_at": now - timedelta(minutes=n), "sent_at": now - timedelta(minutes=n)}
+                         for u in users for n in range(self.notifications_per_user)]
+        alerts = []
+        for n in range(self.alerts, n_alerts):
+            departure, arrival = self.rng.choice(ROUTES)
+            alerts.append({
+                "user_id": n // self.alerts_per_user + 1, "name": f"bench alert {n + 1}",
+                "departure": departure, "arrival": arrival,
+                "departure_date": datetime(2030, 1, 1) + timedelta(days=self.rng.randint(0, 90)),
+                "max_price": float(self.rng.randint(50, 300) * 1000), "currency": "XAF", "active": True,
+                "created_at": now, "check_frequency_minutes": 60, "next_check_at": now,
+                "notify_channel": NotificationChannel.EMAIL,
+            })
+        self._insert(User, users)
+        self._insert(Notification, notifications)
+        self._insert(Alert, alerts)
+        self.users = max(self.users, n_users)
+        self.alerts = max(self.alerts, n_alerts)
+
+
+class Server:
+    """uvicorn serving main:app in a subprocess sharing this process's environment"""
+
+    def __init__(self, log_path: str, port: int = 0):
+        self.log_path = log_path
+        if not port:
+            with socket.socket() as s:
+                s.bind(("127.0.0.1", 0))
+                port = s.getsockname()[1]
+        self.port = port
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.proc = None
+
+    def __enter__(self):
+        # server output goes to a file; an undrained pipe would stall the server under load
+        self.log = open(self.log_path, "ab")
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=BACKEND, stdout=self.log, stderr=subprocess.STDOUT,
+        )
+        import httpx
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited; see {self.log_path}")
+            try:
+                if httpx.get(f"{self.base_url}/openapi.json", timeout=1).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        raise RuntimeError("uvicorn did not start within 60s")
+
+    def __exit__(self, *exc):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        self.log.close()
+
+
+async def run_load(base_url: str, make_request, requests: int, concurrency: int) -> dict:
+    """Closed-loop load: `concurrency` workers issue `requests` requests in total"""
+    import httpx
+
+    latencies = []
+    statuses = Counter()
+    remaining = iter(range(requests))
+
+    async def worker(client):
+        for i in remaining:
+            method, url, kwargs = make_request(i)
+            started = time.perf_counter()
+            try:
+                resp = await client.request(method, url, **kwargs)
+                statuses[str(resp.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+    result = summarize(latencies, wall)
+    result["errors"] = sum(n for status, n in statuses.items() if not status.startswith("2"))
+    result["status"] = dict(statuses)
+    return result
+
+
+def api_scenarios(args, seeder: Seeder, date_offset: int):
+    """(name, request factory, request count) for one scale"""
+    from utils.security import create_access_token
+
+    rng = random.Random(args.seed)
+    tokens = {}
+
+    def auth(uid):
+        if uid not in tokens:
+            tokens[uid] = {"Authorization": f"Bearer {create_access_token(str(uid))}"}
+        return {"headers": tokens[uid]}
+
+    def flights_cached(i):
+        departure, arrival = ROUTES[i % len(ROUTES)]
+        date = (datetime(2030, 1, 1) + timedelta(days=i % 3)).strftime("%Y-%m-%d")
+        return "GET", "/api/flights", {"params": {"departure": departure, "arrival": arrival, "departureDate": date}}
+
+    def flights_uncached(i):
+        departure, arrival = ROUTES[i % len(ROUTES)]
+        date = (datetime(2031, 1, 1) + timedelta(days=date_offset + i)).strftime("%Y-%m-%d")
+        return "GET", "/api/flights", {"params": {"departure": departure, "arrival": arrival, "departureDate": date}}
+
+    def alerts_list(i):
+        return "GET", "/api/alerts/", auth(rng.randint(1, seeder.users))
+
+    def notifications(i):
+        return "GET", "/api/notifications/", auth(rng.randint(1, seeder.users))
+
+    def login(i):
+        uid = rng.randint(1, seeder.users)
+        return "POST", "/api/auth/login", {"json": {"email": f"bench{uid}@example.com", "password": PASSWORD}}
+
+    return [
+        ("flights_cached", flights_cached, args.requests),
+        ("flights_uncached", flights_uncached, args.requests),
+        ("alerts_list", alerts_list, args.requests),
+        ("notifications", notifications, args.requests),
+        ("login", login, args.login_requests),
+    ]
+
+
+def run_job_passes(passes: int, n_alerts: int) -> dict:
+    """Full check_alerts_job passes over every active alert"""
+    from sqlalchemy import event, update
+    from sqlmodel import Session, func, select
+    from database import engine
+    from jobs import check_alerts_job
+    from models import Alert, Notification, PriceCheckJobLog
+    from services.provider_governor import background_priority
+
+    def count(model):
+        with Session(engine) as session:
+            return session.exec(select(func.count()).select_from(model)).one()
+
+    async def one_pass():
+        with background_priority():
+            return await check_alerts_job()
+
+    # statements and commits issued by this process while the job runs
+    sql = Counter()
+
+    def on_execute(*_):
+        sql["statements"] += 1
+
+    def on_commit(*_):
+        sql["commits"] += 1
+
+    logs_before, notifications_before = count(PriceCheckJobLog), count(Notification)
+    durations = []
+    job_stats = {}
+    for _ in range(passes):
+        # make every alert due, so each pass checks all of them
+        with Session(engine) as session:
+            session.execute(update(Alert).values(next_check_at=datetime.utcnow()))
+            session.commit()
+        event.listen(engine, "before_cursor_execute", on_execute)
+        event.listen(engine, "commit", on_commit)
+        started = time.perf_counter()
+        try:
+            job_stats = asyncio.run(one_pass()) or {}
+        finally:
+            durations.append((time.perf_counter() - started) * 1000)
+            event.remove(engine, "before_cursor_execute", on_execute)
+            event.remove(engine, "commit", on_commit)
+    result = summarize(durations, sum(durations) / 1000, count_label="passes")
+    del result["throughput_rps"]
+    result["alerts"] = n_alerts
+    result["throughput_alerts_per_s"] = round(n_alerts * passes / (sum(durations) / 1000), 1) if durations else 0.0
+    result["job_logs_written"] = count(PriceCheckJobLog) - logs_before
+    result["notifications_created"] = count(Notification) - notifications_before
+    checked = max(n_alerts * passes, 1)
+    result["statements_per_1000_alerts"] = round(sql["statements"] * 1000 / checked, 1)
+    result["commits_per_1000_alerts"] = round(sql["commits"] * 1000 / checked, 1)
+    # the job's own counters from the last pass (provider calls, groups, ...)
+    result["job"] = job_stats
+    return result
+
+
+def compare(results: dict, baseline_path: str, threshold: float) -> int:
+    """Print the change per scenario against an earlier run; 1 if a p95 regressed past threshold"""
+    with open(baseline_path) as fh:
+        baseline = {(r["scale"], r["scenario"]): r for r in json.load(fh)["results"]}
+    print(f"\nvs {baseline_path}", file=sys.stderr)
+    print(f"{'scale':>8} {'scenario':<18}{'p50':>9}{'p95':>9}{'p99':>9}{'throughput':>12}", file=sys.stderr)
+    regressed = False
+    for r in results["results"]:
+        base = baseline.get((r["scale"], r["scenario"]))
+        if base is None:
+            continue
+
+        def delta(key):
+            return (r[key] - base[key]) / base[key] if base.get(key) else 0.0
+
+        rate_key = "throughput_alerts_per_s" if "throughput_alerts_per_s" in r else "throughput_rps"
+        print(f"{r['scale']:>8} {r['scenario']:<18}{delta('p50_ms'):>+9.1%}{delta('p95_ms'):>+9.1%}"
+              f"{delta('p99_ms'):>+9.1%}{delta(rate_key):>+12.1%}", file=sys.stderr)
+        regressed = regressed or delta("p95_ms") > threshold
+    return 1 if regressed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1000,10000,100000", help="alert counts to seed and measure")
+    parser.add_argument("--alerts-per-user", type=int, default=10)
+    parser.add_argument("--notifications-per-user", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=500, help="requests per API scenario")
+    parser.add_argument("--login-requests", type=int, default=50, help="login requests (bcrypt bound)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=50, help="replay provider median latency for the API")
+    parser.add_argument("--job-latency-ms", type=float, default=2, help="replay provider latency for the alert job")
+    parser.add_argument("--job-passes", type=int, default=1)
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--skip-job", action="store_true")
+    parser.add_argument("--database-url", help="defaults to a new SQLite file in a temp directory")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--output", help="write the JSON results here (default: stdout)")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="p95 regression that fails --compare")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-e2e-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["PROVIDER_MODE"] = "replay"
+    os.environ["JOBS_ENABLED"] = "false"
+    os.environ.setdefault("REPLAY_DIR", os.path.join(workdir, "recordings"))
+    os.environ.setdefault("REPLAY_LATENCY_DIST", "lognormal")
+    os.environ.setdefault("REPLAY_LATENCY_MS", str(args.latency_ms))
+    os.environ.setdefault("REPLAY_SEED", str(args.seed))
+    os.environ.setdefault("PROVIDER_RATE_PER_SECOND", "1000000")
+    os.environ.setdefault("PROVIDER_BURST", "1000000")
+
+    scales = [int(s) for s in args.scales.split(",")]
+    seeder = Seeder(args.alerts_per_user, args.notifications_per_user, seed=args.seed)
+    results = {
+        "benchmark": "e2e",
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": [],
+    }
+
+    date_offset = 0
+    for scale in scales:
+        started = time.perf_counter()
+        seeder.grow_to(scale)
+        print(f"[{scale}] seeded {seeder.alerts} alerts / {seeder.users} users "
+              f"in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        if not args.skip_api:
+            # a fresh server per scale: empty in-process caches, same database
+            with Server(os.path.join(workdir, "server.log")) as server:
+                for name, make_request, count in api_scenarios(args, seeder, date_offset):
+                    r = asyncio.run(run_load(server.base_url, make_request, count, args.concurrency))
+                    results["results"].append({"scale": scale, "scenario": name, "concurrency": args.concurrency, **r})
+                    print(f"[{scale}] {name:<17} p50 {r['p50_ms']:>8}ms  p95 {r['p95_ms']:>8}ms  "
+                          f"p99 {r['p99_ms']:>8}ms  {r['throughput_rps']:>8} req/s  errors {r['errors']}", file=sys.stderr)
+            date_offset += args.requests
+
+        if not args.skip_job:
+            # the job runs in this process; give it the job's provider latency
+            from providers.registry import default_provider
+            default_provider.client.latency.ms = args.job_latency_ms
+            r = run_job_passes(args.job_passes, seeder.alerts)
+            results["results"].append({"scale": scale, "scenario": "check_alerts_job", **r})
+            print(f"[{scale}] check_alerts_job  p50 {r['p50_ms']:>8}ms  "
+                  f"{r['throughput_alerts_per_s']:>8} alerts/s  {r['statements_per_1000_alerts']} statements and "
+                  f"{r['commits_per_1000_alerts']} commits per 1000 alerts", file=sys.stderr)
+
+    body = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(body + "\n")
+    else:
+        print(body)
+    if args.compare:
+        sys.exit(compare(results, args.compare, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# benchmarks/bench_normalizer.py
+"""
+Micro-benchmark of Amadeus offer normalization: the original two-pass dict
+pipeline (debug walk, nested dicts, per-call duration parsing, then parse_dt
+when shaping the response) against providers.amadeus_provider.normalize_offers
+producing FlightRecords.
+
+Payloads are Amadeus flight-offers responses. By default deterministic ones are
+synthesized at 5, 50 and 250 offers; pass --payload with a saved response body
+(the JSON with a "data" list) to replay a real recording instead.
+
+    python benchmarks/bench_normalizer.py --rounds 200
+    python benchmarks/bench_normalizer.py --payload recorded/dla-cdg.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from providers.amadeus_provider import normalize_offers
+from providers.offers import parse_iso_datetime, parse_iso_duration
+from providers.replay_provider import synthesize_offers
+
+def legacy_parse_duration(duration_str):
+    duration_str = duration_str.replace('PT', '')
+    hours = 0
+    minutes = 0
+    if 'H' in duration_str:
+        h_split = duration_str.split('H')
+        hours = int(h_split[0])
+        duration_str = h_split[1]
+    if 'M' in duration_str:
+        m_split = duration_str.split('M')
+        minutes = int(m_split[0])
+    return hours * 60 + minutes
+
+
+def legacy_parse_dt(val):
+    if isinstance(val, str):
+        try:
+            return datetime.fromisoformat(val)
+        except ValueError:
+            return None
+    return val
+
+
+def legacy_pipeline(offers: list) -> list:
+    """The pre-record path: debug walk, dict build, then response shaping with parse_dt"""
+    for offer in offers:
+        segments = offer['itineraries'][0]['segments']
+        route = ' -> '.join([s['departure']['iataCode'] for s in segments] + [segments[-1]['arrival']['iataCode']])
+        print(f"Found route: {route}, Duration: {offer['itineraries'][0]['duration']}, Price: {offer['price']['total']} XAF")
+    flights = []
+    for offer in offers:
+        itinerary = offer['itineraries'][0]
+        first_segment = itinerary['segments'][0]
+        last_segment = itinerary['segments'][-1]
+        flight = {
+            "provider_flight_id": offer['id'],
+            "provider_name": "Amadeus",
+            "airline": first_segment['carrierCode'],
+            "departure_airport_code": first_segment['departure']['iataCode'],
+            "arrival_airport_code": last_segment['arrival']['iataCode'],
+            "departure_time": first_segment['departure']['at'],
+            "arrival_time": last_segment['arrival']['at'],
+            "duration_minutes": legacy_parse_duration(itinerary['duration']),
+            "price": float(offer['price']['total']),
+            "currency": offer['price']['currency'],
+            "stops": len(itinerary['segments']) - 1,
+            "legs": [],
+        }
+        for idx, segment in enumerate(itinerary['segments'], 1):
+            flight['legs'].append({
+                "leg_number": idx,
+                "departure_airport": segment['departure']['iataCode'],
+                "arrival_airport": segment['arrival']['iataCode'],
+                "departure_time": segment['departure']['at'],
+                "arrival_time": segment['arrival']['at'],
+                "duration_minutes": legacy_parse_duration(segment['duration']),
+                "carrier": segment['carrierCode'],
+                "flight_number": segment['number'],
+            })
+        flights.append(flight)
+    return [{**f, "departure_time": legacy_parse_dt(f["departure_time"]),
+             "arrival_time": legacy_parse_dt(f["arrival_time"])} for f in flights]
+
+
+def record_pipeline(offers: list) -> list:
+    """What providers now return; persistence consumes these as they are"""
+    return normalize_offers(offers, "Amadeus")
+
+
+def record_response_pipeline(offers: list) -> list:
+    """Records plus the FlightOut response shape"""
+    return [r.as_dict() for r in normalize_offers(offers, "Amadeus")]
+
+
+def clear_parse_caches():
+    parse_iso_datetime.cache_clear()
+    parse_iso_duration.cache_clear()
+
+
+def measure(fn, offers: list, rounds: int, cold: bool) -> dict:
+    sink = io.StringIO()
+    timings = []
+    with contextlib.redirect_stdout(sink):
+        for _ in range(rounds):
+            if cold:
+                clear_parse_caches()
+            started = time.perf_counter()
+            fn(offers)
+            timings.append(time.perf_counter() - started)
+            sink.seek(0)
+            sink.truncate()
+        # retained size of one normalized result set (parser caches warm, as on a live server)
+        fn(offers)
+        tracemalloc.start()
+        kept = fn(offers)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    del kept
+    timings.sort()
+    return {
+        "us_per_offer": round(timings[len(timings) // 2] / max(len(offers), 1) * 1e6, 2),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "retained_kb": round(retained / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="5,50,250", help="offer counts for synthesized payloads")
+    parser.add_argument("--payload", action="append", default=[], help="recorded flight-offers response (JSON file)")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--cold", action="store_true", help="clear the parser caches before every round")
+    args = parser.parse_args()
+
+    payloads = []
+    for path in args.payload:
+        with open(path) as fh:
+            body = json.load(fh)
+        payloads.append((os.path.basename(path), body["data"] if isinstance(body, dict) else body))
+    if not payloads:
+        payloads = [(f"synthetic-{n}", synthesize_offers(n)) for n in map(int, args.sizes.split(","))]
+
+    print(f"{'payload':<16}{'offers':>7}{'strategy':>10}{'us/offer':>10}{'p50_ms':>10}{'retained_kb':>13}{'peak_kb':>10}")
+    for name, offers in payloads:
+        for strategy, fn in (("dicts", legacy_pipeline), ("records", record_pipeline),
+                             ("rec+out", record_response_pipeline)):
+            r = measure(fn, offers, args.rounds, args.cold)
+            print(f"{name:<16}{len(offers):>7}{strategy:>10}{r['us_per_offer']:>10}{r['p50_ms']:>10}"
+                  f"{r['retained_kb']:>13}{r['peak_kb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# benchmarks/bench_persistence.py
+"""
+Compare search-result persistence: the original per-flight add/commit/refresh
+loop against the bulk single-transaction upsert path. Every round persists the
+same offers, as repeated searches of a busy route do. Throughput is reported
+as searches/s and as rows written/s (inserted plus updated), and the table
+sizes left behind by each strategy are reported too.
+
+    python benchmarks/bench_persistence.py --flights 50 --rounds 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from sqlmodel import SQLModel, Session, create_engine, select, func
+
+from models import Search, Flight, SearchResult, FlightLeg, FlightPriceHistory
+from providers.offers import FlightRecord, FlightLegRecord
+from services.flight_store import persist_search_results
+
+
+def make_results(n_flights: int, legs_per_flight: int = 2):
+    base = datetime(2030, 1, 1, 8, 0)
+    results = []
+    for i in range(n_flights):
+        dep = base + timedelta(minutes=15 * i)
+        legs = []
+        for leg_no in range(1, legs_per_flight + 1):
+            leg_dep = dep + timedelta(hours=2 * (leg_no - 1))
+            legs.append(FlightLegRecord(
+                leg_no,
+                "DLA" if leg_no == 1 else "ADD",
+                "CDG" if leg_no == legs_per_flight else "ADD",
+                leg_dep, leg_dep + timedelta(minutes=90), 90, "ET", str(900 + i),
+            ))
+        results.append(FlightRecord(
+            str(i + 1), "Amadeus", "ET", "DLA", "CDG",
+            legs[0].departure_time, legs[-1].arrival_time,
+            90 * legs_per_flight + 30, 250000.0 + i, "XAF",
+            stops=legs_per_flight - 1, legs=legs,
+        ))
+    return results
+
+
+def persist_row_by_row(session: Session, search: Search, results):
+    """The pre-bulk loop from routes/flights.get_flights, kept for comparison"""
+    session.add(search)
+    session.commit()
+    session.refresh(search)
+    for r in results:
+        flight = Flight(
+            provider_flight_id=r.provider_flight_id,
+            provider_name=r.provider_name,
+            airline=r.airline,
+            departure_airport_code=r.departure_airport_code,
+            arrival_airport_code=r.arrival_airport_code,
+            departure_time=r.departure_time,
+            arrival_time=r.arrival_time,
+            duration_minutes=r.duration_minutes,
+            price=r.price,
+            currency=r.currency,
+            stops=r.stops,
+            cached=True,
+            search_id=search.id
+        )
+        session.add(flight)
+        session.commit()
+        session.refresh(flight)
+        for leg in r.legs:
+            session.add(FlightLeg(
+                flight_id=flight.id,
+                leg_number=leg.leg_number,
+                departure_airport=leg.departure_airport,
+                arrival_airport=leg.arrival_airport,
+                departure_time=leg.departure_time,
+                arrival_time=leg.arrival_time,
+                duration_minutes=leg.duration_minutes,
+                carrier=leg.carrier,
+                flight_number=leg.flight_number
+            ))
+        session.add(FlightPriceHistory(flight_id=flight.id, price=flight.price, currency=flight.currency))
+        session.commit()
+
+
+def run(strategy, url: str, results, rounds: int) -> dict:
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    writes = {"updated": 0}
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def count_updates(conn, cursor, statement, parameters, context, executemany):
+        # executemany reports the rows matched over all parameter sets
+        if statement.lstrip().upper().startswith("UPDATE") and cursor.rowcount > 0:
+            writes["updated"] += cursor.rowcount
+
+    started = time.perf_counter()
+    for i in range(rounds):
+        with Session(engine) as session:
+            search = Search(params={"round": i}, search_hash=f"bench-{i}", results_count=len(results))
+            strategy(session, search, results)
+    elapsed = time.perf_counter() - started
+    with Session(engine) as session:
+        sizes = {model.__tablename__: session.exec(select(func.count()).select_from(model)).one()
+                 for model in (Search, Flight, FlightLeg, FlightPriceHistory, SearchResult)}
+    engine.dispose()
+    # every table starts empty, so what is left in them is what was inserted
+    inserted = sum(sizes.values())
+    return {
+        "rounds": rounds,
+        "seconds": round(elapsed, 4),
+        "searches_per_second": round(rounds / elapsed, 1),
+        "rows_inserted": inserted,
+        "rows_updated": writes["updated"],
+        "rows_per_second": round((inserted + writes["updated"]) / elapsed, 1),
+        "inserted_per_second": round(inserted / elapsed, 1),
+        "updated_per_second": round(writes["updated"] / elapsed, 1),
+        **sizes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flights", type=int, default=50, help="offers per search")
+    parser.add_argument("--legs", type=int, default=2, help="legs per offer")
+    parser.add_argument("--rounds", type=int, default=20, help="searches persisted per strategy")
+    args = parser.parse_args()
+
+    # separate throwaway databases so table sizes are per strategy
+    tmpdir = tempfile.TemporaryDirectory()
+    results = make_results(args.flights, args.legs)
+    loop = run(persist_row_by_row, f"sqlite:///{os.path.join(tmpdir.name, 'loop.db')}", results, args.rounds)
+    bulk = run(persist_search_results, f"sqlite:///{os.path.join(tmpdir.name, 'bulk.db')}", results, args.rounds)
+
+    print(f"{'strategy':<12}{'seconds':>10}{'search/s':>10}{'rows/s':>10}{'insert/s':>10}{'update/s':>10}"
+          f"{'flight':>8}{'leg':>8}{'history':>9}{'links':>8}")
+    for name, r in (("row-by-row", loop), ("upsert", bulk)):
+        print(f"{name:<12}{r['seconds']:>10}{r['searches_per_second']:>10}{r['rows_per_second']:>10}"
+              f"{r['inserted_per_second']:>10}{r['updated_per_second']:>10}{r['flight']:>8}{r['flight_leg']:>8}"
+              f"{r['flight_price_history']:>9}{r['search_result']:>8}")
+    print(f"speedup: {bulk['searches_per_second'] / loop['searches_per_second']:.1f}x")
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
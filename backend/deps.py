@@ -4,7 +4,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 import os
 from sqlmodel import Session, select
-from models import User
+from models import User, UserRole
 from database import get_session
 from dotenv import load_dotenv
 
@@ -15,10 +15,9 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 
-def get_db():
-    yield from get_session()
-
-def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_db)) -> User:
+# Depends on get_session itself so FastAPI reuses the route's session (one pooled
+# connection per request, not two)
+def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -36,3 +35,9 @@ def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Dep
     if not user:
         raise credentials_exception
     return user
+
+def get_current_admin(user: User = Depends(get_current_user)) -> User:
+    """Operator endpoints (e.g. /api/stats) expose internals; admins only"""
+    if user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return user
@@ -1,6 +1,6 @@
 # jobs.py
 try:
-    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
     from apscheduler.triggers.interval import IntervalTrigger
     from apscheduler.events import EVENT_JOB_ERROR
 except ImportError:
@@ -11,6 +11,7 @@ import os
 
 try:
     from sqlmodel import select, Session
+    from sqlalchemy import func, insert, or_, update
 except ImportError:
     logger.error("SQLModel not installed. Please install it with: pip install sqlmodel")
     raise
@@ -26,28 +27,66 @@ from models import (
     DeviceToken,
     NotificationChannel,
 )
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from email.utils import formatdate
 import traceback
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import asyncio
-from providers.amadeus_provider import AmadeusProvider
+import socket
+import time
+import uuid
+from providers.registry import default_provider
+from providers.amadeus_client import aclose_amadeus_clients
 from services.notification_service import notification_service
+from services.alert_index import alert_index, alert_itinerary_key
+from services.job_runner import job_runner
+from services.leader_election import LeaderElection
+from services.price_check_rollups import compact_price_check_logs
+from services.provider_governor import background_priority
+from services.search_cache import canonical_search_params, cheapest_stored_fares, compute_search_hash
 
 logger = logging.getLogger(__name__)
 
+# Longest the scheduler sleeps between runs; it wakes earlier when an alert falls due
+PRICE_CHECK_INTERVAL_MINUTES = int(os.getenv("PRICE_CHECK_INTERVAL_MINUTES", "60"))
+SCHEDULER_MIN_SLEEP_SECONDS = float(os.getenv("SCHEDULER_MIN_SLEEP_SECONDS", "5"))
+ALERT_CHECK_BATCH_SIZE = int(os.getenv("ALERT_CHECK_BATCH_SIZE", "500"))
+# Delay before retrying alerts whose itinerary could not be priced
+ALERT_CHECK_RETRY_MINUTES = int(os.getenv("ALERT_CHECK_RETRY_MINUTES", "15"))
+# Provider quotes kept in flight by one run
+ALERT_CHECK_CONCURRENCY = int(os.getenv("ALERT_CHECK_CONCURRENCY", "8"))
+# Quotes waiting for the DB writer; the workers pause when it is full
+ALERT_RESULT_QUEUE_SIZE = int(os.getenv("ALERT_RESULT_QUEUE_SIZE", "256"))
+# Most alerts the writer applies in one transaction
+ALERT_WRITE_BATCH_SIZE = int(os.getenv("ALERT_WRITE_BATCH_SIZE", "500"))
+# How long a claimed batch stays reserved for this process
+ALERT_LEASE_SECONDS = int(os.getenv("ALERT_LEASE_SECONDS", "300"))
+
+# A stored /api/flights search younger than this prices one-way alerts without a provider call; 0 disables
+ALERT_STORED_QUOTE_MAX_AGE_SECONDS = int(os.getenv("ALERT_STORED_QUOTE_MAX_AGE_SECONDS", "900"))
+
+# Rebuild the in-memory alert index this often, for alert edits made by other processes
+ALERT_INDEX_REFRESH_SECONDS = int(os.getenv("ALERT_INDEX_REFRESH_SECONDS", "300"))
+
+# How often the leader folds old PriceCheckJobLog rows into rollups; 0 disables
+PRICE_LOG_COMPACTION_INTERVAL_HOURS = float(os.getenv("PRICE_LOG_COMPACTION_INTERVAL_HOURS", "6"))
+
+# Identifies this process's alert claims and its scheduler candidacy
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Only the process holding this lease schedules alert checks
+scheduler_leader = LeaderElection("scheduler", WORKER_ID)
+
 # Replace with real provider adapter
-def query_provider_for_alert(alert: Alert):
+async def query_provider_for_alert(alert: Alert):
     """
     Query the appropriate provider for price information
     """
     try:
-        # Initialize Amadeus provider
-        provider = AmadeusProvider()
-        
-        # Query the price
-        result = provider.check_price(
+        # Shared provider: reuses the process-wide pool and cached access token
+        # (the offline replay provider when PROVIDER_MODE=replay)
+        result = await default_provider.check_price(
             departure=alert.departure,
             arrival=alert.arrival,
             departure_date=alert.departure_date,
@@ -64,155 +103,618 @@ def query_provider_for_alert(alert: Alert):
         logger.error(f"Error querying provider for alert {alert.id}: {str(e)}")
         return None
 
-async def send_notification(notification: Notification, session) -> bool:
+async def deliver_notifications(session: Session, notifications: List[Notification]) -> int:
     """
-    Send notification using the notification service and update its status.
+    Send already-stored notifications through the notification service and
+    write their outcomes back in one bulk update. Returns how many were sent.
     """
-    try:
-        logger.info(f"Sending {notification.channel} notification to {notification.recipient_address}")
-        
-        # Use the notification service to send the notification
-        success = await notification_service.process_notification(notification)
-        
+    statuses = []
+    sent = 0
+    for notification in notifications:
+        status = {"id": notification.id, "attempts": notification.attempts}
+        try:
+            logger.info(f"Sending {notification.channel} notification to {notification.recipient_address}")
+            success = await notification_service.process_notification(notification)
+        except Exception as e:
+            logger.error(f"Error sending notification: {str(e)}")
+            success = False
+            status["last_error"] = str(e)
         if success:
-            notification.status = NotificationStatus.SENT
-            notification.sent_at = datetime.utcnow()
+            sent += 1
+            status.update(status=NotificationStatus.SENT, sent_at=datetime.utcnow())
         else:
-            notification.attempts += 1
-            notification.status = NotificationStatus.FAILED
-            
-        session.add(notification)
-        session.commit()
-        return success
-        
-    except Exception as e:
-        logger.error(f"Error sending notification: {str(e)}")
-        notification.attempts += 1
-        notification.last_error = str(e)
-        notification.status = NotificationStatus.FAILED
-        session.add(notification)
-        session.commit()
-        return False
-
-async def check_alerts_job():
-    """Check all active alerts and send notifications if price targets are met"""
-    logger.info("[jobs] Running check_alerts_job at %s", datetime.utcnow().isoformat())
-    
+            status.update(status=NotificationStatus.FAILED, attempts=notification.attempts + 1)
+        statuses.append(status)
+    if statuses:
+        await asyncio.to_thread(write_delivery_statuses, session, statuses)
+    return sent
+
+def write_delivery_statuses(session: Session, statuses: List[Dict[str, Any]]) -> None:
+    session.execute(update(Notification), statuses)
+    session.commit()
+
+def stored_search_hashes(key: tuple) -> List[str]:
+    """
+    Hashes of the /api/flights searches equivalent to a provider price check on
+    this itinerary: one adult, unspecified or economy cabin. Searches are one-way,
+    so round-trip itineraries have none.
+    """
+    departure, arrival, departure_date, return_date = key
+    if return_date is not None:
+        return []
+    return [compute_search_hash(canonical_search_params(departure, arrival, departure_date.isoformat(), 1, cabin))
+            for cabin in (None, "economy")]
+
+def load_stored_quotes(session: Session, keys: List[tuple]) -> Dict[tuple, Dict[str, Any]]:
+    """Quotes for the itineraries a fresh stored search already priced, in one lookup"""
+    hashes = {search_hash: key for key in keys for search_hash in stored_search_hashes(key)}
+    fares = cheapest_stored_fares(session, list(hashes), ALERT_STORED_QUOTE_MAX_AGE_SECONDS)
+    quotes: Dict[tuple, Dict[str, Any]] = {}
+    for search_hash, fare in fares.items():
+        key = hashes[search_hash]
+        # either cabin spelling may have a search; keep the newer quote
+        if key not in quotes or fare["details"]["quoted_at"] > quotes[key]["details"]["quoted_at"]:
+            quotes[key] = fare
+    return quotes
+
+def group_alerts_by_itinerary(alerts) -> Dict[tuple, List[Alert]]:
+    """Valid alerts bucketed by itinerary; alerts missing route fields are skipped"""
+    groups: Dict[tuple, List[Alert]] = {}
+    for alert in alerts:
+        if not all([alert.departure, alert.arrival, alert.departure_date]):
+            logger.error(f"Alert {alert.id} missing required fields")
+            continue
+        groups.setdefault(alert_itinerary_key(alert), []).append(alert)
+    return groups
+
+def is_push_alert(alert: Alert) -> bool:
+    return alert.notify_channel == NotificationChannel.PUSH or str(alert.notify_channel).lower() == "push"
+
+def load_recipients(session: Session, alerts: List[Alert]) -> Dict[str, Dict[int, Optional[str]]]:
+    """
+    Notification address per user of `alerts`: the most recently used device
+    token for push alerts, else the user's email. One query for the users and
+    one for the device tokens, however many alerts matched.
+    """
+    user_ids = {alert.user_id for alert in alerts}
+    emails = dict(session.exec(select(User.id, User.email).where(User.id.in_(user_ids))).all())
+    push_ids = {alert.user_id for alert in alerts if is_push_alert(alert)}
+    tokens: Dict[int, Optional[str]] = {}
+    if push_ids:
+        rows = session.exec(
+            select(DeviceToken.user_id, DeviceToken.token)
+            .where(DeviceToken.user_id.in_(push_ids))
+            .order_by(DeviceToken.user_id, DeviceToken.last_used_at.desc())
+        ).all()
+        for user_id, token in rows:
+            tokens.setdefault(user_id, token)
+    return {"email": emails, "push": tokens}
+
+def notification_row(alert: Alert, result: Dict[str, Any], price: float, recipients: Dict[str, Dict[int, Optional[str]]],
+                     now: datetime) -> Dict[str, Any]:
+    recipient_addr = recipients["push"].get(alert.user_id) if is_push_alert(alert) else None
+    return {
+        "user_id": alert.user_id,
+        "alert_id": alert.id,
+        "channel": alert.notify_channel,
+        "recipient_address": recipient_addr or recipients["email"].get(alert.user_id),
+        "payload": {
+            "price": price,
+            "currency": result.get("currency", alert.currency or "USD"),
+            "provider": result.get("provider", "amadeus"),
+            "route": f"{alert.departure}-{alert.arrival}",
+            "departure_date": alert.departure_date.isoformat(),
+            "return_date": alert.return_date.isoformat() if alert.return_date else None,
+            "target_price": alert.max_price,
+            "details": result.get("details", {}),
+        },
+        "status": NotificationStatus.PENDING,
+        "attempts": 0,
+        "created_at": now,
+    }
+
+def bring_forward(session: Session, alert_ids: List[int], now: datetime) -> int:
+    """
+    Make alerts a fresh price has met due now instead of at their next slot.
+    Alerts already due, or whose latest check already notified, are left alone,
+    so a price that stays under target does not notify on every search.
+    """
+    result = session.execute(
+        update(Alert)
+        .where(
+            Alert.id.in_(alert_ids),
+            Alert.active == True,
+            Alert.next_check_at > now,
+            or_(Alert.last_notified_at.is_(None), Alert.last_checked_at > Alert.last_notified_at),
+        )
+        .values(next_check_at=now)
+    )
+    return result.rowcount
+
+def on_price_ingested(session: Session, key: tuple, price: float) -> int:
+    """
+    A search stored `price` for itinerary `key`: check the alerts it meets right
+    away. The index lookup is O(log n + matches). Returns how many were brought forward.
+    Any process ingests prices, not only the scheduler leader, so each keeps its
+    own index fresh here.
+    """
+    alert_index.refresh(session, ALERT_INDEX_REFRESH_SECONDS)
+    alert_ids = alert_index.match(key, price)
+    if not alert_ids:
+        return 0
+    now = datetime.utcnow()
+    triggered = bring_forward(session, alert_ids, now)
+    session.commit()
+    if triggered:
+        logger.info(f"Price {price} for {key[0]}-{key[1]} on {key[2]} met {triggered} alerts; checking now")
+        schedule_alert_check(now)
+    return triggered
+
+def backfill_next_check(session: Session, due_at: datetime) -> None:
+    """Alerts from before next_check_at existed are due now"""
+    session.execute(
+        update(Alert).where(Alert.next_check_at.is_(None)).values(next_check_at=due_at)
+    )
+    session.commit()
+
+def claim_due_alerts(session: Session, due_by: datetime, limit: int) -> List[Alert]:
+    """
+    Lease up to `limit` of the oldest-due alerts to this process. The claim is a
+    single conditional UPDATE, so concurrent workers never both win a row; on
+    Postgres the candidate rows are also locked with SKIP LOCKED so workers pick
+    disjoint batches instead of contending. Leases of crashed workers expire
+    after ALERT_LEASE_SECONDS and the alerts become claimable again.
+    """
+    now = datetime.utcnow()
+    expires = now + timedelta(seconds=ALERT_LEASE_SECONDS)
+    claimable = or_(Alert.claim_owner.is_(None), Alert.lease_expires_at < now)
+    candidates = (
+        select(Alert.id)
+        .where(Alert.active == True, Alert.next_check_at <= due_by, claimable)
+        .order_by(Alert.next_check_at, Alert.id)
+        .limit(limit)
+    )
+    if engine.dialect.name == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+    session.execute(
+        update(Alert)
+        .where(Alert.id.in_(candidates), claimable)
+        .values(claim_owner=WORKER_ID, lease_expires_at=expires)
+    )
+    session.commit()
+    q = (
+        select(Alert)
+        .where(Alert.claim_owner == WORKER_ID, Alert.lease_expires_at == expires)
+        .order_by(Alert.next_check_at, Alert.id)
+    )
+    return session.exec(q).all()
+
+def next_due_at(session: Session) -> Optional[datetime]:
+    """
+    Earliest next_check_at among active alerts. Alerts without one (created
+    before the column existed) are due now; the run backfills them.
+    """
+    unscheduled = session.exec(
+        select(Alert.id).where(Alert.active == True, Alert.next_check_at.is_(None)).limit(1)
+    ).first()
+    if unscheduled is not None:
+        return datetime.utcnow()
+    return session.exec(select(func.min(Alert.next_check_at)).where(Alert.active == True)).one()
+
+class CheckRunMetrics:
+    """Counters for one check_alerts_job run"""
+
+    def __init__(self):
+        self.started_at = datetime.utcnow()
+        self._started = time.perf_counter()
+        self.duration_seconds = 0.0
+        self.alerts = 0
+        self.batches = 0
+        self.provider_calls = 0
+        self.provider_calls_saved = 0
+        self.price_triggers = 0
+        self.matched = 0
+        self.notifications_sent = 0
+        self.unpriced = 0
+        self.errors = 0
+        self.lost_leases = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.max_queue_depth = 0
+        self._queue_depth_total = 0
+        self._queue_samples = 0
+
+    def sample_queue(self, depth: int) -> None:
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._queue_depth_total += depth
+        self._queue_samples += 1
+
+    def finish(self) -> None:
+        self.duration_seconds = time.perf_counter() - self._started
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": round(self.duration_seconds, 3),
+            "alerts": self.alerts,
+            "batches": self.batches,
+            "provider_calls": self.provider_calls,
+            "provider_calls_saved": self.provider_calls_saved,
+            "matched": self.matched,
+            "price_triggers": self.price_triggers,
+            "notifications_sent": self.notifications_sent,
+            "unpriced": self.unpriced,
+            "errors": self.errors,
+            "lost_leases": self.lost_leases,
+            "worker_id": WORKER_ID,
+            "alerts_per_second": round(self.alerts / self.duration_seconds, 1) if self.duration_seconds else 0.0,
+            "concurrency": ALERT_CHECK_CONCURRENCY,
+            "max_in_flight": self.max_in_flight,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_queue_depth": round(self._queue_depth_total / self._queue_samples, 1) if self._queue_samples else 0.0,
+        }
+
+# Metrics of the most recent check_alerts_job run, for /api/stats/alerts
+last_check_run: Optional[Dict[str, Any]] = None
+
+async def dispatch_due_alerts(run_started: datetime, work: asyncio.Queue, results: asyncio.Queue,
+                              quotes: Dict[tuple, Any], pending: Dict[tuple, List[int]], metrics: CheckRunMetrics) -> None:
+    """
+    Claim the alerts due at run start batch by batch and route them: itineraries
+    already quoted this run, or priced by a fresh stored search, go straight to
+    the writer, new ones to the quote workers, and alerts on an itinerary being
+    quoted wait for that quote. Claims and stored-quote reads run in a worker
+    thread, so quotes in flight keep going meanwhile.
+    """
     with Session(engine) as session:
-        # Query all active alerts
-        q = select(Alert).where(Alert.active == True)
-        alerts = session.exec(q).all()
-        
-        for alert in alerts:
+        while True:
+            # claimed rows are excluded from the next claim until written or expired
+            batch = await asyncio.to_thread(claim_due_alerts, session, run_started, ALERT_CHECK_BATCH_SIZE)
+            if not batch:
+                break
+            metrics.batches += 1
+            metrics.alerts += len(batch)
+            groups = group_alerts_by_itinerary(batch)
+            grouped = {a.id for members in groups.values() for a in members}
+            invalid = [a.id for a in batch if a.id not in grouped]
+            unquoted = [key for key in groups if key not in quotes and key not in pending]
+            stored = await asyncio.to_thread(load_stored_quotes, session, unquoted) if unquoted else {}
+            metrics.provider_calls_saved += len(stored)
+            quotes.update(stored)
+            # detach the page; the read session keeps no state between pages
+            session.expunge_all()
+            if invalid:
+                await results.put((None, invalid, None))
+
+            for key, members in groups.items():
+                ids = [a.id for a in members]
+                if key in quotes:
+                    await results.put((key, ids, quotes[key]))
+                elif key in pending:
+                    pending[key].extend(ids)
+                else:
+                    pending[key] = ids
+                    # any member can stand in for the group: they share the itinerary
+                    await work.put((key, members[0]))
+
+async def quote_worker(work: asyncio.Queue, results: asyncio.Queue, quotes: Dict[tuple, Any],
+                       pending: Dict[tuple, List[int]], metrics: CheckRunMetrics) -> None:
+    """Fetch one itinerary's quote at a time and hand it, with its alerts, to the writer"""
+    while True:
+        key, alert = await work.get()
+        try:
+            metrics.provider_calls += 1
+            metrics.in_flight += 1
+            metrics.max_in_flight = max(metrics.max_in_flight, metrics.in_flight)
             try:
-                # Validate required fields
-                if not all([alert.departure, alert.arrival, alert.departure_date]):
-                    logger.error(f"Alert {alert.id} missing required fields")
-                    continue
-                
-                result = query_provider_for_alert(alert)
-                if not result:
-                    logger.warning(f"No price information found for alert {alert.id}")
-                    continue
-                
-                price = float(result["price"])
-                matched = False
-                if alert.max_price is not None and price <= alert.max_price:
-                    matched = True
-                    logger.info(f"Price target met for alert {alert.id}: {price} <= {alert.max_price}")
-
-                # Record job log
-                job_log = PriceCheckJobLog(
-                    alert_id=alert.id,
-                    ran_at=datetime.utcnow(),
-                    checked_price=price,
-                    currency=result.get("currency", alert.currency or "USD"),
-                    matched=matched,
-                    details=result.get("details", {})
-                )
-                session.add(job_log)
-
-                # Update alert
-                alert.last_checked_at = datetime.utcnow()
-                session.add(alert)
-                
-                if matched:
-                    # Create and send notification
-                    # Determine recipient address: prefer device token if push, otherwise user's email
-                    recipient_addr = None
-                    user = session.get(User, alert.user_id)
-
-                    try:
-                        is_push = (
-                            alert.notify_channel == NotificationChannel.PUSH
-                            or str(alert.notify_channel).lower() == 'push'
-                        )
-                    except Exception:
-                        is_push = False
-
-                    if is_push:
-                        try:
-                            dt_q = select(DeviceToken).where(DeviceToken.user_id == alert.user_id).order_by(DeviceToken.last_used_at.desc())
-                            dt = session.exec(dt_q).first()
-                            if dt and dt.token:
-                                recipient_addr = dt.token
-                        except Exception:
-                            recipient_addr = None
-
-                    if not recipient_addr and user:
-                        recipient_addr = user.email
-
-                    notif = Notification(
-                        user_id=alert.user_id,
-                        alert_id=alert.id,
-                        channel=alert.notify_channel,
-                        recipient_address=recipient_addr,
-                        payload={
-                            "price": price,
-                            "currency": result.get("currency", alert.currency or "USD"),
-                            "provider": result.get("provider", "amadeus"),
-                            "route": f"{alert.departure}-{alert.arrival}",
-                            "departure_date": alert.departure_date.isoformat(),
-                            "return_date": alert.return_date.isoformat() if alert.return_date else None,
-                            "target_price": alert.max_price,
-                            "details": result.get("details", {})
-                        },
-                        status=NotificationStatus.PENDING,
-                        created_at=datetime.utcnow()
-                    )
-                    session.add(notif)
-                    session.commit()
-                    session.refresh(notif)
-                    
-                    # Send notification
-                    await send_notification(notif, session)
+                result = await query_provider_for_alert(alert)
+            finally:
+                metrics.in_flight -= 1
+            quotes[key] = result
+            await results.put((key, pending.pop(key), result))
+        finally:
+            work.task_done()
 
+def write_checks(session: Session, items: List[tuple], metrics: CheckRunMetrics) -> List[Notification]:
+    """
+    Apply a batch of (itinerary, alert ids, quote) results in one transaction:
+    load the still-claimed alerts, then insert every job log, reschedule and
+    release every alert and insert every notification with one executemany
+    each. Returns the stored notifications, still to be delivered.
+    """
+    ids = [alert_id for _, item_ids, _ in items for alert_id in item_ids]
+    # a lease that expired while queued may have gone to another worker
+    alerts = {a.id: a for a in session.exec(select(Alert).where(Alert.id.in_(ids), Alert.claim_owner == WORKER_ID)).all()}
+    metrics.lost_leases += len(ids) - len(alerts)
+
+    now = datetime.utcnow()
+    retry_at = now + timedelta(minutes=ALERT_CHECK_RETRY_MINUTES)
+    log_rows, alert_rows, notified_rows, retry_rows, matches, triggered = [], [], [], [], [], []
+    for key, item_ids, result in items:
+        # an alert re-claimed after its lease expired mid-run can arrive twice; write it once
+        claimed = [alerts.pop(i) for i in item_ids if i in alerts]
+        if not result:
+            if key is not None:
+                logger.warning(f"No price information found for {key[0]}-{key[1]} on {key[2]} ({len(item_ids)} alerts)")
+            metrics.unpriced += len(claimed)
+            retry_rows.extend({"id": a.id, "next_check_at": retry_at, "claim_owner": None, "lease_expires_at": None}
+                              for a in claimed)
+            continue
+        price = float(result["price"])
+        for alert in claimed:
+            matched = alert.max_price is not None and price <= alert.max_price
+            if matched:
+                logger.info(f"Price target met for alert {alert.id}: {price} <= {alert.max_price}")
+                matches.append((alert, result, price))
+            log_rows.append({
+                "alert_id": alert.id,
+                "ran_at": now,
+                "checked_price": price,
+                "currency": result.get("currency", alert.currency or "USD"),
+                "matched": matched,
+                "details": result.get("details", {}),
+            })
+            row = {
+                "id": alert.id,
+                "last_checked_at": now,
+                "next_check_at": now + timedelta(minutes=alert.check_frequency_minutes or 60),
+                "claim_owner": None,
+                "lease_expires_at": None,
+            }
+            if matched:
+                row["last_notified_at"] = now
+                notified_rows.append(row)
+            else:
+                alert_rows.append(row)
+        # alerts on this itinerary the quote meets but that are not due yet
+        item_id_set = set(item_ids)
+        triggered.extend(i for i in alert_index.match(key, price) if i not in item_id_set)
+
+    notification_rows = []
+    if matches:
+        recipients = load_recipients(session, [alert for alert, _, _ in matches])
+        notification_rows = [notification_row(alert, result, price, recipients, now) for alert, result, price in matches]
+    if log_rows:
+        session.execute(insert(PriceCheckJobLog), log_rows)
+    # bulk UPDATE .. WHERE id = :id, one executemany per column set
+    for rows in (alert_rows, notified_rows, retry_rows):
+        if rows:
+            session.execute(update(Alert), rows)
+    notifications = []
+    if notification_rows:
+        # claimed alerts are popped, so alert_id identifies its row; asking for rows
+        # in parameter order would make SQLite insert them one at a time
+        inserted = dict(session.execute(
+            insert(Notification).returning(Notification.alert_id, Notification.id),
+            notification_rows,
+        ).all())
+        notifications = [Notification(id=inserted[row["alert_id"]], **row) for row in notification_rows]
+    if triggered:
+        metrics.price_triggers += bring_forward(session, triggered, now)
+    session.commit()
+    metrics.matched += len(matches)
+    return notifications
+
+def release_failed_checks(session: Session, items: List[tuple]) -> None:
+    """Hand back the claimed alerts of a batch that failed to write, for a retry"""
+    session.rollback()
+    ids = [alert_id for _, item_ids, _ in items for alert_id in item_ids]
+    session.execute(
+        update(Alert)
+        .where(Alert.id.in_(ids), Alert.claim_owner == WORKER_ID)
+        .values(next_check_at=datetime.utcnow() + timedelta(minutes=ALERT_CHECK_RETRY_MINUTES),
+                claim_owner=None, lease_expires_at=None)
+    )
+    session.commit()
+
+async def write_results(results: asyncio.Queue, metrics: CheckRunMetrics) -> None:
+    """
+    The run's only writer: takes whatever quotes are queued, up to
+    ALERT_WRITE_BATCH_SIZE alerts, and writes them as one transaction, then
+    delivers the notifications that batch created. Each transaction runs in a
+    worker thread on the writer's session, so the quote workers are not stalled
+    while a batch commits.
+    """
+    with Session(engine) as session:
+        done = False
+        while not done:
+            item = await results.get()
+            # depth when the writer picked this batch up, the first item included
+            metrics.sample_queue(results.qsize() + 1)
+            items = []
+            size = 0
+            while item is not None:
+                items.append(item)
+                size += len(item[1])
+                if size >= ALERT_WRITE_BATCH_SIZE or results.empty():
+                    break
+                item = results.get_nowait()
+            done = item is None
+            if not items:
+                continue
+            try:
+                notifications = await asyncio.to_thread(write_checks, session, items, metrics)
             except Exception as e:
-                logger.error(f"Error processing alert {alert.id}: {str(e)}")
+                logger.error(f"Error writing {size} alert checks: {str(e)}")
                 traceback.print_exc()
-                continue
-            
+                metrics.errors += size
+                await asyncio.to_thread(release_failed_checks, session, items)
+                notifications = []
+            if notifications:
+                metrics.notifications_sent += await deliver_notifications(session, notifications)
+            # keep the identity map small: commit expires every object it holds
+            session.expunge_all()
+
+async def check_alerts_job() -> Dict[str, Any]:
+    """
+    Check the active alerts that are due and send notifications if price targets
+    are met. A dispatcher pages through due alerts (ALERT_CHECK_BATCH_SIZE per
+    page), ALERT_CHECK_CONCURRENCY workers keep that many provider quotes in
+    flight, one per itinerary per run (none when a search from the last
+    ALERT_STORED_QUOTE_MAX_AGE_SECONDS priced it), and a single writer consumes
+    the quotes from a bounded queue, one transaction per ALERT_WRITE_BATCH_SIZE
+    alerts, evaluating every member's max_price and rescheduling it
+    check_frequency_minutes ahead (ALERT_CHECK_RETRY_MINUTES if unpriced).
+    Returns the run's metrics.
+    """
+    global last_check_run
+    metrics = CheckRunMetrics()
+    run_started = metrics.started_at
+    logger.info("[jobs] Running check_alerts_job at %s", run_started.isoformat())
+
+    with Session(engine) as session:
+        backfill_next_check(session, run_started)
+        alert_index.refresh(session, ALERT_INDEX_REFRESH_SECONDS)
+
+    work: asyncio.Queue = asyncio.Queue(maxsize=ALERT_CHECK_CONCURRENCY * 2)
+    results: asyncio.Queue = asyncio.Queue(maxsize=ALERT_RESULT_QUEUE_SIZE)
+    quotes: Dict[tuple, Any] = {}
+    pending: Dict[tuple, List[int]] = {}
+
+    async def feed():
+        await dispatch_due_alerts(run_started, work, results, quotes, pending, metrics)
+        await work.join()
+        await results.put(None)
+
+    workers = [asyncio.create_task(quote_worker(work, results, quotes, pending, metrics))
+               for _ in range(ALERT_CHECK_CONCURRENCY)]
+    tasks = [asyncio.create_task(feed()), asyncio.create_task(write_results(results, metrics))]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in workers + tasks:
+            task.cancel()
+        await asyncio.gather(*workers, *tasks, return_exceptions=True)
+        # hand back anything claimed but not written (only after a failure or cancellation)
+        with Session(engine) as session:
+            session.execute(
+                update(Alert).where(Alert.claim_owner == WORKER_ID).values(claim_owner=None, lease_expires_at=None)
+            )
             session.commit()
+        metrics.finish()
+        last_check_run = metrics.as_dict()
+
+    logger.info(
+        f"[jobs] Checked {metrics.alerts} due alerts with {metrics.provider_calls} provider calls "
+        f"({metrics.provider_calls_saved} saved by stored searches) in "
+        f"{metrics.duration_seconds:.1f}s ({last_check_run['alerts_per_second']} alerts/s, "
+        f"{metrics.matched} matched, max queue depth {metrics.max_queue_depth})"
+    )
+    return last_check_run
+
+_scheduler: Optional[AsyncIOScheduler] = None
+
+def _run_date(when: datetime) -> datetime:
+    # alert times are naive UTC; APScheduler needs them zone-aware
+    return when.replace(tzinfo=timezone.utc)
+
+def schedule_alert_check(when: Optional[datetime]) -> None:
+    """Bring the next scheduler wake-up forward to `when` (e.g. a new alert is due now)"""
+    if _scheduler is None or when is None:
+        return
+    try:
+        job = _scheduler.get_job("check_alerts")
+        if job is not None and job.next_run_time is not None and job.next_run_time > _run_date(when):
+            job.modify(next_run_time=_run_date(max(when, datetime.utcnow())))
+    except Exception as e:
+        logger.error(f"Could not reschedule check_alerts: {e}")
+
+def next_wake_at() -> datetime:
+    """
+    Earliest due alert, but no sooner than SCHEDULER_MIN_SLEEP_SECONDS and no
+    later than PRICE_CHECK_INTERVAL_MINUTES from now
+    """
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        due = next_due_at(session)
+    earliest = now + timedelta(seconds=SCHEDULER_MIN_SLEEP_SECONDS)
+    latest = now + timedelta(minutes=PRICE_CHECK_INTERVAL_MINUTES)
+    return min(max(due or latest, earliest), latest)
+
+async def run_check_alerts() -> Dict[str, Any]:
+    # alert checks yield provider budget to interactive searches
+    with background_priority():
+        return await check_alerts_job()
+
+async def close_job_resources() -> None:
+    """Runner shutdown: the pools and connections kept open between runs"""
+    await aclose_amadeus_clients()
+    notification_service.close()
 
 def start_scheduler():
-    """Start the background scheduler with async job support"""
-    scheduler = BackgroundScheduler()
-    
-    async def run_check_alerts():
+    """
+    Start the background job runner and stand for scheduler leadership. The
+    elected process schedules alert checks, each run scheduling the next at the
+    earliest due time, and job log compaction every
+    PRICE_LOG_COMPACTION_INTERVAL_HOURS; the others only heartbeat, ready to
+    take over. Runs share the runner's event loop, so provider connection pools
+    and the SMTP connection stay open between them.
+    """
+    global _scheduler
+    scheduler = job_runner.start()
+    job_runner.on_stop(close_job_resources)
+    check_alerts = job_runner.track(
+        "check_alerts", run_check_alerts, items=lambda run: (run["alerts"], run["errors"] + run["unpriced"])
+    )
+    compact_logs = job_runner.track(
+        "compact_job_logs", compact_price_check_logs, items=lambda run: (run["rows_compacted"], 0)
+    )
+
+    async def tick():
+        try:
+            await check_alerts()
+        except asyncio.CancelledError:
+            # runner shutdown; the run already handed back its claims
+            logger.info("[jobs] Alert check cancelled by shutdown")
+            return
+        if scheduler_leader.is_leader:
+            schedule_next()
+
+    def schedule_next():
         try:
-            await check_alerts_job()
+            wake = next_wake_at()
         except Exception as e:
-            logger.error(f"Error in check_alerts_job: {str(e)}")
-            traceback.print_exc()
-    
-    # Add job with async wrapper
-    scheduler.add_job(
-        lambda: asyncio.run(run_check_alerts()), 
-        "interval", 
-        minutes=int(os.getenv("PRICE_CHECK_INTERVAL_MINUTES", "60")),
-        id="check_alerts",
-        max_instances=1  # Prevent overlapping runs
-    )
+            logger.error(f"Could not compute next alert check time: {e}")
+            wake = datetime.utcnow() + timedelta(minutes=PRICE_CHECK_INTERVAL_MINUTES)
+        scheduler.add_job(
+            tick,
+            "date",
+            run_date=_run_date(wake),
+            id="check_alerts",
+            replace_existing=True,
+            max_instances=1,  # Prevent overlapping runs
+            misfire_grace_time=None,
+        )
+        logger.info(f"[jobs] Next alert check at {wake.isoformat()}")
+
+    def lead():
+        schedule_next()
+        if PRICE_LOG_COMPACTION_INTERVAL_HOURS > 0:
+            scheduler.add_job(
+                compact_logs,
+                IntervalTrigger(hours=PRICE_LOG_COMPACTION_INTERVAL_HOURS),
+                id="compact_job_logs",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True,
+                next_run_time=datetime.now(timezone.utc) + timedelta(minutes=1),
+            )
+
+    def unschedule():
+        # a check already running finishes; its alert claims keep it safe alongside the new leader's
+        for job_id in ("check_alerts", "compact_job_logs"):
+            try:
+                scheduler.remove_job(job_id)
+            except Exception:
+                pass
+
+    def pull_forward():
+        # alerts created or edited by other processes cannot wake this scheduler themselves
+        try:
+            with Session(engine) as session:
+                schedule_alert_check(next_due_at(session))
+        except Exception as e:
+            logger.error(f"Could not refresh next alert check time: {e}")
     
     # Add error listener
     def job_error_listener(event):
@@ -220,7 +722,20 @@ def start_scheduler():
             logger.error(f"Job {event.job_id} raised an exception: {str(event.exception)}")
     
     scheduler.add_listener(job_error_listener, EVENT_JOB_ERROR)
-    
-    scheduler.start()
-    logger.info("Price check scheduler started")
-    return scheduler
\ No newline at end of file
+
+    _scheduler = scheduler
+    # the election heartbeats on its own thread, clear of the runner loop's
+    # synchronous work; APScheduler's add/modify/remove are safe to call from it
+    scheduler_leader.start(lead, unschedule, pull_forward)
+    logger.info(f"Price check scheduler started; {WORKER_ID} is standing for leadership")
+    return scheduler
+
+def stop_scheduler() -> None:
+    """
+    Cancel any running check (its claims are released), give up scheduler
+    leadership and close the runner's resources
+    """
+    global _scheduler
+    _scheduler = None
+    job_runner.stop()
+    scheduler_leader.stop()
@@ -1,12 +1,16 @@
 # main.py
 from fastapi import FastAPI, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from dotenv import load_dotenv
-from database import create_db_and_tables
-from routes import auth as auth_routes, flights as flights_routes, alerts as alerts_routes, notifications as notifications_routes, weather as weather_routes, preferences as preferences_routes, devices as devices_routes
+from database import create_db_and_tables, engine
+from routes import auth as auth_routes, flights as flights_routes, alerts as alerts_routes, notifications as notifications_routes, weather as weather_routes, preferences as preferences_routes, devices as devices_routes, stats as stats_routes, searches as searches_routes
 from deps import get_current_user
-from jobs import start_scheduler
+from jobs import start_scheduler, stop_scheduler
+from services.alert_index import alert_index
+from sqlmodel import Session
+from providers.amadeus_client import aclose_amadeus_clients
 
 load_dotenv()
 
@@ -27,10 +31,21 @@ app.add_middleware(
 @app.on_event("startup")
 def on_startup():
     create_db_and_tables()
+    # alerts matched on price ingestion (see routes/flights.py)
+    with Session(engine) as session:
+        alert_index.load(session)
     # start background job scheduler (simple PoC)
     if JOBS_ENABLED:
         start_scheduler()
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    if JOBS_ENABLED:
+        # cancels a running check and closes the job runner's pools from its own loop
+        await run_in_threadpool(stop_scheduler)
+    # close pooled provider connections held by the server loop
+    await aclose_amadeus_clients()
+
 # Configure routers with root_path_in_servers=False to prevent redirect issues
 app.include_router(
     auth_routes.auth_router,
@@ -42,6 +57,11 @@ app.include_router(
     prefix="/api",
     tags=["flights"],
 )
+app.include_router(
+    searches_routes.searches_router,
+    prefix="/api/searches",
+    tags=["flights"],
+)
 app.include_router(
     alerts_routes.alerts_router,
     prefix="/api/alerts",
@@ -58,6 +78,7 @@ app.include_router(
     tags=["weather"],
 )
 app.include_router(preferences_routes.preferences_router, prefix="/api/preferences", tags=["preferences"])
+app.include_router(stats_routes.stats_router, prefix="/api/stats", tags=["stats"])
 
 app.include_router(
     devices_routes.device_router,
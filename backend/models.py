@@ -90,17 +90,46 @@ class Flight(SQLModel, table=True):
     cabin_class: Optional[str] = Field(default="economy")
     price: Optional[float] = Field(default=None)
     currency: Optional[str] = Field(default="USD")
+    # travellers `price` covers; provider prices are totals for the whole party
+    passengers: Optional[int] = Field(default=1)
     seats_left: Optional[int] = Field(default=None)
     refundable: Optional[bool] = Field(default=None)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     last_seen_at: datetime = Field(default_factory=datetime.utcnow)
     cached: bool = Field(default=True)
+    # provider + cabin + passengers + carrier/flight number/departure of every leg, hashed; one row per itinerary
+    itinerary_key: Optional[str] = Field(default=None, index=True, unique=True)
 
+    # search that first saw this itinerary; later sightings are in search_result
     search_id: Optional[int] = Field(default=None, foreign_key="search.id", index=True)
 
     # relationships omitted
 
 
+class SearchResult(SQLModel, table=True):
+    __tablename__ = "search_result"
+    # keyset pagination walks one of these per sort key, starting at the cursor
+    __table_args__ = (
+        sa.Index("ix_search_result_search_position", "search_id", "position"),
+        sa.Index("ix_search_result_search_price", "search_id", "price", "id"),
+        sa.Index("ix_search_result_search_departure", "search_id", "departure_time", "id"),
+        sa.Index("ix_search_result_search_duration", "search_id", "duration_minutes", "id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    search_id: int = Field(foreign_key="search.id")
+    flight_id: int = Field(foreign_key="flight.id", index=True)
+    position: int = Field(default=0)
+    # price as quoted in this search; Flight.price holds the latest one
+    price: Optional[float] = Field(default=None)
+    currency: Optional[str] = Field(default=None)
+    # copied from the flight so filters and sorts never join
+    airline: Optional[str] = Field(default=None)
+    stops: Optional[int] = Field(default=None)
+    departure_time: Optional[datetime] = Field(default=None)
+    duration_minutes: Optional[int] = Field(default=None)
+
+
 class FlightLeg(SQLModel, table=True):
     __tablename__ = "flight_leg"
 
@@ -135,6 +164,10 @@ class FlightPriceHistory(SQLModel, table=True):
 # ---------------------------
 class Alert(SQLModel, table=True):
     __tablename__ = "alert"
+    # the job's due scan is a range over this index
+    __table_args__ = (
+        sa.Index("ix_alert_active_next_check", "active", "next_check_at"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id", index=True)
@@ -150,6 +183,11 @@ class Alert(SQLModel, table=True):
     last_checked_at: Optional[datetime] = Field(default=None)
     last_notified_at: Optional[datetime] = Field(default=None)
     check_frequency_minutes: int = Field(default=60)
+    # when the job should next check this alert; due at creation
+    next_check_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+    # worker process holding this alert's check, until lease_expires_at
+    claim_owner: Optional[str] = Field(default=None)
+    lease_expires_at: Optional[datetime] = Field(default=None)
     notify_channel: NotificationChannel = Field(
         default=NotificationChannel.EMAIL,
         sa_column=Column(sa.Enum(NotificationChannel)),
@@ -203,7 +241,8 @@ class PriceCheckJobLog(SQLModel, table=True):
 
     id: Optional[int] = Field(default=None, primary_key=True)
     alert_id: Optional[int] = Field(default=None, foreign_key="alert.id", index=True)
-    ran_at: datetime = Field(default_factory=datetime.utcnow)
+    # compaction scans for rows older than the retention window
+    ran_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     checked_price: Optional[float] = Field(default=None)
     currency: Optional[str] = Field(default="USD")
     matched: bool = Field(default=False)
@@ -212,6 +251,37 @@ class PriceCheckJobLog(SQLModel, table=True):
     # relationship omitted
 
 
+class PriceCheckRollup(SQLModel, table=True):
+    """Compacted PriceCheckJobLog rows: one per alert per hour or day"""
+    __tablename__ = "price_check_rollup"
+    __table_args__ = (
+        sa.UniqueConstraint("alert_id", "granularity", "bucket_start", name="uq_price_check_rollup_bucket"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    alert_id: Optional[int] = Field(default=None, foreign_key="alert.id", index=True)
+    granularity: str = Field(default="day")  # "hour" | "day"
+    bucket_start: datetime = Field()
+    checks: int = Field(default=0)
+    min_price: Optional[float] = Field(default=None)
+    max_price: Optional[float] = Field(default=None)
+    last_price: Optional[float] = Field(default=None)
+    last_checked_at: Optional[datetime] = Field(default=None)
+    currency: Optional[str] = Field(default="USD")
+    match_count: int = Field(default=0)
+
+
+class LeaderLease(SQLModel, table=True):
+    __tablename__ = "leader_lease"
+
+    # one row per singleton role (e.g. "scheduler"); holder keeps it while heartbeating
+    name: str = Field(primary_key=True)
+    holder: Optional[str] = Field(default=None)
+    acquired_at: Optional[datetime] = Field(default=None)
+    heartbeat_at: Optional[datetime] = Field(default=None)
+    expires_at: Optional[datetime] = Field(default=None)
+
+
 # ---------------------------
 # Saved itineraries & device tokens
 # ---------------------------
@@ -276,12 +346,15 @@ __all__ = [
     "UserRole",
     "Search",
     "Flight",
+    "SearchResult",
     "FlightLeg",
     "FlightPriceHistory",
     "Alert",
     "Notification",
     "APIProvider",
     "PriceCheckJobLog",
+    "PriceCheckRollup",
+    "LeaderLease",
     "SavedItinerary",
     "DeviceToken",
     "UserPreference",
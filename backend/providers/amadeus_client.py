@@ -0,0 +1,281 @@
+# providers/amadeus_client.py
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+AMADEUS_TEST = os.getenv("AMADEUS_TEST", os.getenv("AMADEUS_TEST_MODE", "true")).lower() == "true"
+AMADEUS_BASE_URL = os.getenv(
+    "AMADEUS_BASE_URL",
+    "https://test.api.amadeus.com" if AMADEUS_TEST else "https://api.amadeus.com",
+)
+PROVIDER_TIMEOUT_SECONDS = float(os.getenv("PROVIDER_TIMEOUT_SECONDS", "10"))
+PROVIDER_CONNECT_TIMEOUT_SECONDS = float(os.getenv("PROVIDER_CONNECT_TIMEOUT_SECONDS", "3"))
+PROVIDER_MAX_CONNECTIONS = int(os.getenv("PROVIDER_MAX_CONNECTIONS", "100"))
+PROVIDER_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("PROVIDER_MAX_KEEPALIVE_CONNECTIONS", "20"))
+PROVIDER_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY_SECONDS", "30"))
+# A token this close to expiry is refreshed in the background while still being used
+AMADEUS_TOKEN_REFRESH_AHEAD_SECONDS = float(os.getenv("AMADEUS_TOKEN_REFRESH_AHEAD_SECONDS", "120"))
+# ...and this close it is treated as already expired, to absorb clock skew and latency
+AMADEUS_TOKEN_EXPIRY_MARGIN_SECONDS = float(os.getenv("AMADEUS_TOKEN_EXPIRY_MARGIN_SECONDS", "15"))
+
+
+class ProviderError(Exception):
+    """Error returned by (or while reaching) a flight data provider"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AmadeusClient:
+    """
+    Async Amadeus REST client. HTTP connections are pooled and kept alive per
+    event loop. The OAuth access token is shared by every caller on every loop
+    and thread: at most one fetch runs per loop, and a token nearing expiry is
+    refreshed in the background so callers never wait on it.
+    """
+
+    def __init__(self, client_id: Optional[str] = None, client_secret: Optional[str] = None,
+                 base_url: str = AMADEUS_BASE_URL):
+        self.client_id = client_id or os.getenv("AMADEUS_CLIENT_ID")
+        self.client_secret = client_secret or os.getenv("AMADEUS_CLIENT_SECRET")
+        self.base_url = base_url
+        # httpx pools are bound to the loop that created them
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+        # the one token fetch in flight, awaited from any loop or thread
+        self._token_inflight: Optional[concurrent.futures.Future] = None
+        self._background_tasks = set()
+        self.token_fetches = 0
+        self.token_fetch_failures = 0
+        self.token_hits = 0
+        self.token_waits = 0
+        self.token_refresh_ahead = 0
+        self.token_rejections = 0
+        self.last_token_fetch_ms: Optional[float] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Accept": "application/json"},
+                limits=httpx.Limits(
+                    max_connections=PROVIDER_MAX_CONNECTIONS,
+                    max_keepalive_connections=PROVIDER_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=PROVIDER_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                timeout=httpx.Timeout(PROVIDER_TIMEOUT_SECONDS, connect=PROVIDER_CONNECT_TIMEOUT_SECONDS),
+            )
+            self._clients[loop] = client
+        return client
+
+    def _count(self, counter: str) -> None:
+        with self._token_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _cached_token(self):
+        """(token, seconds of validity left), or (None, 0) if there is no usable token"""
+        with self._token_lock:
+            remaining = self._token_expires_at - AMADEUS_TOKEN_EXPIRY_MARGIN_SECONDS - time.monotonic()
+            if self._token and remaining > 0:
+                return self._token, remaining
+            return None, 0.0
+
+    def _invalidate_token(self, token: str) -> None:
+        with self._token_lock:
+            if self._token == token:
+                self._token = None
+                self._token_expires_at = 0.0
+
+    async def _fetch_token(self) -> str:
+        if not self.client_id or not self.client_secret:
+            raise ProviderError(500, "Amadeus credentials are not configured")
+        started = time.perf_counter()
+        self._count("token_fetches")
+        try:
+            resp = await self._http().post(
+                "/v1/security/oauth2/token",
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                },
+            )
+        except httpx.HTTPError as e:
+            self._count("token_fetch_failures")
+            raise ProviderError(502, f"Unable to authenticate with Amadeus: {e}")
+        finally:
+            self.last_token_fetch_ms = round((time.perf_counter() - started) * 1000, 1)
+        if resp.status_code != 200:
+            self._count("token_fetch_failures")
+            raise ProviderError(resp.status_code, "Amadeus authentication failed")
+        body = resp.json()
+        with self._token_lock:
+            self._token = body["access_token"]
+            self._token_expires_at = time.monotonic() + int(body.get("expires_in", 1799))
+            return self._token
+
+    async def _shared_fetch(self, refresh: bool = False) -> str:
+        """Fetch a token, or join the fetch another caller already started"""
+        with self._token_lock:
+            if not refresh and self._token and \
+                    self._token_expires_at - AMADEUS_TOKEN_EXPIRY_MARGIN_SECONDS > time.monotonic():
+                # stored by a fetch that finished since our caller looked
+                return self._token
+            inflight = self._token_inflight
+            if inflight is None:
+                inflight = self._token_inflight = concurrent.futures.Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return await asyncio.wrap_future(inflight)
+        try:
+            token = await self._fetch_token()
+            inflight.set_result(token)
+            return token
+        except ProviderError as e:
+            inflight.set_exception(e)
+            raise
+        except BaseException:
+            # cancelled mid-fetch; release waiters on other loops rather than strand them
+            inflight.set_exception(ProviderError(503, "Amadeus token fetch was interrupted"))
+            raise
+        finally:
+            with self._token_lock:
+                self._token_inflight = None
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            await self._shared_fetch(refresh=True)
+        except ProviderError as e:
+            logger.warning(f"Background Amadeus token refresh failed: {e.detail}")
+
+    async def _access_token(self) -> str:
+        token, remaining = self._cached_token()
+        if token:
+            self._count("token_hits")
+            if remaining < AMADEUS_TOKEN_REFRESH_AHEAD_SECONDS and self._token_inflight is None:
+                self._count("token_refresh_ahead")
+                task = asyncio.get_running_loop().create_task(self._refresh_in_background())
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            return token
+        self._count("token_waits")
+        return await self._shared_fetch()
+
+    def token_stats(self) -> Dict[str, Any]:
+        with self._token_lock:
+            expires_in = self._token_expires_at - time.monotonic() if self._token else None
+        return {
+            "base_url": self.base_url,
+            "token_valid_for_seconds": round(expires_in) if expires_in is not None else None,
+            "fetches": self.token_fetches,
+            "fetch_failures": self.token_fetch_failures,
+            "hits": self.token_hits,
+            "waits": self.token_waits,
+            "refresh_ahead": self.token_refresh_ahead,
+            "rejections": self.token_rejections,
+            "last_fetch_ms": self.last_token_fetch_ms,
+        }
+
+    async def get(self, path: str, params: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """GET an Amadeus endpoint, retrying once if the cached token was rejected"""
+        params = {k: v for k, v in params.items() if v is not None}
+        for attempt in range(2):
+            token = await self._access_token()
+            try:
+                resp = await self._http().get(
+                    path,
+                    params=params,
+                    headers={"Authorization": f"Bearer {token}"},
+                    timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                )
+            except httpx.TimeoutException:
+                raise ProviderError(504, "Flight provider timed out")
+            except httpx.HTTPError as e:
+                raise ProviderError(502, f"Flight provider unreachable: {e}")
+
+            if resp.status_code == 401 and attempt == 0:
+                self._count("token_rejections")
+                self._invalidate_token(token)
+                continue
+            if resp.status_code >= 400:
+                detail = f"Flight search failed: HTTP {resp.status_code}"
+                try:
+                    detail = resp.json().get("errors", [{}])[0].get("detail", detail)
+                except Exception:
+                    pass
+                raise ProviderError(resp.status_code, detail)
+            return resp.json()
+        raise ProviderError(401, "Amadeus rejected the access token")
+
+    async def search_locations(self, keyword: str, sub_type: str = "AIRPORT", timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Airport & City Search; returns the raw location list"""
+        body = await self.get("/v1/reference-data/locations", {"keyword": keyword, "subType": sub_type}, timeout=timeout)
+        return body.get("data", [])
+
+    async def search_flight_offers(self, timeout: Optional[float] = None, **params) -> List[Dict[str, Any]]:
+        """Flight Offers Search; returns the raw offer list"""
+        body = await self.get("/v2/shopping/flight-offers", params, timeout=timeout)
+        return body.get("data", [])
+
+    async def aclose(self) -> None:
+        """Close the connection pool owned by the running event loop"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+amadeus_client = AmadeusClient()
+
+_shared_clients: Dict[tuple, AmadeusClient] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def shared_amadeus_client(client_id: Optional[str] = None, client_secret: Optional[str] = None,
+                          base_url: Optional[str] = None) -> AmadeusClient:
+    """
+    Process-wide client for a set of credentials, so providers rebuilt from
+    APIProvider rows keep their pool and token instead of fetching a new one.
+    """
+    client_id = client_id or amadeus_client.client_id
+    client_secret = client_secret or amadeus_client.client_secret
+    base_url = base_url or amadeus_client.base_url
+    if (client_id, client_secret, base_url) == (amadeus_client.client_id, amadeus_client.client_secret, amadeus_client.base_url):
+        return amadeus_client
+    key = (client_id, client_secret, base_url)
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = _shared_clients[key] = AmadeusClient(client_id, client_secret, base_url)
+        return client
+
+
+def all_amadeus_clients() -> List[AmadeusClient]:
+    with _shared_clients_lock:
+        return [amadeus_client, *_shared_clients.values()]
+
+
+
+async def aclose_amadeus_clients() -> None:
+    """Close the running loop's pools on every shared client; tokens are kept"""
+    for client in all_amadeus_clients():
+        await client.aclose()
@@ -1,45 +1,209 @@
-from amadeus import Client
-from datetime import datetime
-from typing import Dict, Optional
+import asyncio
+import logging
 import os
+from datetime import datetime
+from typing import Dict, List, Optional
+from providers.base import FlightProvider
+from providers.amadeus_client import AmadeusClient, ProviderError, amadeus_client, shared_amadeus_client
+from providers.offers import FlightRecord, FlightLegRecord, parse_iso_duration, parse_iso_datetime, intern_code
+from services.route_hints import route_hints
+from services.provider_governor import provider_governor
+
+logger = logging.getLogger(__name__)
+
+# Offers requested per search call
+AMADEUS_MAX_OFFERS = int(os.getenv("AMADEUS_MAX_OFFERS", "5"))
+
+DOMESTIC_AIRPORTS = ['DLA', 'NSI', 'GOU', 'MVR', 'NGE']
+# Domestic Cameroon itineraries longer than this are routed abroad; skip them
+DOMESTIC_MAX_MINUTES = 180
+
+def itinerary_key(offer: dict) -> tuple:
+    """Identity of an offer's outbound itinerary: carrier, flight number and departure per segment"""
+    return tuple(
+        (seg['carrierCode'], seg['number'], seg['departure']['at'])
+        for seg in offer['itineraries'][0]['segments']
+    )
+
+def normalize_offers(offers: List[dict], provider_name: str, domestic: bool = False,
+                     cabin: Optional[str] = None) -> List[FlightRecord]:
+    """
+    Single pass over Amadeus flight-offers into FlightRecords. Durations and
+    timestamps go through the cached ISO parsers, codes are interned. With
+    `domestic`, itineraries longer than DOMESTIC_MAX_MINUTES are dropped.
+    """
+    provider_name = intern_code(provider_name)
+    cabin_class = cabin.lower() if cabin else None
+    records = []
+    for offer in offers:
+        itinerary = offer['itineraries'][0]
+        segments = itinerary['segments']
+        duration = parse_iso_duration(itinerary['duration'])
+        if domestic and duration is not None and duration > DOMESTIC_MAX_MINUTES:
+            # lazy arguments: this runs per offer, and is usually filtered out
+            logger.debug("Skipping unreasonable domestic route with duration %s", itinerary['duration'])
+            continue
+
+        legs = []
+        for idx, segment in enumerate(segments, 1):
+            dep = segment['departure']
+            arr = segment['arrival']
+            legs.append(FlightLegRecord(
+                idx,
+                intern_code(dep['iataCode']),
+                intern_code(arr['iataCode']),
+                parse_iso_datetime(dep['at']),
+                parse_iso_datetime(arr['at']),
+                parse_iso_duration(segment.get('duration')),
+                intern_code(segment['carrierCode']),
+                segment['number'],
+            ))
+        first, last = legs[0], legs[-1]
+        price = offer['price']
+        records.append(FlightRecord(
+            offer['id'],
+            provider_name,
+            first.carrier,
+            first.departure_airport,
+            last.arrival_airport,
+            first.departure_time,
+            last.arrival_time,
+            duration,
+            float(price['total']),
+            intern_code(price['currency']),
+            stops=len(legs) - 1,
+            cabin_class=cabin_class,
+            legs=legs,
+        ))
+    return records
+
+class AmadeusProvider(FlightProvider):
+    name = "Amadeus"
+
+    def __init__(self, config=None, client: Optional[AmadeusClient] = None):
+        super().__init__(config)
+        if client is None and config is not None and (config.api_key or config.base_url):
+            # APIProvider row with its own credentials/endpoint; reused across registry reloads
+            client = shared_amadeus_client(
+                client_id=config.api_key,
+                client_secret=self.meta.get("api_secret"),
+                base_url=config.base_url,
+            )
+        # Share the process-wide pooled client unless one is configured
+        self.client = client or amadeus_client
+
+    async def search_direct_and_connecting(self, departure: str, arrival: str, search_params: dict) -> list:
+        """
+        Issue the nonStop and the unfiltered offer searches concurrently (or only the
+        one the route's hint says is useful) and merge them, direct offers first,
+        de-duplicated by itinerary. The governor admitted one upstream request;
+        each further one is charged as it is made.
+        """
+        query_direct, query_connecting = route_hints.plan(departure, arrival)
 
-class AmadeusProvider:
-    def __init__(self):
-        self.amadeus = Client(
-            client_id=os.getenv('AMADEUS_CLIENT_ID'),
-            client_secret=os.getenv('AMADEUS_CLIENT_SECRET'),
-            hostname='test' if os.getenv('AMADEUS_TEST_MODE', 'true').lower() == 'true' else None
+        if query_direct and query_connecting:
+            await provider_governor.charge(self.name, meta=self.meta)
+        calls = []
+        if query_direct:
+            calls.append(self.client.search_flight_offers(**search_params, nonStop=True))
+        if query_connecting:
+            calls.append(self.client.search_flight_offers(**search_params))
+        responses = await asyncio.gather(*calls, return_exceptions=True)
+
+        direct = responses[0] if query_direct else None
+        connecting = responses[-1] if query_connecting else None
+        if isinstance(direct, ProviderError):
+            logger.warning(f"Direct flight search failed: {direct}")
+            direct = []
+        elif isinstance(direct, BaseException):
+            raise direct
+
+        if not query_connecting and not direct:
+            # Hint said direct-only but nothing came back; fall back to all routes
+            logger.debug("No direct flights found, searching for all routes")
+            await provider_governor.charge(self.name, meta=self.meta)
+            connecting = await self.client.search_flight_offers(**search_params)
+        if isinstance(connecting, BaseException):
+            if not direct:
+                raise connecting
+            logger.warning(f"Connecting flight search failed: {connecting}")
+            connecting = None
+
+        merged = []
+        seen = set()
+        for offer in direct or []:
+            key = itinerary_key(offer)
+            if key not in seen:
+                seen.add(key)
+                merged.append(offer)
+        connecting_new = None
+        if connecting is not None:
+            before = len(merged)
+            for offer in connecting:
+                key = itinerary_key(offer)
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(offer)
+            connecting_new = len(merged) - before
+
+        route_hints.record(
+            departure, arrival,
+            direct_offers=len(direct) if direct is not None else None,
+            connecting_new=connecting_new,
         )
+        return merged
 
-    def check_price(self, departure: str, arrival: str, departure_date: datetime, return_date: Optional[datetime] = None) -> Dict:
+    async def _search_flights(self, departure: str, arrival: str, departure_date: str,
+                              passengers: int = 1, cabin: Optional[str] = None) -> List[FlightRecord]:
         """
-        Query Amadeus API for current prices
+        Fetch real flight data from Amadeus API
         """
-        try:
-            response = self.amadeus.shopping.flight_offers_search.get(
-                originLocationCode=departure,
-                destinationLocationCode=arrival,
-                departureDate=departure_date.strftime("%Y-%m-%d"),
-                returnDate=return_date.strftime("%Y-%m-%d") if return_date else None,
-                adults=1,
-                currencyCode='XAF',
-                max=1  # We just need the lowest price
-            )
+        search_params = {
+            "originLocationCode": departure,
+            "destinationLocationCode": arrival,
+            "departureDate": departure_date,
+            "adults": passengers,
+            "currencyCode": 'XAF',  # Using Central African CFA franc for local flights
+            "max": AMADEUS_MAX_OFFERS,  # results are paged server-side, see services.search_results
+        }
+        if cabin:
+            search_params["travelClass"] = cabin.upper()
+
+        offers = await self.search_direct_and_connecting(departure, arrival, search_params)
+
+        logger.debug("Amadeus API response received with %d offers", len(offers))
+        domestic = departure in DOMESTIC_AIRPORTS and arrival in DOMESTIC_AIRPORTS
+        return normalize_offers(offers, self.name, domestic=domestic, cabin=cabin)
 
-            if response.data:
-                offer = response.data[0]
-                return {
-                    "price": float(offer['price']['total']),
-                    "currency": offer['price']['currency'],
-                    "provider": "amadeus",
-                    "details": {
-                        "flight_id": offer['id'],
-                        "validating_airline": offer.get('validatingAirlineCodes', [None])[0],
-                        "last_ticketing_date": offer.get('lastTicketingDate'),
-                    }
+    async def _check_price(self, departure: str, arrival: str, departure_date: datetime, return_date: Optional[datetime] = None) -> Dict:
+        """
+        Query Amadeus API for current prices. Errors propagate so the governor's
+        circuit breaker sees them; callers (jobs.query_provider_for_alert) handle them.
+        """
+        offers = await self.client.search_flight_offers(
+            originLocationCode=departure,
+            destinationLocationCode=arrival,
+            departureDate=departure_date.strftime("%Y-%m-%d"),
+            returnDate=return_date.strftime("%Y-%m-%d") if return_date else None,
+            adults=1,
+            currencyCode='XAF',
+            max=1  # We just need the lowest price
+        )
+
+        if offers:
+            offer = offers[0]
+            return {
+                "price": float(offer['price']['total']),
+                "currency": offer['price']['currency'],
+                "provider": self.name.lower(),
+                "details": {
+                    "flight_id": offer['id'],
+                    "validating_airline": offer.get('validatingAirlineCodes', [None])[0],
+                    "last_ticketing_date": offer.get('lastTicketingDate'),
                 }
-            
-            return None
-        except Exception as e:
-            print(f"Error querying Amadeus: {str(e)}")
-            return None
+            }
+
+        return None
+
+# Default provider on the process-wide client, for callers outside the registry
+amadeus_provider = AmadeusProvider()
@@ -0,0 +1,50 @@
+# providers/base.py
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from providers.offers import FlightRecord
+from services.provider_governor import provider_governor
+
+
+class FlightProvider:
+    """
+    Common adapter interface for flight data providers. `search_flights` returns
+    FlightRecords (persisted by services.flight_store as they are);
+    `check_price` returns the lowest fare for an alert itinerary or None.
+    Adapters implement `_search_flights` / `_check_price`; the public methods
+    route every call through services.provider_governor.
+    """
+
+    name = "provider"
+    # governor tokens per call, i.e. upstream requests one call makes
+    search_cost = 1
+    check_cost = 1
+
+    def __init__(self, config: Optional[Any] = None):
+        # config is the APIProvider row this adapter was built from, if any
+        self.config = config
+        self.meta: Dict[str, Any] = dict(getattr(config, "meta", None) or {})
+        if config is not None and getattr(config, "name", None):
+            self.name = config.name
+
+    async def search_flights(self, departure: str, arrival: str, departure_date: str,
+                             passengers: int = 1, cabin: Optional[str] = None) -> List[FlightRecord]:
+        return await provider_governor.call(
+            self.name, self._search_flights, departure, arrival, departure_date,
+            passengers=passengers, cabin=cabin, cost=self.search_cost, meta=self.meta,
+        )
+
+    async def check_price(self, departure: str, arrival: str, departure_date: datetime,
+                          return_date: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        return await provider_governor.call(
+            self.name, self._check_price, departure, arrival, departure_date,
+            return_date=return_date, cost=self.check_cost, meta=self.meta,
+        )
+
+    async def _search_flights(self, departure: str, arrival: str, departure_date: str,
+                              passengers: int = 1, cabin: Optional[str] = None) -> List[FlightRecord]:
+        raise NotImplementedError
+
+    async def _check_price(self, departure: str, arrival: str, departure_date: datetime,
+                           return_date: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
@@ -0,0 +1,98 @@
+# providers/fake_provider.py
+import asyncio
+import hashlib
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from providers.base import FlightProvider
+from providers.amadeus_client import ProviderError
+from providers.offers import FlightRecord, FlightLegRecord
+
+CARRIERS = ["AF", "ET", "KQ", "SN", "QC", "TK", "AT", "WB"]
+HUBS = ["ADD", "NBO", "CDG", "BRU", "IST", "CMN", "KGL"]
+
+
+class FakeProvider(FlightProvider):
+    """
+    Offline provider producing deterministic synthetic offers, for tests and
+    benchmarks. Tunable through APIProvider.meta:
+      latency_ms   fixed response delay (default 50)
+      jitter_ms    extra uniform random delay (default 0)
+      offers       offers per search (default 5)
+      error_rate   probability a call fails with ProviderError (default 0)
+      price_factor multiplier so providers sharing itineraries differ in price
+    Itineraries depend only on route and date, so several fake providers return
+    overlapping flights, as real aggregators do.
+    """
+
+    name = "fake"
+
+    def __init__(self, config=None, **overrides):
+        super().__init__(config)
+        self.meta.update(overrides)
+        self.latency_ms = float(self.meta.get("latency_ms", 50))
+        self.jitter_ms = float(self.meta.get("jitter_ms", 0))
+        self.offers = int(self.meta.get("offers", 5))
+        self.error_rate = float(self.meta.get("error_rate", 0))
+        self.price_factor = float(self.meta.get("price_factor", 1.0))
+        self.calls = 0
+
+    async def _simulate_call(self) -> None:
+        self.calls += 1
+        delay = self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        await asyncio.sleep(delay / 1000.0)
+        if self.error_rate and random.random() < self.error_rate:
+            raise ProviderError(503, f"{self.name}: simulated provider failure")
+
+    def _rng(self, departure: str, arrival: str, departure_date: str) -> random.Random:
+        seed = hashlib.sha256(f"{departure}|{arrival}|{departure_date}".encode()).hexdigest()
+        return random.Random(int(seed[:16], 16))
+
+    def generate_flights(self, departure: str, arrival: str, departure_date: str,
+                         passengers: int = 1, cabin: Optional[str] = None) -> List[FlightRecord]:
+        rng = self._rng(departure, arrival, departure_date)
+        day = datetime.strptime(departure_date, "%Y-%m-%d")
+        flights = []
+        for i in range(self.offers):
+            stops = rng.choice([0, 0, 1, 1, 2])
+            dep_time = day + timedelta(hours=rng.randint(5, 22), minutes=rng.choice([0, 15, 30, 45]))
+            airports = [departure] + rng.sample(HUBS, stops) + [arrival]
+            legs = []
+            cursor = dep_time
+            for n in range(stops + 1):
+                carrier = rng.choice(CARRIERS)
+                minutes = rng.randint(60, 420)
+                legs.append(FlightLegRecord(
+                    n + 1, airports[n], airports[n + 1], cursor, cursor + timedelta(minutes=minutes),
+                    minutes, carrier, str(rng.randint(100, 9999)),
+                ))
+                cursor += timedelta(minutes=minutes + rng.randint(45, 180))
+            base_price = rng.randint(80, 900) * 1000.0
+            flights.append(FlightRecord(
+                f"{self.name}-{i + 1}", self.name, legs[0].carrier, departure, arrival,
+                legs[0].departure_time, legs[-1].arrival_time,
+                int((legs[-1].arrival_time - dep_time).total_seconds() // 60),
+                round(base_price * passengers * self.price_factor, 2), "XAF",
+                stops=stops, cabin_class=cabin.lower() if cabin else None, legs=legs,
+            ))
+        return flights
+
+    async def _search_flights(self, departure: str, arrival: str, departure_date: str,
+                              passengers: int = 1, cabin: Optional[str] = None) -> List[FlightRecord]:
+        await self._simulate_call()
+        return self.generate_flights(departure, arrival, departure_date, passengers, cabin)
+
+    async def _check_price(self, departure: str, arrival: str, departure_date: datetime,
+                           return_date: Optional[datetime] = None) -> Optional[Dict]:
+        await self._simulate_call()
+        flights = self.generate_flights(departure, arrival, departure_date.strftime("%Y-%m-%d"))
+        if not flights:
+            return None
+        cheapest = min(flights, key=lambda f: f.price)
+        return {
+            "price": cheapest.price,
+            "currency": cheapest.currency,
+            "provider": self.name,
+            "details": {"flight_id": cheapest.provider_flight_id, "validating_airline": cheapest.airline},
+        }
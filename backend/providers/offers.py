@@ -0,0 +1,116 @@
+# providers/offers.py
+import re
+import sys
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+# PT8H15M, P1DT2H, PT45M
+_DURATION_RE = re.compile(r"^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:\d+(?:\.\d+)?S)?)?$")
+
+
+@lru_cache(maxsize=4096)
+def parse_iso_duration(value: Optional[str]) -> Optional[int]:
+    """ISO-8601 duration to whole minutes; None if it does not parse"""
+    if not value:
+        return None
+    match = _DURATION_RE.match(value)
+    if match is None:
+        return None
+    days, hours, minutes = match.groups()
+    return int(days or 0) * 1440 + int(hours or 0) * 60 + int(minutes or 0)
+
+
+@lru_cache(maxsize=16384)
+def parse_iso_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Provider ISO timestamp to datetime; departure times repeat across offers, hence the cache"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+# Airport and carrier codes come from a small vocabulary; share one string per code
+intern_code = sys.intern
+
+
+class FlightLegRecord:
+    __slots__ = ("leg_number", "departure_airport", "arrival_airport", "departure_time",
+                 "arrival_time", "duration_minutes", "carrier", "flight_number")
+
+    def __init__(self, leg_number: int, departure_airport: Optional[str], arrival_airport: Optional[str],
+                 departure_time: Optional[datetime], arrival_time: Optional[datetime],
+                 duration_minutes: Optional[int], carrier: Optional[str], flight_number: Optional[str]):
+        self.leg_number = leg_number
+        self.departure_airport = departure_airport
+        self.arrival_airport = arrival_airport
+        self.departure_time = departure_time
+        self.arrival_time = arrival_time
+        self.duration_minutes = duration_minutes
+        self.carrier = carrier
+        self.flight_number = flight_number
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "leg_number": self.leg_number,
+            "departure_airport": self.departure_airport,
+            "arrival_airport": self.arrival_airport,
+            "departure_time": self.departure_time,
+            "arrival_time": self.arrival_time,
+            "duration_minutes": self.duration_minutes,
+            "carrier": self.carrier,
+            "flight_number": self.flight_number,
+        }
+
+
+class FlightRecord:
+    """
+    One normalized offer as returned by FlightProvider.search_flights. Feeds
+    services.flight_store and the FlightOut response shape directly.
+    """
+
+    __slots__ = ("provider_flight_id", "provider_name", "airline", "departure_airport_code",
+                 "arrival_airport_code", "departure_time", "arrival_time", "duration_minutes",
+                 "price", "currency", "stops", "cabin_class", "legs")
+
+    def __init__(self, provider_flight_id: Optional[str], provider_name: Optional[str], airline: Optional[str],
+                 departure_airport_code: Optional[str], arrival_airport_code: Optional[str],
+                 departure_time: Optional[datetime], arrival_time: Optional[datetime],
+                 duration_minutes: Optional[int], price: Optional[float], currency: Optional[str],
+                 stops: int = 0, cabin_class: Optional[str] = None, legs: Optional[List[FlightLegRecord]] = None):
+        self.provider_flight_id = provider_flight_id
+        self.provider_name = provider_name
+        self.airline = airline
+        self.departure_airport_code = departure_airport_code
+        self.arrival_airport_code = arrival_airport_code
+        self.departure_time = departure_time
+        self.arrival_time = arrival_time
+        self.duration_minutes = duration_minutes
+        self.price = price
+        self.currency = currency
+        self.stops = stops
+        self.cabin_class = cabin_class
+        self.legs = legs or []
+
+    def as_dict(self) -> Dict[str, Any]:
+        """FlightOut shape"""
+        return {
+            "provider_flight_id": self.provider_flight_id,
+            "provider_name": self.provider_name,
+            "airline": self.airline,
+            "departure_airport_code": self.departure_airport_code,
+            "arrival_airport_code": self.arrival_airport_code,
+            "departure_time": self.departure_time,
+            "arrival_time": self.arrival_time,
+            "duration_minutes": self.duration_minutes,
+            "price": self.price,
+            "currency": self.currency,
+            "stops": self.stops,
+            "legs": [leg.as_dict() for leg in self.legs],
+        }
+
+    def __repr__(self) -> str:
+        return (f"FlightRecord({self.provider_name}:{self.provider_flight_id} "
+                f"{self.departure_airport_code}->{self.arrival_airport_code} {self.price} {self.currency})")
@@ -0,0 +1,106 @@
+# providers/registry.py
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Type
+
+from sqlmodel import Session, select
+
+from database import engine
+from models import APIProvider
+from providers.base import FlightProvider
+from providers.amadeus_client import amadeus_client
+from providers.amadeus_provider import AmadeusProvider, amadeus_provider
+from providers.fake_provider import FakeProvider
+from providers.replay_provider import RecordingClient, ReplayProvider
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_REGISTRY_TTL_SECONDS = int(os.getenv("PROVIDER_REGISTRY_TTL_SECONDS", "60"))
+# live: APIProvider rows (or Amadeus); replay: offline ReplayProvider only;
+# record: Amadeus only, saving every response for later replay
+PROVIDER_MODE = os.getenv("PROVIDER_MODE", "live").lower()
+
+# Adapter chosen by APIProvider.meta["adapter"], falling back to the lowercased name
+ADAPTERS: Dict[str, Type[FlightProvider]] = {
+    "amadeus": AmadeusProvider,
+    "fake": FakeProvider,
+    "replay": ReplayProvider,
+}
+
+
+def build_default_provider(mode: str = PROVIDER_MODE) -> FlightProvider:
+    """Provider used for alert checks and whenever the registry has nothing better"""
+    if mode == "replay":
+        return ReplayProvider()
+    if mode == "record":
+        return AmadeusProvider(client=RecordingClient(amadeus_client))
+    if mode != "live":
+        logger.warning(f"Unknown PROVIDER_MODE {mode!r}; using live providers")
+    return amadeus_provider
+
+
+default_provider = build_default_provider()
+
+
+class ProviderRegistry:
+    """
+    Active flight providers built from the APIProvider table, reloaded at most
+    every PROVIDER_REGISTRY_TTL_SECONDS. With no usable rows, Amadeus alone is used.
+    PROVIDER_MODE=replay|record pins the list to default_provider.
+    """
+
+    def __init__(self, ttl_seconds: int = PROVIDER_REGISTRY_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._providers: List[FlightProvider] = []
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _build(self, rows: List[APIProvider]) -> List[FlightProvider]:
+        providers = []
+        for row in rows:
+            adapter_name = ((row.meta or {}).get("adapter") or row.name or "").lower()
+            adapter = ADAPTERS.get(adapter_name)
+            if adapter is None:
+                logger.warning(f"No adapter for provider {row.name!r} (adapter={adapter_name!r}); skipping")
+                continue
+            try:
+                providers.append(adapter(row))
+            except Exception as e:
+                logger.error(f"Failed to initialize provider {row.name!r}: {e}")
+        return providers or [default_provider]
+
+    def load(self) -> List[FlightProvider]:
+        if PROVIDER_MODE in ("replay", "record"):
+            return [default_provider]
+        with Session(engine) as session:
+            rows = session.exec(select(APIProvider).where(APIProvider.active == True)).all()
+        return self._build(rows)
+
+    def get_active(self) -> List[FlightProvider]:
+        """Cached provider list; safe to call from worker threads"""
+        with self._lock:
+            if self._providers and time.monotonic() - self._loaded_at < self.ttl_seconds:
+                return self._providers
+            try:
+                self._providers = self.load()
+            except Exception as e:
+                logger.error(f"Failed to load API providers: {e}")
+                if not self._providers:
+                    self._providers = [default_provider]
+            self._loaded_at = time.monotonic()
+            return self._providers
+
+    def set_providers(self, providers: List[FlightProvider]) -> None:
+        """Pin an explicit provider list (tests, benchmarks)"""
+        with self._lock:
+            self._providers = list(providers)
+            self._loaded_at = float("inf")
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = 0.0
+
+
+provider_registry = ProviderRegistry()
@@ -0,0 +1,320 @@
+# providers/replay_provider.py
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from providers.amadeus_client import AmadeusClient, ProviderError, PROVIDER_TIMEOUT_SECONDS
+from providers.amadeus_provider import AmadeusProvider
+
+logger = logging.getLogger(__name__)
+
+# Directory of recorded flight-offers responses (written by PROVIDER_MODE=record)
+REPLAY_DIR = os.getenv("REPLAY_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "recordings"))
+# fixed | uniform | normal | lognormal | exponential | recorded
+REPLAY_LATENCY_DIST = os.getenv("REPLAY_LATENCY_DIST", "lognormal")
+# median (lognormal), mean (normal, exponential) or centre (fixed, uniform) of the delay
+REPLAY_LATENCY_MS = float(os.getenv("REPLAY_LATENCY_MS", "300"))
+# sigma for lognormal, stddev in ms for normal, half-width in ms for uniform
+REPLAY_LATENCY_SPREAD = float(os.getenv("REPLAY_LATENCY_SPREAD", "0.5"))
+REPLAY_LATENCY_MAX_MS = float(os.getenv("REPLAY_LATENCY_MAX_MS", "5000"))
+REPLAY_ERROR_RATE = float(os.getenv("REPLAY_ERROR_RATE", "0"))
+REPLAY_RATE_LIMIT_RATE = float(os.getenv("REPLAY_RATE_LIMIT_RATE", "0"))
+REPLAY_TIMEOUT_RATE = float(os.getenv("REPLAY_TIMEOUT_RATE", "0"))
+# Serve synthesized offers for routes with no recording (otherwise an empty result)
+REPLAY_SYNTHETIC = os.getenv("REPLAY_SYNTHETIC", "true").lower() == "true"
+# Random +/- fraction applied to prices per call, so alert checks see fares move
+REPLAY_PRICE_JITTER = float(os.getenv("REPLAY_PRICE_JITTER", "0"))
+REPLAY_SEED = os.getenv("REPLAY_SEED")
+
+CARRIERS = ["AF", "ET", "KQ", "SN", "QC", "TK", "AT", "WB"]
+HUBS = ["ADD", "NBO", "BRU", "IST", "CMN", "KGL"]
+
+
+def iso_duration(minutes: int) -> str:
+    return f"PT{minutes // 60}H{minutes % 60}M" if minutes % 60 else f"PT{minutes // 60}H"
+
+
+def synthesize_offers(n_offers: int, departure: str = "DLA", arrival: str = "CDG", departure_date: str = "2030-01-15",
+                      seed: int = 7, non_stop: bool = False) -> List[Dict[str, Any]]:
+    """Amadeus-shaped flight-offers, deterministic per seed"""
+    rng = random.Random(seed)
+    day = datetime.strptime(departure_date, "%Y-%m-%d")
+    offers = []
+    for i in range(n_offers):
+        stops = 0 if non_stop else rng.choice([0, 1, 1, 2])
+        airports = [departure] + rng.sample([h for h in HUBS if h not in (departure, arrival)], stops) + [arrival]
+        cursor = day + timedelta(hours=rng.randint(5, 22), minutes=rng.choice([0, 15, 30, 45]))
+        started = cursor
+        segments = []
+        for n in range(stops + 1):
+            minutes = rng.randint(60, 420)
+            segments.append({
+                "departure": {"iataCode": airports[n], "at": cursor.isoformat(timespec="seconds")},
+                "arrival": {"iataCode": airports[n + 1], "at": (cursor + timedelta(minutes=minutes)).isoformat(timespec="seconds")},
+                "carrierCode": rng.choice(CARRIERS),
+                "number": str(rng.randint(100, 9999)),
+                "aircraft": {"code": "788"},
+                "duration": iso_duration(minutes),
+                "id": str(n + 1),
+                "numberOfStops": 0,
+            })
+            cursor += timedelta(minutes=minutes + rng.randint(45, 180))
+        total = int((cursor - started).total_seconds() // 60)
+        offers.append({
+            "type": "flight-offer",
+            "id": str(i + 1),
+            "source": "GDS",
+            "itineraries": [{"duration": iso_duration(total), "segments": segments}],
+            "price": {"currency": "XAF", "total": f"{rng.randint(80, 900) * 1000}.00",
+                      "base": f"{rng.randint(60, 700) * 1000}.00"},
+            "validatingAirlineCodes": [segments[0]["carrierCode"]],
+        })
+    return offers
+
+
+def recording_name(params: Dict[str, Any], dated: bool = True) -> str:
+    """DLA-CDG-2030-01-15[-direct].json; undated names match any departure date"""
+    parts = [str(params.get("originLocationCode")), str(params.get("destinationLocationCode"))]
+    if dated:
+        parts.append(str(params.get("departureDate")))
+    if params.get("nonStop"):
+        parts.append("direct")
+    return "-".join(parts) + ".json"
+
+
+def shift_offers(offers: List[Dict[str, Any]], days: int) -> List[Dict[str, Any]]:
+    """Copy of a recorded response moved `days` days, so one recording serves any date"""
+    if not days:
+        return offers
+    delta = timedelta(days=days)
+    shifted = json.loads(json.dumps(offers))
+    for offer in shifted:
+        for itinerary in offer.get("itineraries", []):
+            for segment in itinerary.get("segments", []):
+                for end in ("departure", "arrival"):
+                    at = segment.get(end, {}).get("at")
+                    if at:
+                        segment[end]["at"] = (datetime.fromisoformat(at) + delta).isoformat(timespec="seconds")
+    return shifted
+
+
+class LatencyModel:
+    """Per-call delay in ms drawn from a named distribution"""
+
+    DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential", "recorded")
+
+    def __init__(self, dist: str = REPLAY_LATENCY_DIST, ms: float = REPLAY_LATENCY_MS,
+                 spread: float = REPLAY_LATENCY_SPREAD, max_ms: float = REPLAY_LATENCY_MAX_MS):
+        if dist not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {dist!r}; expected one of {', '.join(self.DISTRIBUTIONS)}")
+        self.dist = dist
+        self.ms = ms
+        self.spread = spread
+        self.max_ms = max_ms
+
+    def sample(self, rng: random.Random, recorded_ms: Optional[float] = None) -> float:
+        if self.dist == "recorded" and recorded_ms is not None:
+            delay = recorded_ms
+        elif self.dist == "uniform":
+            delay = rng.uniform(self.ms - self.spread, self.ms + self.spread)
+        elif self.dist == "normal":
+            delay = rng.gauss(self.ms, self.spread)
+        elif self.dist == "lognormal":
+            delay = rng.lognormvariate(math.log(max(self.ms, 0.001)), self.spread)
+        elif self.dist == "exponential":
+            delay = rng.expovariate(1.0 / self.ms) if self.ms > 0 else 0.0
+        else:
+            delay = self.ms
+        return min(max(delay, 0.0), self.max_ms)
+
+
+class ReplayClient:
+    """
+    Offline stand-in for AmadeusClient.search_flight_offers. Serves recorded
+    responses from `directory` (exact date first, then an undated recording moved
+    to the requested date), else synthesized offers seeded by route and date.
+    Every call sleeps for a sampled latency and may fail with a 503, a 429 or a
+    timeout (504) at the configured rates.
+    """
+
+    def __init__(self, directory: str = REPLAY_DIR, latency: Optional[LatencyModel] = None,
+                 error_rate: float = REPLAY_ERROR_RATE, rate_limit_rate: float = REPLAY_RATE_LIMIT_RATE,
+                 timeout_rate: float = REPLAY_TIMEOUT_RATE, synthetic: bool = REPLAY_SYNTHETIC,
+                 price_jitter: float = REPLAY_PRICE_JITTER, seed: Optional[int] = None):
+        self.directory = directory
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.synthetic = synthetic
+        self.price_jitter = price_jitter
+        self._rng = random.Random(seed)
+        # recordings are read once; disk reads would skew latency under load
+        self._recordings: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {
+            "calls": 0,
+            "recorded": 0,
+            "synthetic": 0,
+            "empty": 0,
+            "errors": 0,
+            "rate_limited": 0,
+            "timeouts": 0,
+        }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        return {**counters, "directory": self.directory, "latency": self.latency.dist,
+                "latency_ms": self.latency.ms, "error_rate": self.error_rate}
+
+    def _recording(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if name in self._recordings:
+                return self._recordings[name]
+        path = os.path.join(self.directory, name)
+        body = None
+        if os.path.exists(path):
+            with open(path) as fh:
+                body = json.load(fh)
+            if isinstance(body, list):
+                body = {"data": body}
+        with self._lock:
+            self._recordings[name] = body
+        return body
+
+    def _offers_for(self, params: Dict[str, Any]):
+        """(offers, recorded latency in ms or None)"""
+        recording = self._recording(recording_name(params))
+        days = 0
+        if recording is None:
+            recording = self._recording(recording_name(params, dated=False))
+            if recording is not None:
+                recorded_date = (recording.get("params") or {}).get("departureDate")
+                if recorded_date and params.get("departureDate"):
+                    days = (datetime.strptime(params["departureDate"], "%Y-%m-%d")
+                            - datetime.strptime(recorded_date, "%Y-%m-%d")).days
+        if recording is not None:
+            self._count("recorded")
+            offers = shift_offers(recording.get("data", []), days)
+            if params.get("nonStop"):
+                offers = [o for o in offers if len(o["itineraries"][0]["segments"]) == 1]
+            return offers, recording.get("latency_ms")
+        if not self.synthetic:
+            self._count("empty")
+            return [], None
+        self._count("synthetic")
+        route = f"{params.get('originLocationCode')}|{params.get('destinationLocationCode')}|{params.get('departureDate')}"
+        seed = int(hashlib.sha256(route.encode()).hexdigest()[:16], 16)
+        offers = synthesize_offers(
+            int(params.get("max") or 5), params.get("originLocationCode"), params.get("destinationLocationCode"),
+            params.get("departureDate"), seed=seed, non_stop=bool(params.get("nonStop")),
+        )
+        return offers, None
+
+    def _jitter(self, offers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not self.price_jitter:
+            return offers
+        jittered = []
+        for offer in offers:
+            factor = 1 + self._rng.uniform(-self.price_jitter, self.price_jitter)
+            price = dict(offer["price"], total=f"{float(offer['price']['total']) * factor:.2f}")
+            jittered.append(dict(offer, price=price))
+        return jittered
+
+    async def search_flight_offers(self, timeout: Optional[float] = None, **params) -> List[Dict[str, Any]]:
+        params = {k: v for k, v in params.items() if v is not None}
+        self._count("calls")
+        offers, recorded_ms = self._offers_for(params)
+        roll = self._rng.random()
+        if roll < self.timeout_rate:
+            self._count("timeouts")
+            await asyncio.sleep(timeout if timeout is not None else PROVIDER_TIMEOUT_SECONDS)
+            raise ProviderError(504, "Flight provider timed out")
+        await asyncio.sleep(self.latency.sample(self._rng, recorded_ms) / 1000.0)
+        roll -= self.timeout_rate
+        if roll < self.error_rate:
+            self._count("errors")
+            raise ProviderError(503, "Replay: simulated provider failure")
+        roll -= self.error_rate
+        if roll < self.rate_limit_rate:
+            self._count("rate_limited")
+            raise ProviderError(429, "Replay: simulated rate limit")
+        limit = params.get("max")
+        return self._jitter(offers[:int(limit)] if limit else offers)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class RecordingClient:
+    """Passes searches to a live AmadeusClient and saves each response for replay"""
+
+    def __init__(self, client: AmadeusClient, directory: str = REPLAY_DIR):
+        self.client = client
+        self.directory = directory
+        self.saved = 0
+
+    async def search_flight_offers(self, timeout: Optional[float] = None, **params) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        offers = await self.client.search_flight_offers(timeout=timeout, **params)
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        params = {k: v for k, v in params.items() if v is not None}
+        os.makedirs(self.directory, exist_ok=True)
+        body = json.dumps({"params": params, "latency_ms": latency_ms, "data": offers})
+        for name in (recording_name(params), recording_name(params, dated=False)):
+            with open(os.path.join(self.directory, name), "w") as fh:
+                fh.write(body)
+        self.saved += 1
+        logger.info(f"Recorded {len(offers)} offers to {recording_name(params)} ({latency_ms} ms)")
+        return offers
+
+    def stats(self) -> Dict[str, Any]:
+        return {"directory": self.directory, "saved": self.saved}
+
+
+class ReplayProvider(AmadeusProvider):
+    """
+    AmadeusProvider running on a ReplayClient: searches and price checks go
+    through the real request planning and normalization, fully offline.
+    Tunable through APIProvider.meta (replay_dir, latency_dist, latency_ms,
+    latency_spread, error_rate, rate_limit_rate, timeout_rate, price_jitter,
+    seed); the REPLAY_* env vars are the defaults.
+    """
+
+    name = "Replay"
+
+    def __init__(self, config=None, client: Optional[ReplayClient] = None):
+        if client is None:
+            meta = dict(getattr(config, "meta", None) or {})
+            seed = meta.get("seed", REPLAY_SEED)
+            client = ReplayClient(
+                directory=meta.get("replay_dir", REPLAY_DIR),
+                latency=LatencyModel(
+                    dist=meta.get("latency_dist", REPLAY_LATENCY_DIST),
+                    ms=float(meta.get("latency_ms", REPLAY_LATENCY_MS)),
+                    spread=float(meta.get("latency_spread", REPLAY_LATENCY_SPREAD)),
+                ),
+                error_rate=float(meta.get("error_rate", REPLAY_ERROR_RATE)),
+                rate_limit_rate=float(meta.get("rate_limit_rate", REPLAY_RATE_LIMIT_RATE)),
+                timeout_rate=float(meta.get("timeout_rate", REPLAY_TIMEOUT_RATE)),
+                price_jitter=float(meta.get("price_jitter", REPLAY_PRICE_JITTER)),
+                seed=int(seed) if seed is not None else None,
+            )
+        super().__init__(None, client=client)
+        if config is not None:
+            self.meta = dict(getattr(config, "meta", None) or {})
+            if getattr(config, "name", None):
+                self.name = config.name
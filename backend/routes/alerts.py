@@ -1,11 +1,15 @@
 # routes/alerts.py
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select
 from typing import List
 from database import get_session
+from jobs import schedule_alert_check
 from deps import get_current_user
 from models import Alert
-from schemas import AlertIn, AlertOut
+from schemas import AlertIn, AlertOut, AlertHistoryOut
+from services.alert_index import alert_index
+from services.price_check_rollups import alert_price_history
 
 alerts_router = APIRouter()
 
@@ -27,6 +31,8 @@ def create_alert(payload: AlertIn, current_user=Depends(get_current_user), sessi
     session.add(alert)
     session.commit()
     session.refresh(alert)
+    alert_index.upsert(alert)
+    schedule_alert_check(alert.next_check_at)
     return alert
 
 @alerts_router.get("/", response_model=List[AlertOut])
@@ -42,6 +48,16 @@ def get_alert(alert_id: int, current_user=Depends(get_current_user), session: Se
         raise HTTPException(status_code=404, detail="Alert not found")
     return alert
 
+@alerts_router.get("/{alert_id}/history", response_model=AlertHistoryOut)
+def get_alert_history(alert_id: int, days: int = Query(30, ge=1, le=365), current_user=Depends(get_current_user),
+                      session: Session = Depends(get_session)):
+    """Checked prices per hour or day (see PRICE_LOG_ROLLUP_GRANULARITY), read from the compacted rollups"""
+    alert = session.get(Alert, alert_id)
+    if not alert or alert.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    since = datetime.utcnow() - timedelta(days=days)
+    return {"alert_id": alert_id, "buckets": alert_price_history(session, alert_id, since)}
+
 @alerts_router.put("/{alert_id}", response_model=AlertOut)
 def update_alert(alert_id: int, payload: AlertIn, current_user=Depends(get_current_user), session: Session = Depends(get_session)):
     alert = session.get(Alert, alert_id)
@@ -49,9 +65,13 @@ def update_alert(alert_id: int, payload: AlertIn, current_user=Depends(get_curre
         raise HTTPException(status_code=404, detail="Alert not found")
     for k, v in payload.dict(exclude_unset=True).items():
         setattr(alert, k, v)
+    # route, target or frequency may have changed; check against the new settings now
+    alert.next_check_at = datetime.utcnow()
     session.add(alert)
     session.commit()
     session.refresh(alert)
+    alert_index.upsert(alert)
+    schedule_alert_check(alert.next_check_at)
     return alert
 
 @alerts_router.delete("/{alert_id}")
@@ -61,5 +81,6 @@ def delete_alert(alert_id: int, current_user=Depends(get_current_user), session:
         raise HTTPException(status_code=404, detail="Alert not found")
     session.delete(alert)
     session.commit()
+    alert_index.remove(alert_id)
     return {"ok": True}
 
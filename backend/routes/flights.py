@@ -1,27 +1,45 @@
 # routes/flights.py
 from fastapi import APIRouter, Query, Depends, HTTPException
-from typing import List
+from typing import Dict, List, Optional
 from sqlmodel import Session
 from database import get_session
-from schemas import FlightsResponse, FlightOut
-from models import Search, Flight, FlightLeg, FlightPriceHistory
-import uuid
+from schemas import FlightsResponse, FlightOut, FlexibleSearchResponse
+from models import Search
+from services.search_cache import (
+    search_cache,
+    canonical_search_params,
+    compute_search_hash,
+    load_stored_search,
+    SEARCH_CACHE_PARTIAL_TTL_SECONDS,
+)
+from services.single_flight import Broadcast, search_flight_group
+from services.search_results import ResultPageQuery
+from routes.searches import result_page_query, load_search_page
+from services.flight_store import persist_search_results, persist_search_batch, upsert_catalogue, link_search_results
+from services.alert_index import itinerary_key
+from jobs import on_price_ingested
 from datetime import datetime, timedelta
 import os
-from amadeus import Client, ResponseError
+import asyncio
+from fastapi.concurrency import run_in_threadpool
+from providers.amadeus_client import ProviderError
+from providers.registry import provider_registry
+from services.aggregator import aggregate_search, iter_provider_results, flight_identity, is_cheaper, AggregateResult
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from database import engine
+import json
+import logging
 
-flights_router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# Initialize Amadeus client
-amadeus = Client(
-    client_id=os.getenv('AMADEUS_CLIENT_ID'),
-    client_secret=os.getenv('AMADEUS_CLIENT_SECRET'),
-    hostname='test' if os.getenv('AMADEUS_TEST', 'true').lower() == 'true' else 'production'
-)
+flights_router = APIRouter()
 
-def fetch_flights_from_provider(departure: str, arrival: str, departure_date: str = None, **kwargs):
+async def fetch_flights_from_provider(departure: str, arrival: str, departure_date: str = None, **kwargs) -> AggregateResult:
     """
-    Fetch real flight data from Amadeus API
+    Fetch flights from every active provider (see providers.registry) under the
+    aggregation deadline. The result is marked partial if a provider failed or
+    did not answer in time.
     """
     try:
         print(f"Starting flight search: {departure} to {arrival} on {departure_date}")
@@ -30,111 +48,16 @@ def fetch_flights_from_provider(departure: str, arrival: str, departure_date: st
         if not departure_date:
             tomorrow = datetime.now() + timedelta(days=1)
             departure_date = tomorrow.strftime('%Y-%m-%d')
-        
-        print(f"Using Amadeus API with credentials: {os.getenv('AMADEUS_CLIENT_ID')} (Test mode: {os.getenv('AMADEUS_TEST', 'true')})")
-        
-        # Search flights using Amadeus API
-        print(f"Searching direct flights first...")
-        try:
-            response = amadeus.shopping.flight_offers_search.get(
-                originLocationCode=departure,
-                destinationLocationCode=arrival,
-                departureDate=departure_date,
-                adults=kwargs.get('passengers', 1),
-                currencyCode='XAF',  # Using Central African CFA franc for local flights
-                max=5,  # Limit results for faster response
-                nonStop=True  # Try to get direct flights first
-            )
-        except ResponseError:
-            print("No direct flights found, searching for all routes...")
-            response = amadeus.shopping.flight_offers_search.get(
-                originLocationCode=departure,
-                destinationLocationCode=arrival,
-                departureDate=departure_date,
-                adults=kwargs.get('passengers', 1),
-                currencyCode='XAF',
-                max=5
-            )
-        
-        print(f"Amadeus API response received with {len(response.data)} offers")
-        # Debug: Print full response for analysis
-        for offer in response.data:
-            price = offer['price']['total']
-            duration = offer['itineraries'][0]['duration']
-            segments = offer['itineraries'][0]['segments']
-            route = ' -> '.join([s['departure']['iataCode'] for s in segments] + [segments[-1]['arrival']['iataCode']])
-            print(f"Found route: {route}, Duration: {duration}, Price: {price} XAF")
-
-        flights = []
-        for offer in response.data:
-            # Extract main flight info
-            itinerary = offer['itineraries'][0]
-            first_segment = itinerary['segments'][0]
-            last_segment = itinerary['segments'][-1]
-
-            def parse_duration(duration_str):
-                # Parse ISO 8601 duration format (e.g., "PT8H15M" -> 495 minutes)
-                duration_str = duration_str.replace('PT', '')
-                hours = 0
-                minutes = 0
-                
-                if 'H' in duration_str:
-                    h_split = duration_str.split('H')
-                    hours = int(h_split[0])
-                    duration_str = h_split[1]
-                
-                if 'M' in duration_str:
-                    m_split = duration_str.split('M')
-                    minutes = int(m_split[0])
-                
-                return hours * 60 + minutes
-
-            # Filter out unreasonable routes for domestic flights
-            if departure in ['DLA', 'NSI', 'GOU', 'MVR', 'NGE'] and arrival in ['DLA', 'NSI', 'GOU', 'MVR', 'NGE']:
-                # For domestic Cameroon flights, skip if duration > 3 hours
-                if parse_duration(itinerary['duration']) > 180:
-                    print(f"Skipping unreasonable domestic route with duration: {itinerary['duration']}")
-                    continue
 
-            flight = {
-                "provider_flight_id": offer['id'],
-                "provider_name": "Amadeus",
-                "airline": first_segment['carrierCode'],
-                "departure_airport_code": first_segment['departure']['iataCode'],
-                "arrival_airport_code": last_segment['arrival']['iataCode'],
-                "departure_time": first_segment['departure']['at'],
-                "arrival_time": last_segment['arrival']['at'],
-                "duration_minutes": parse_duration(itinerary['duration']),
-                "price": float(offer['price']['total']),
-                "currency": offer['price']['currency'],
-                "stops": len(itinerary['segments']) - 1,
-                "legs": []
-            }
-
-            # Add individual flight legs
-            for idx, segment in enumerate(itinerary['segments'], 1):
-                leg = {
-                    "leg_number": idx,
-                    "departure_airport": segment['departure']['iataCode'],
-                    "arrival_airport": segment['arrival']['iataCode'],
-                    "departure_time": segment['departure']['at'],
-                    "arrival_time": segment['arrival']['at'],
-                    "duration_minutes": parse_duration(segment['duration']),
-                    "carrier": segment['carrierCode'],
-                    "flight_number": segment['number']
-                }
-                flight['legs'].append(leg)
-
-            flights.append(flight)
-
-        return flights
-
-    except ResponseError as error:
-        print(f"Amadeus API error: {error}")
-        error_message = f"Flight search failed: {str(error)}"
-        if hasattr(error, 'response') and hasattr(error.response, 'body'):
-            error_message = error.response.body.get('errors', [{}])[0].get('detail', error_message)
-        raise HTTPException(status_code=error.response.status_code, detail=error_message)
+        providers = await run_in_threadpool(provider_registry.get_active)
+        return await aggregate_search(
+            providers, departure, arrival, departure_date,
+            passengers=kwargs.get('passengers', 1), cabin=kwargs.get('cabin')
+        )
+
+    except ProviderError as error:
+        print(f"Flight provider error: {error}")
+        raise HTTPException(status_code=error.status_code, detail=error.detail)
     except Exception as error:
         print(f"Error fetching flights: {error}")
         raise HTTPException(
@@ -142,85 +65,428 @@ def fetch_flights_from_provider(departure: str, arrival: str, departure_date: st
             detail="Unable to fetch flights at this time. Please try again in a few minutes."
         )
 
-@flights_router.get("/flights", response_model=FlightsResponse)
-def get_flights(departure: str = Query(...), arrival: str = Query(...),
-                departureDate: str = Query(None), session: Session = Depends(get_session)):
-    results = fetch_flights_from_provider(departure, arrival, departureDate)
-    # create a Search record
-    search = Search(
+def build_flights_out(results: list) -> list:
+    """Shape provider FlightRecords for FlightOut"""
+    return [r.as_dict() for r in results]
+
+def new_search_record(params: dict, search_hash: str, result: AggregateResult) -> Search:
+    """Search row for a provider result; partial results are flagged so the DB tier skips them"""
+    return Search(
         user_id=None,
-        params={"departure": departure, "arrival": arrival, "departureDate": departureDate},
+        params={**params, "partial": True} if result.partial else params,
         created_at=datetime.utcnow(),
-        search_hash=str(uuid.uuid4()),
-        results_count=len(results)
+        search_hash=search_hash,
+        results_count=len(result.flights)
     )
-    session.add(search)
-    session.commit()
-    session.refresh(search)
-
-    flights_out = []
-    for r in results:
-        # Parse times to datetime objects if they are strings
-        def parse_dt(val):
-            if isinstance(val, str):
-                try:
-                    return datetime.fromisoformat(val)
-                except Exception:
-                    return None
-            return val
-
-        flight = Flight(
-            provider_flight_id=r["provider_flight_id"],
-            provider_name=r["provider_name"],
-            airline=r["airline"],
-            departure_airport_code=r["departure_airport_code"],
-            arrival_airport_code=r["arrival_airport_code"],
-            departure_time=parse_dt(r["departure_time"]),
-            arrival_time=parse_dt(r["arrival_time"]),
-            duration_minutes=r.get("duration_minutes"),
-            price=r.get("price"),
-            currency=r.get("currency"),
-            stops=r.get("stops"),
-            cached=True,
-            search_id=search.id
-        )
-        session.add(flight)
-        session.commit()
-        session.refresh(flight)
-
-        # legs
-        for leg in r.get("legs", []):
-            leg_obj = FlightLeg(
-                flight_id=flight.id,
-                leg_number=leg.get("leg_number", 1),
-                departure_airport=leg.get("departure_airport"),
-                arrival_airport=leg.get("arrival_airport"),
-                departure_time=parse_dt(leg.get("departure_time")),
-                arrival_time=parse_dt(leg.get("arrival_time")),
-                duration_minutes=leg.get("duration_minutes"),
-                carrier=leg.get("carrier"),
-                flight_number=leg.get("flight_number")
+
+def build_search_response(search_id: int, result: AggregateResult) -> dict:
+    flights_out = build_flights_out(result.flights)
+    return {"search_id": str(search_id), "flights": flights_out, "total_count": len(flights_out),
+            "partial": result.partial}
+
+def cache_search_response(search_hash: str, response: dict) -> None:
+    # Partial results are only reused briefly, so a retry can pick up slow providers
+    ttl = SEARCH_CACHE_PARTIAL_TTL_SECONDS if response.get("partial") else None
+    search_cache.set(search_hash, response, ttl_seconds=ttl)
+
+def match_alerts_standalone(params: dict, flights: list) -> int:
+    # a fresh price may meet alerts on this route and date before their next check
+    cheapest = min((f.price for f in flights if f.price is not None), default=None)
+    if cheapest is None:
+        return 0
+    key = itinerary_key(params["departure"], params["arrival"],
+                        datetime.strptime(params["departureDate"], "%Y-%m-%d").date())
+    with Session(engine) as session:
+        return on_price_ingested(session, key, cheapest)
+
+async def match_search_alerts(params: dict, flights: list) -> None:
+    """Alert matching for a stored search; every ingestion path calls it, and its failures never fail the search"""
+    try:
+        await run_in_threadpool(match_alerts_standalone, params, flights)
+    except Exception as e:
+        logger.error(f"Alert matching failed for {params['departure']}-{params['arrival']} "
+                     f"on {params['departureDate']}: {str(e)}")
+
+async def search_and_store(params: dict, search_hash: str):
+    """
+    Query the provider for one canonical search, persist the results and cache
+    the response. Runs once per in-flight search hash (see SingleFlight), as a
+    shared task that can outlive the request that started it, so it opens its
+    own session rather than borrowing that request's.
+    """
+    # A previous leader may have finished between our cache check and registration
+    cached = search_cache.get(search_hash)
+    if cached is not None:
+        return cached
+
+    result = await fetch_flights_from_provider(
+        params["departure"], params["arrival"], params["departureDate"],
+        passengers=params["passengers"], cabin=params["cabin"]
+    )
+    search = new_search_record(params, search_hash, result)
+    with Session(engine) as session:
+        search_id, _ = await run_in_threadpool(persist_search_results, session, search, result.flights)
+
+    response = build_search_response(search_id, result)
+    cache_search_response(search_hash, response)
+    await match_search_alerts(params, result.flights)
+    return response
+
+@flights_router.get("/flights", response_model=FlightsResponse)
+async def get_flights(departure: str = Query(...), arrival: str = Query(...),
+                departureDate: str = Query(None), passengers: int = Query(1, ge=1),
+                cabinClass: str = Query(None), page: ResultPageQuery = Depends(result_page_query),
+                session: Session = Depends(get_session)):
+    """
+    Offers for a route and date. With any filter, sort, limit or cursor parameter
+    the response is one page served from the stored search (see /api/searches).
+    """
+    params = canonical_search_params(departure, arrival, departureDate, passengers, cabinClass)
+    search_hash = compute_search_hash(params)
+
+    # Serve repeat searches from the in-process tier, then from stored rows
+    response = search_cache.get(search_hash)
+    if response is None:
+        stored = await run_in_threadpool(load_stored_search, session, search_hash, search_cache.ttl_seconds)
+        response = cache_stored_search(search_hash, stored)
+    if response is None:
+        # Identical concurrent searches share a single provider call and Search row
+        response = await search_flight_group.do(search_hash, search_and_store, params, search_hash)
+
+    if not page.narrows():
+        return response
+    return await run_in_threadpool(load_search_page, session, int(response["search_id"]), page)
+
+def cache_stored_search(search_hash: str, stored) -> Optional[dict]:
+    """
+    Put a stored-tier hit (response, age) into the in-process tier until the
+    Search row itself stops being fresh, so it is never served older than the TTL
+    """
+    if stored is None:
+        return None
+    response, age_seconds = stored
+    search_cache.set(search_hash, response, ttl_seconds=max(0.0, search_cache.ttl_seconds - age_seconds))
+    return response
+
+FLEX_SEARCH_CONCURRENCY = int(os.getenv("FLEX_SEARCH_CONCURRENCY", "4"))
+FLEX_SEARCH_MAX_DAYS = int(os.getenv("FLEX_SEARCH_MAX_DAYS", "7"))
+
+def load_stored_searches(session: Session, hashes: list, max_age_seconds: int) -> dict:
+    """DB cache tier lookup for several search hashes at once: hash -> (response, age)"""
+    found = {}
+    for search_hash in hashes:
+        stored = load_stored_search(session, search_hash, max_age_seconds)
+        if stored is not None:
+            found[search_hash] = stored
+    return found
+
+async def fetch_and_store_days(day_params: dict) -> dict:
+    """
+    Fetch several days concurrently (at most FLEX_SEARCH_CONCURRENCY at once)
+    and persist the ones that answered in one transaction. Returns
+    search_hash -> response, or the exception that day's search raised.
+    """
+    semaphore = asyncio.Semaphore(FLEX_SEARCH_CONCURRENCY)
+
+    async def fetch_day(params):
+        async with semaphore:
+            return await fetch_flights_from_provider(
+                params["departure"], params["arrival"], params["departureDate"],
+                passengers=params["passengers"], cabin=params["cabin"]
             )
-            session.add(leg_obj)
-
-        # price history entry
-        ph = FlightPriceHistory(flight_id=flight.id, price=flight.price, currency=flight.currency)
-        session.add(ph)
-        session.commit()
-
-        flights_out.append({
-            "provider_flight_id": flight.provider_flight_id,
-            "provider_name": flight.provider_name,
-            "airline": flight.airline,
-            "departure_airport_code": flight.departure_airport_code,
-            "arrival_airport_code": flight.arrival_airport_code,
-            "departure_time": flight.departure_time,
-            "arrival_time": flight.arrival_time,
-            "duration_minutes": flight.duration_minutes,
-            "price": flight.price,
-            "currency": flight.currency,
-            "stops": flight.stops,
-            "legs": r.get("legs", [])
-        })
-
-    return {"search_id": str(search.id), "flights": flights_out, "total_count": len(flights_out)}
\ No newline at end of file
+
+    hashes = list(day_params)
+    fetched = await asyncio.gather(*(fetch_day(day_params[h]) for h in hashes), return_exceptions=True)
+
+    outcomes = {}
+    batch = []
+    for search_hash, result in zip(hashes, fetched):
+        if isinstance(result, BaseException):
+            outcomes[search_hash] = result
+            continue
+        batch.append((search_hash, new_search_record(day_params[search_hash], search_hash, result), result))
+    if batch:
+        # shared with coalesced callers, so it does not borrow a request session
+        with Session(engine) as session:
+            written = await run_in_threadpool(
+                persist_search_batch, session, [(search, result.flights) for _, search, result in batch]
+            )
+        for (search_hash, _, result), (search_id, _) in zip(batch, written):
+            response = build_search_response(search_id, result)
+            cache_search_response(search_hash, response)
+            outcomes[search_hash] = response
+        await asyncio.gather(*(match_search_alerts(day_params[search_hash], result.flights)
+                               for search_hash, _, result in batch))
+    return outcomes
+
+async def day_from_batch(batch: asyncio.Task, search_hash: str) -> dict:
+    """One day's response out of a fetch_and_store_days task"""
+    outcome = (await asyncio.shield(batch))[search_hash]
+    if isinstance(outcome, BaseException):
+        raise outcome
+    return outcome
+
+@flights_router.get("/flights/flexible", response_model=FlexibleSearchResponse)
+async def get_flexible_flights(departure: str = Query(...), arrival: str = Query(...),
+                               departureDate: str = Query(...),
+                               days: int = Query(3, ge=0, le=FLEX_SEARCH_MAX_DAYS),
+                               passengers: int = Query(1, ge=1), cabinClass: str = Query(None),
+                               best: int = Query(5, ge=1, le=50),
+                               session: Session = Depends(get_session)):
+    """
+    Cheapest fares for each day within +/- `days` of departureDate. Days are
+    served from the search cache when fresh, or joined if an identical search
+    is already in flight; the rest are fetched concurrently (at most
+    FLEX_SEARCH_CONCURRENCY at once) and persisted in one transaction.
+    """
+    try:
+        center = datetime.strptime(departureDate, '%Y-%m-%d').date()
+    except ValueError:
+        raise HTTPException(status_code=422, detail="departureDate must be YYYY-MM-DD")
+    today = datetime.utcnow().date()
+    dates = [center + timedelta(days=k) for k in range(-days, days + 1)]
+    dates = [d for d in dates if d >= today]
+    if not dates:
+        raise HTTPException(status_code=422, detail="All requested dates are in the past")
+
+    day_params = {}
+    for d in dates:
+        params = canonical_search_params(departure, arrival, d.isoformat(), passengers, cabinClass)
+        day_params[compute_search_hash(params)] = params
+
+    responses = {}
+    from_cache = set()
+    for search_hash in day_params:
+        cached = search_cache.get(search_hash)
+        if cached is not None:
+            responses[search_hash] = cached
+    missing = [h for h in day_params if h not in responses]
+    if missing:
+        stored = await run_in_threadpool(load_stored_searches, session, missing, search_cache.ttl_seconds)
+        for search_hash, hit in stored.items():
+            responses[search_hash] = cache_stored_search(search_hash, hit)
+    from_cache.update(responses)
+
+    # Days already in flight (from /flights or another calendar) are joined; the
+    # rest become one batch whose days are registered so later searches join it.
+    # Nothing awaits between the in_flight checks and registration.
+    to_fetch = [h for h in day_params if h not in responses]
+    leading = {h: day_params[h] for h in to_fetch if not search_flight_group.in_flight(h)}
+    batch = asyncio.ensure_future(fetch_and_store_days(leading)) if leading else None
+    day_tasks = [search_flight_group.task(h, day_from_batch, batch, h) for h in to_fetch]
+    fetched = await asyncio.gather(*(asyncio.shield(t) for t in day_tasks), return_exceptions=True)
+
+    errors = {}
+    for search_hash, result in zip(to_fetch, fetched):
+        if isinstance(result, HTTPException):
+            errors[search_hash] = result.detail
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        responses[search_hash] = result
+    if to_fetch and len(errors) == len(to_fetch) and not responses:
+        # Every day failed and nothing was cached; surface the provider error
+        raise fetched[-1]
+
+    calendar = []
+    offers = []
+    for search_hash, params in day_params.items():
+        response = responses.get(search_hash)
+        day = {"date": params["departureDate"], "min_price": None, "currency": None,
+               "flight_count": 0, "search_id": None, "cached": search_hash in from_cache,
+               "error": errors.get(search_hash)}
+        if response is not None:
+            priced = [f for f in response["flights"] if f.get("price") is not None]
+            cheapest = min(priced, key=lambda f: f["price"], default=None)
+            day.update({
+                "search_id": response["search_id"],
+                "flight_count": response["total_count"],
+                "partial": response.get("partial", False),
+                "min_price": cheapest["price"] if cheapest else None,
+                "currency": cheapest["currency"] if cheapest else None,
+            })
+            offers.extend(priced)
+        calendar.append(day)
+
+    offers.sort(key=lambda f: f["price"])
+    return {
+        "departure": departure.upper(),
+        "arrival": arrival.upper(),
+        "calendar": calendar,
+        "best_offers": offers[:best],
+    }
+
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+def encode_frame(fmt: str, frame: dict) -> str:
+    payload = json.dumps(jsonable_encoder(frame), separators=(",", ":"))
+    if fmt == "sse":
+        return f"event: {frame['type']}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+def load_stored_search_standalone(search_hash: str, max_age_seconds: int):
+    with Session(engine) as session:
+        return load_stored_search(session, search_hash, max_age_seconds)
+
+def upsert_catalogue_standalone(flights: list, passengers: int) -> list:
+    # Streaming outlives the request-scoped session, so persistence opens its own
+    with Session(engine) as session:
+        return upsert_catalogue(session, flights, passengers)
+
+def link_search_standalone(search: Search, flights: list, flight_ids: list) -> int:
+    with Session(engine) as session:
+        return link_search_results(session, search, flights, flight_ids)
+
+# search_hash -> frames of a streamed search still in flight, for identical streams to join
+stream_broadcasts: Dict[str, Broadcast] = {}
+
+def error_frame(error=None) -> dict:
+    return {"type": "error",
+            "status_code": getattr(error, "status_code", 500),
+            "detail": getattr(error, "detail", "Unable to fetch flights at this time.")}
+
+def response_frames(response: dict, cached: bool) -> list:
+    """Frames replaying a finished search response"""
+    frames = [{"type": "flight", "id": idx, "flight": flight} for idx, flight in enumerate(response["flights"])]
+    frames.append({"type": "summary", "search_id": response["search_id"], "total_count": response["total_count"],
+                   "partial": response.get("partial", False), "cached": cached})
+    return frames
+
+async def store_provider_batches(batches: asyncio.Queue, passengers: int) -> dict:
+    """
+    Upsert each provider's offers into the catalogue as they arrive, while their
+    frames are going out, until a None batch. Returns FlightRecord -> flight id.
+    """
+    flight_ids = {}
+    while True:
+        flights = await batches.get()
+        if flights is None:
+            return flight_ids
+        ids = await run_in_threadpool(upsert_catalogue_standalone, flights, passengers)
+        flight_ids.update(zip(flights, ids))
+
+async def stream_and_store(params: dict, search_hash: str, frames: Broadcast) -> dict:
+    """
+    Query every provider for one search and publish a flight frame per offer as
+    soon as its provider answers, then a summary (or error) frame. A cheaper
+    duplicate of an itinerary already sent is re-sent with the same id so the
+    client can replace it. Each provider's offers go into the catalogue in the
+    background while the stream continues, so the summary only waits for the
+    Search row and its links. Runs once per in-flight search hash, shared by
+    identical streams and /flights calls, and returns the response like
+    search_and_store.
+    """
+    writer = None
+    try:
+        providers = await run_in_threadpool(provider_registry.get_active)
+        batches: asyncio.Queue = asyncio.Queue()
+        writer = asyncio.ensure_future(store_provider_batches(batches, params["passengers"]))
+        best = {}
+        status = {}
+        errors = []
+        partial = False
+        async for outcome in iter_provider_results(
+            providers, params["departure"], params["arrival"], params["departureDate"],
+            passengers=params["passengers"], cabin=params["cabin"]
+        ):
+            status[outcome.provider.name] = outcome.as_status()
+            if outcome.status != "ok":
+                partial = True
+                if outcome.error is not None:
+                    errors.append(outcome.error)
+                continue
+            if outcome.flights:
+                batches.put_nowait(outcome.flights)
+            for flight in outcome.flights:
+                key = flight_identity(flight)
+                current = best.get(key)
+                if current is not None and not is_cheaper(flight, current[1]):
+                    continue
+                idx = current[0] if current is not None else len(best)
+                best[key] = (idx, flight)
+                frames.publish({"type": "flight", "id": idx, "flight": flight.as_dict()})
+        batches.put_nowait(None)
+
+        if not best and errors and len(errors) == len(status):
+            frame = error_frame(errors[0])
+            frames.publish(frame)
+            raise HTTPException(status_code=frame["status_code"], detail=frame["detail"])
+
+        result = AggregateResult([flight for _, flight in sorted(best.values(), key=lambda item: item[0])], partial, status)
+        try:
+            flight_ids = await writer
+            search = new_search_record(params, search_hash, result)
+            search_id = await run_in_threadpool(link_search_standalone, search, result.flights,
+                                                [flight_ids[flight] for flight in result.flights])
+        except Exception as e:
+            logger.error(f"Storing streamed search {search_hash} failed: {str(e)}")
+            frame = error_frame(HTTPException(status_code=500, detail="Unable to save flight results at this time."))
+            frames.publish(frame)
+            raise HTTPException(status_code=frame["status_code"], detail=frame["detail"])
+
+        response = build_search_response(search_id, result)
+        cache_search_response(search_hash, response)
+        frames.publish({"type": "summary", "search_id": response["search_id"],
+                        "total_count": response["total_count"], "partial": partial,
+                        "cached": False, "providers": status})
+        await match_search_alerts(params, result.flights)
+        return response
+    finally:
+        if writer is not None and not writer.done():
+            writer.cancel()
+        frames.close()
+        stream_broadcasts.pop(search_hash, None)
+
+async def stream_search_frames(params: dict, search_hash: str, fmt: str):
+    """
+    Yield the frames of one search: replayed from the cache when fresh, else
+    live from the in-flight stream_and_store for this hash (joining it if an
+    identical stream already started one). A /flights call already fetching the
+    same search is awaited and its response replayed.
+    """
+    cached = search_cache.get(search_hash)
+    if cached is None:
+        stored = await run_in_threadpool(load_stored_search_standalone, search_hash, search_cache.ttl_seconds)
+        cached = cache_stored_search(search_hash, stored)
+    if cached is not None:
+        for frame in response_frames(cached, cached=True):
+            yield encode_frame(fmt, frame)
+        return
+
+    # nothing awaits between these checks and registering a new stream
+    frames = stream_broadcasts.get(search_hash)
+    if frames is None and search_flight_group.in_flight(search_hash):
+        try:
+            response = await search_flight_group.do(search_hash, search_and_store, params, search_hash)
+        except HTTPException as error:
+            yield encode_frame(fmt, error_frame(error))
+            return
+        for frame in response_frames(response, cached=False):
+            yield encode_frame(fmt, frame)
+        return
+    if frames is None:
+        frames = stream_broadcasts[search_hash] = Broadcast()
+        search_flight_group.task(search_hash, stream_and_store, params, search_hash, frames)
+
+    finished = False
+    async for frame in frames.subscribe():
+        finished = frame["type"] in ("summary", "error")
+        yield encode_frame(fmt, frame)
+    if not finished:
+        # the shared stream stopped without a last frame (e.g. the provider registry failed)
+        yield encode_frame(fmt, error_frame())
+
+@flights_router.get("/flights/stream")
+async def stream_flights(departure: str = Query(...), arrival: str = Query(...),
+                         departureDate: str = Query(None), passengers: int = Query(1, ge=1),
+                         cabinClass: str = Query(None),
+                         format: str = Query("ndjson", pattern="^(ndjson|sse)$")):
+    """Streaming variant of GET /flights, as NDJSON lines or server-sent events"""
+    params = canonical_search_params(departure, arrival, departureDate, passengers, cabinClass)
+    search_hash = compute_search_hash(params)
+    return StreamingResponse(
+        stream_search_frames(params, search_hash, format),
+        media_type=STREAM_MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
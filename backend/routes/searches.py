@@ -0,0 +1,66 @@
+# routes/searches.py
+from datetime import datetime, time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from database import get_session
+from schemas import FlightsResponse
+from services.search_results import (
+    ResultPageQuery,
+    InvalidCursor,
+    query_search_page,
+    SORT_COLUMNS,
+    SEARCH_PAGE_MAX_LIMIT,
+)
+
+searches_router = APIRouter()
+
+SORT_PATTERN = "^(" + "|".join(SORT_COLUMNS) + ")$"
+
+
+def parse_clock(value: Optional[str], name: str) -> Optional[time]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"{name} must be HH:MM")
+
+
+def result_page_query(minPrice: float = Query(None, ge=0), maxPrice: float = Query(None, ge=0),
+                      maxStops: int = Query(None, ge=0), airline: str = Query(None, description="comma-separated carrier codes"),
+                      departAfter: str = Query(None, description="HH:MM"), departBefore: str = Query(None, description="HH:MM"),
+                      sort: str = Query("relevance", pattern=SORT_PATTERN), order: str = Query("asc", pattern="^(asc|desc)$"),
+                      limit: int = Query(None, ge=1, le=SEARCH_PAGE_MAX_LIMIT), cursor: str = Query(None)) -> ResultPageQuery:
+    """Filter/sort/paging query parameters shared by the search result endpoints"""
+    return ResultPageQuery(
+        min_price=minPrice,
+        max_price=maxPrice,
+        max_stops=maxStops,
+        airlines=airline.split(",") if airline else None,
+        depart_after=parse_clock(departAfter, "departAfter"),
+        depart_before=parse_clock(departBefore, "departBefore"),
+        sort=sort,
+        order=order,
+        limit=limit,
+        cursor=cursor,
+    )
+
+
+def load_search_page(session: Session, search_id: int, page: ResultPageQuery) -> dict:
+    try:
+        result = query_search_page(session, search_id, page)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Search not found")
+    return result
+
+
+@searches_router.get("/{search_id}/flights", response_model=FlightsResponse)
+def get_search_flights(search_id: int, page: ResultPageQuery = Depends(result_page_query),
+                       session: Session = Depends(get_session)):
+    """Page through a stored search's offers; follow next_cursor for the next page"""
+    return load_search_page(session, search_id, page)
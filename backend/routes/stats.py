@@ -0,0 +1,54 @@
+# routes/stats.py
+from fastapi import APIRouter, Depends
+from deps import get_current_admin
+from services.search_cache import search_cache
+from services.single_flight import search_flight_group
+from services.route_hints import route_hints
+from providers.amadeus_client import all_amadeus_clients
+from services.provider_governor import provider_governor
+from services.job_runner import job_runner
+from providers.registry import PROVIDER_MODE, default_provider
+import jobs
+
+# provider endpoints, token state, breaker state and process ids are operator-only
+stats_router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+@stats_router.get("/search")
+def search_stats():
+    """Counters for the flight search cache and request coalescing"""
+    return {
+        "cache": search_cache.stats(),
+        "coalescing": search_flight_group.stats(),
+    }
+
+@stats_router.get("/routes")
+def route_stats():
+    """Per-route provider query stats, including how often the direct-only call was wasted"""
+    return {"routes": route_hints.stats()}
+
+@stats_router.get("/providers")
+def provider_stats():
+    """Per-provider call budget and circuit state, plus OAuth token reuse per Amadeus client"""
+    stats = {
+        "mode": PROVIDER_MODE,
+        "governor": provider_governor.stats(),
+        "amadeus": [client.token_stats() for client in all_amadeus_clients()],
+    }
+    if PROVIDER_MODE != "live":
+        stats[PROVIDER_MODE] = default_provider.client.stats()
+    return stats
+
+@stats_router.get("/alerts")
+def alert_check_stats():
+    """Throughput, provider calls and result queue depth of the last alert check run"""
+    return {"last_run": jobs.last_check_run, "index": jobs.alert_index.stats()}
+
+@stats_router.get("/jobs")
+def job_runner_stats():
+    """Per-job runs, failures, last duration and items processed of the background job runner"""
+    return job_runner.stats()
+
+@stats_router.get("/leader")
+def scheduler_leader_status():
+    """Which process holds the scheduler lease and how long since its last heartbeat"""
+    return jobs.scheduler_leader.status()
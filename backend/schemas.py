@@ -48,6 +48,25 @@ class FlightsResponse(BaseModel):
     search_id: str
     flights: List[FlightOut]
     total_count: int
+    partial: bool = False
+    # set when the response is one page of a longer, server-sorted list
+    next_cursor: Optional[str] = None
+
+class PriceCalendarDay(BaseModel):
+    date: str
+    min_price: Optional[float]
+    currency: Optional[str]
+    flight_count: int
+    search_id: Optional[str]
+    cached: bool
+    partial: bool = False
+    error: Optional[str] = None
+
+class FlexibleSearchResponse(BaseModel):
+    departure: str
+    arrival: str
+    calendar: List[PriceCalendarDay]
+    best_offers: List[FlightOut]
 
 # --- Alerts ---
 class AlertIn(BaseModel):
@@ -68,6 +87,21 @@ class AlertOut(AlertIn):
     created_at: datetime
     last_checked_at: Optional[datetime]
 
+class PriceHistoryBucketOut(BaseModel):
+    bucket_start: datetime
+    granularity: str
+    checks: int
+    min_price: Optional[float]
+    max_price: Optional[float]
+    last_price: Optional[float]
+    last_checked_at: Optional[datetime]
+    currency: Optional[str]
+    match_count: int
+
+class AlertHistoryOut(BaseModel):
+    alert_id: int
+    buckets: List[PriceHistoryBucketOut]
+
 # --- Notification ---
 class NotificationOut(BaseModel):
     id: int
@@ -0,0 +1,136 @@
+# services/aggregator.py
+import asyncio
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from providers.base import FlightProvider
+from providers.amadeus_client import ProviderError
+from providers.offers import FlightRecord
+
+logger = logging.getLogger(__name__)
+
+AGGREGATOR_DEADLINE_SECONDS = float(os.getenv("AGGREGATOR_DEADLINE_SECONDS", "8"))
+
+
+def flight_identity(flight: FlightRecord) -> tuple:
+    """Same physical itinerary regardless of which provider sold it"""
+    if flight.legs:
+        return tuple((leg.carrier, leg.flight_number, leg.departure_time) for leg in flight.legs)
+    return (flight.airline, flight.departure_airport_code, flight.arrival_airport_code, flight.departure_time)
+
+
+def is_cheaper(flight: FlightRecord, current: FlightRecord) -> bool:
+    return flight.price is not None and (current.price is None or flight.price < current.price)
+
+
+def merge_flights(batches: List[List[FlightRecord]]) -> List[FlightRecord]:
+    """Merge provider results, keeping the cheapest offer per itinerary, in arrival order"""
+    best: Dict[tuple, FlightRecord] = {}
+    for flights in batches:
+        for flight in flights:
+            key = flight_identity(flight)
+            current = best.get(key)
+            if current is None or is_cheaper(flight, current):
+                best[key] = flight
+    return list(best.values())
+
+
+class AggregateResult:
+    __slots__ = ("flights", "partial", "providers")
+
+    def __init__(self, flights: List[FlightRecord], partial: bool, providers: Dict[str, Dict[str, Any]]):
+        self.flights = flights
+        self.partial = partial
+        # per provider: status (ok | error | timeout), count, elapsed_ms, error
+        self.providers = providers
+
+
+class ProviderOutcome:
+    __slots__ = ("provider", "flights", "error", "status", "elapsed_ms")
+
+    def __init__(self, provider: FlightProvider, status: str, elapsed_ms: int,
+                 flights: Optional[List[FlightRecord]] = None, error: Optional[BaseException] = None):
+        self.provider = provider
+        self.status = status  # ok | error | timeout
+        self.elapsed_ms = elapsed_ms
+        self.flights = flights or []
+        self.error = error
+
+    def as_status(self) -> Dict[str, Any]:
+        status = {"status": self.status, "count": len(self.flights), "elapsed_ms": self.elapsed_ms}
+        if self.error is not None:
+            status["error"] = str(self.error)
+        return status
+
+
+async def iter_provider_results(providers: List[FlightProvider], departure: str, arrival: str, departure_date: str,
+                                passengers: int = 1, cabin: Optional[str] = None,
+                                deadline: float = AGGREGATOR_DEADLINE_SECONDS) -> AsyncIterator[ProviderOutcome]:
+    """
+    Query every provider concurrently and yield each outcome as soon as that
+    provider answers. Providers still running at the deadline are cancelled and
+    yielded last with status "timeout". Closing the iterator early cancels them too.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    elapsed: Dict[FlightProvider, int] = {}
+
+    async def timed_search(provider: FlightProvider):
+        call_started = loop.time()
+        try:
+            return await provider.search_flights(departure, arrival, departure_date, passengers=passengers, cabin=cabin)
+        finally:
+            elapsed[provider] = round((loop.time() - call_started) * 1000)
+
+    tasks = {asyncio.ensure_future(timed_search(p)): p for p in providers}
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = started + deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                provider = tasks[task]
+                error = task.exception()
+                if error is not None:
+                    logger.warning(f"Provider {provider.name} failed: {error}")
+                    yield ProviderOutcome(provider, "error", elapsed.get(provider), error=error)
+                else:
+                    yield ProviderOutcome(provider, "ok", elapsed.get(provider), flights=task.result())
+    finally:
+        for task in pending:
+            task.cancel()
+    for task in pending:
+        yield ProviderOutcome(provider=tasks[task], status="timeout", elapsed_ms=round(deadline * 1000))
+
+
+async def aggregate_search(providers: List[FlightProvider], departure: str, arrival: str, departure_date: str,
+                           passengers: int = 1, cabin: Optional[str] = None,
+                           deadline: float = AGGREGATOR_DEADLINE_SECONDS) -> AggregateResult:
+    """
+    Query every provider concurrently. When the deadline hits, whatever has
+    arrived is returned and the result is marked partial; slower calls are
+    cancelled. Raises the first ProviderError only if no provider produced results.
+    """
+    status: Dict[str, Dict[str, Any]] = {}
+    batches = []
+    errors = []
+    partial = False
+    async for outcome in iter_provider_results(providers, departure, arrival, departure_date,
+                                               passengers=passengers, cabin=cabin, deadline=deadline):
+        status[outcome.provider.name] = outcome.as_status()
+        if outcome.status == "ok":
+            batches.append(outcome.flights)
+        else:
+            partial = True
+            if outcome.error is not None:
+                errors.append(outcome.error)
+
+    if not batches:
+        if errors:
+            raise errors[0]
+        raise ProviderError(504, "No flight provider answered before the deadline")
+
+    return AggregateResult(merge_flights(batches), partial, status)
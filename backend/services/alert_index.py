@@ -0,0 +1,134 @@
+# services/alert_index.py
+import logging
+import threading
+import time
+from bisect import bisect_left
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from models import Alert
+
+logger = logging.getLogger(__name__)
+
+
+def itinerary_key(departure: str, arrival: str, departure_date: date, return_date: Optional[date] = None) -> tuple:
+    return (departure.strip().upper(), arrival.strip().upper(), departure_date, return_date)
+
+
+def alert_itinerary_key(alert: Alert) -> tuple:
+    """Alerts watching the same trip share one provider query"""
+    return itinerary_key(
+        alert.departure,
+        alert.arrival,
+        alert.departure_date.date(),
+        alert.return_date.date() if alert.return_date else None,
+    )
+
+
+class AlertIndex:
+    """
+    Active alerts with a max_price, bucketed by itinerary with thresholds kept
+    sorted, so the alerts a price meets are one bisect plus the matches. Routes
+    keep it current as alerts change; load() rebuilds it from the database at
+    startup, and refresh() again once it is older than a given age, to pick up
+    changes made through other processes.
+    """
+
+    def __init__(self):
+        # itinerary -> ascending max_price list and the alert ids aligned to it
+        self._prices: Dict[tuple, List[float]] = {}
+        self._ids: Dict[tuple, List[int]] = {}
+        self._entries: Dict[int, Tuple[tuple, float]] = {}
+        self._lock = threading.Lock()
+        self._reloading = threading.Lock()
+        self.loaded_at: Optional[float] = None
+
+    def load(self, session: Session) -> int:
+        rows = session.exec(
+            select(Alert.id, Alert.departure, Alert.arrival, Alert.departure_date, Alert.return_date, Alert.max_price)
+            .where(Alert.active == True, Alert.max_price.is_not(None))
+        ).all()
+        buckets: Dict[tuple, List[Tuple[float, int]]] = {}
+        for alert_id, departure, arrival, departure_date, return_date, max_price in rows:
+            if not all([departure, arrival, departure_date]):
+                continue
+            key = itinerary_key(departure, arrival, departure_date.date(), return_date.date() if return_date else None)
+            buckets.setdefault(key, []).append((max_price, alert_id))
+        prices, ids, entries = {}, {}, {}
+        for key, bucket in buckets.items():
+            bucket.sort()
+            prices[key] = [p for p, _ in bucket]
+            ids[key] = [i for _, i in bucket]
+            entries.update((i, (key, p)) for p, i in bucket)
+        with self._lock:
+            self._prices, self._ids, self._entries = prices, ids, entries
+            self.loaded_at = time.monotonic()
+        logger.info(f"Alert index loaded: {len(entries)} alerts over {len(prices)} itineraries")
+        return len(entries)
+
+    def age(self) -> float:
+        return time.monotonic() - self.loaded_at if self.loaded_at is not None else float("inf")
+
+    def refresh(self, session: Session, max_age: float) -> bool:
+        """Reload if older than `max_age` seconds; callers arriving mid-reload use the current index"""
+        if self.age() <= max_age or not self._reloading.acquire(blocking=False):
+            return False
+        try:
+            if self.age() <= max_age:
+                return False
+            self.load(session)
+            return True
+        finally:
+            self._reloading.release()
+
+    def _remove(self, alert_id: int) -> None:
+        entry = self._entries.pop(alert_id, None)
+        if entry is None:
+            return
+        key, max_price = entry
+        prices, ids = self._prices[key], self._ids[key]
+        i = bisect_left(prices, max_price)
+        while ids[i] != alert_id:
+            i += 1
+        del prices[i], ids[i]
+        if not prices:
+            del self._prices[key], self._ids[key]
+
+    def upsert(self, alert: Alert) -> None:
+        """Index a created or edited alert (or drop it if it can no longer match)"""
+        with self._lock:
+            self._remove(alert.id)
+            if not alert.active or alert.max_price is None or not all([alert.departure, alert.arrival, alert.departure_date]):
+                return
+            key = alert_itinerary_key(alert)
+            prices = self._prices.setdefault(key, [])
+            ids = self._ids.setdefault(key, [])
+            i = bisect_left(prices, alert.max_price)
+            prices.insert(i, alert.max_price)
+            ids.insert(i, alert.id)
+            self._entries[alert.id] = (key, alert.max_price)
+
+    def remove(self, alert_id: int) -> None:
+        with self._lock:
+            self._remove(alert_id)
+
+    def match(self, key: tuple, price: float) -> List[int]:
+        """Ids of the alerts on `key` whose max_price is at or above `price`"""
+        with self._lock:
+            prices = self._prices.get(key)
+            if not prices:
+                return []
+            return self._ids[key][bisect_left(prices, price):]
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "alerts": len(self._entries),
+                "itineraries": len(self._prices),
+                "age_seconds": round(self.age(), 1) if self.loaded_at is not None else None,
+            }
+
+
+alert_index = AlertIndex()
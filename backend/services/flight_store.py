@@ -0,0 +1,227 @@
+# services/flight_store.py
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from models import Search, Flight, SearchResult, FlightLeg, FlightPriceHistory
+from providers.offers import FlightRecord
+
+logger = logging.getLogger(__name__)
+
+# bound IN (...) lists well below SQLite's host-parameter limit
+CATALOGUE_LOOKUP_CHUNK = 500
+
+
+def itinerary_key(result: FlightRecord, passengers: int = 1) -> str:
+    """
+    Catalogue identity: provider, cabin and passenger count plus carrier, flight
+    number and departure of every leg. Prices are totals for the whole party, so
+    the same itinerary searched for a different party size is a separate row.
+    """
+    if result.legs:
+        parts = [f"{leg.carrier}{leg.flight_number}@{leg.departure_time}" for leg in result.legs]
+    else:
+        parts = [f"{result.airline}:{result.departure_airport_code}-{result.arrival_airport_code}"
+                 f"@{result.departure_time}"]
+    identity = f"{result.provider_name}|{result.cabin_class or 'economy'}|{passengers}|" + ",".join(parts)
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+
+def _load_catalogue(session: Session, keys: List[str]) -> Dict[str, Tuple[int, Any]]:
+    """itinerary_key -> (flight_id, price) for keys already in the catalogue"""
+    known: Dict[str, Tuple[int, Any]] = {}
+    for i in range(0, len(keys), CATALOGUE_LOOKUP_CHUNK):
+        chunk = keys[i:i + CATALOGUE_LOOKUP_CHUNK]
+        rows = session.execute(
+            select(Flight.itinerary_key, Flight.id, Flight.price).where(Flight.itinerary_key.in_(chunk))
+        ).all()
+        for key, flight_id, price in rows:
+            known[key] = (flight_id, price)
+    return known
+
+
+def _upsert_flights(session: Session, results: List[FlightRecord], search_id: Optional[int], now: datetime,
+                    passengers: int = 1) -> List[int]:
+    """
+    Insert itineraries not seen before (with their legs) and refresh price and
+    last_seen_at on the ones that are. Price history only gets a row when the
+    itinerary is new or its price moved. Returns flight ids aligned to `results`.
+    """
+    keys = [itinerary_key(r, passengers) for r in results]
+    known = _load_catalogue(session, list(set(keys)))
+
+    new_rows = []
+    new_results = []
+    seen_new = set()
+    for key, r in zip(keys, results):
+        if key in known or key in seen_new:
+            continue
+        seen_new.add(key)
+        new_results.append((key, r))
+        new_rows.append({
+            "provider_flight_id": r.provider_flight_id,
+            "provider_name": r.provider_name,
+            "airline": r.airline,
+            "departure_airport_code": r.departure_airport_code,
+            "arrival_airport_code": r.arrival_airport_code,
+            "departure_time": r.departure_time,
+            "arrival_time": r.arrival_time,
+            "duration_minutes": r.duration_minutes,
+            "price": r.price,
+            "currency": r.currency,
+            "stops": r.stops,
+            "cabin_class": r.cabin_class or "economy",
+            "passengers": passengers,
+            "created_at": now,
+            "last_seen_at": now,
+            "cached": True,
+            "itinerary_key": key,
+            "search_id": search_id,
+        })
+
+    leg_rows = []
+    history_rows = []
+    if new_rows:
+        new_ids = list(session.scalars(
+            insert(Flight).returning(Flight.id, sort_by_parameter_order=True),
+            new_rows,
+        ))
+        for flight_id, (key, r) in zip(new_ids, new_results):
+            known[key] = (flight_id, r.price)
+            for leg in r.legs:
+                leg_rows.append({
+                    "flight_id": flight_id,
+                    "leg_number": leg.leg_number,
+                    "departure_airport": leg.departure_airport,
+                    "arrival_airport": leg.arrival_airport,
+                    "departure_time": leg.departure_time,
+                    "arrival_time": leg.arrival_time,
+                    "duration_minutes": leg.duration_minutes,
+                    "carrier": leg.carrier,
+                    "flight_number": leg.flight_number,
+                })
+            if r.price is not None:
+                history_rows.append({"flight_id": flight_id, "price": r.price,
+                                     "currency": r.currency, "recorded_at": now})
+
+    updates = {}
+    for key, r in zip(keys, results):
+        if key in seen_new:
+            continue
+        flight_id, old_price = known[key]
+        updates[flight_id] = {"id": flight_id, "price": r.price, "currency": r.currency,
+                              "last_seen_at": now, "cached": True}
+        if r.price is not None and r.price != old_price:
+            history_rows.append({"flight_id": flight_id, "price": r.price,
+                                 "currency": r.currency, "recorded_at": now})
+            known[key] = (flight_id, r.price)
+    if updates:
+        # bulk UPDATE .. WHERE id = :id, one executemany
+        session.execute(update(Flight), list(updates.values()))
+    if leg_rows:
+        session.execute(insert(FlightLeg), leg_rows)
+    if history_rows:
+        session.execute(insert(FlightPriceHistory), history_rows)
+    return [known[key][0] for key in keys]
+
+
+def _insert_search_rows(session: Session, search: Search, results: List[FlightRecord], now: datetime) -> Tuple[int, List[int]]:
+    """Insert one Search, upsert its itineraries and link them, inside the caller's transaction"""
+    session.add(search)
+    session.flush()
+    search_id = search.id
+
+    flight_ids: List[int] = []
+    if not results:
+        return search_id, flight_ids
+
+    passengers = (search.params or {}).get("passengers", 1)
+    flight_ids = _upsert_flights(session, results, search_id, now, passengers)
+    _insert_links(session, search_id, results, flight_ids)
+    return search_id, flight_ids
+
+
+def _insert_links(session: Session, search_id: int, results: List[FlightRecord], flight_ids: List[int]) -> None:
+    session.execute(insert(SearchResult), [{
+        "search_id": search_id,
+        "flight_id": flight_id,
+        "position": position,
+        "price": r.price,
+        "currency": r.currency,
+        "airline": r.airline,
+        "stops": r.stops,
+        "departure_time": r.departure_time,
+        "duration_minutes": r.duration_minutes,
+    } for position, (flight_id, r) in enumerate(zip(flight_ids, results))])
+
+
+def persist_search_results(session: Session, search: Search, results: List[FlightRecord]) -> Tuple[int, List[int]]:
+    """
+    Write the Search, upsert its itineraries into the Flight catalogue and link
+    them through SearchResult, all in a single transaction. New Flight ids come
+    back from INSERT .. RETURNING in parameter order, so no per-row refresh is needed.
+    Returns (search_id, flight_ids) with flight_ids aligned to `results`.
+    """
+    return persist_search_batch(session, [(search, results)])[0]
+
+
+def persist_search_batch(session: Session, batch: List[Tuple[Search, List[FlightRecord]]]) -> List[Tuple[int, List[int]]]:
+    """Persist several searches (e.g. one per date) in one transaction"""
+    now = datetime.utcnow()
+    for attempt in (1, 2):
+        try:
+            written = [_insert_search_rows(session, search, results, now) for search, results in batch]
+            session.commit()
+            return written
+        except IntegrityError:
+            # another writer inserted one of our itineraries first; its row is visible now
+            session.rollback()
+            if attempt == 2:
+                raise
+            logger.info("Flight catalogue insert raced another writer; retrying")
+            for search, _ in batch:
+                search.id = None
+        except Exception:
+            session.rollback()
+            raise
+
+
+def upsert_catalogue(session: Session, results: List[FlightRecord], passengers: int = 1) -> List[int]:
+    """
+    Upsert itineraries into the Flight catalogue ahead of their Search, in a
+    transaction of their own (e.g. one provider's offers while a stream is still
+    open). Returns flight ids aligned to `results`, for link_search_results.
+    """
+    now = datetime.utcnow()
+    for attempt in (1, 2):
+        try:
+            flight_ids = _upsert_flights(session, results, None, now, passengers)
+            session.commit()
+            return flight_ids
+        except IntegrityError:
+            session.rollback()
+            if attempt == 2:
+                raise
+            logger.info("Flight catalogue insert raced another writer; retrying")
+        except Exception:
+            session.rollback()
+            raise
+
+
+def link_search_results(session: Session, search: Search, results: List[FlightRecord], flight_ids: List[int]) -> int:
+    """Write a Search and its SearchResult links to flights upsert_catalogue already stored"""
+    try:
+        session.add(search)
+        session.flush()
+        if results:
+            _insert_links(session, search.id, results, flight_ids)
+        session.commit()
+        return search.id
+    except Exception:
+        session.rollback()
+        raise
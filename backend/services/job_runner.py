@@ -0,0 +1,159 @@
+# services/job_runner.py
+import asyncio
+import logging
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class JobStats:
+    """Run counters for one named job"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.runs = 0
+        self.failures = 0
+        self.running = False
+        self.last_started_at: Optional[datetime] = None
+        self.last_duration_seconds: Optional[float] = None
+        self.last_items: Optional[int] = None
+        self.last_failed_items: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "running": self.running,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_duration_seconds": self.last_duration_seconds,
+            "last_items": self.last_items,
+            "last_failed_items": self.last_failed_items,
+            "last_error": self.last_error,
+        }
+
+
+class JobRunner:
+    """
+    One long-lived event loop, on its own daemon thread, for background jobs.
+    An AsyncIOScheduler on that loop decides when they run, so everything bound
+    to the loop (provider connection pools, access tokens, in-process caches)
+    stays warm from one run to the next. stop() cancels what is running, runs
+    the registered shutdown hooks on the loop and joins the thread.
+    """
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.scheduler: Optional[AsyncIOScheduler] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stats: Dict[str, JobStats] = {}
+        self._on_stop: List[Callable[[], Awaitable[None]]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> AsyncIOScheduler:
+        if self.running:
+            return self.scheduler
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            self.scheduler = AsyncIOScheduler(event_loop=loop)
+            self.scheduler.start()
+            ready.set()
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.close()
+
+        self.loop = loop
+        self._thread = threading.Thread(target=run, name="job-runner", daemon=True)
+        self._thread.start()
+        ready.wait()
+        logger.info("Job runner started")
+        return self.scheduler
+
+    def on_stop(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Coroutine function to await on the runner loop at shutdown (e.g. closing pools)"""
+        if hook not in self._on_stop:
+            self._on_stop.append(hook)
+
+    def track(self, name: str, fn: Callable[[], Awaitable[Any]],
+              items: Optional[Callable[[Any], Tuple[int, int]]] = None) -> Callable[[], Awaitable[Any]]:
+        """
+        Wrap a job so each run records its duration and outcome under `name`.
+        `items` maps the job's return value to (items processed, items failed).
+        """
+        with self._lock:
+            stats = self._stats.setdefault(name, JobStats(name))
+
+        async def run():
+            stats.running = True
+            stats.last_started_at = datetime.utcnow()
+            started = time.perf_counter()
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                stats.last_error = "cancelled"
+                raise
+            except Exception as e:
+                stats.failures += 1
+                stats.last_error = str(e)
+                logger.error(f"Job {name} failed: {str(e)}")
+                traceback.print_exc()
+                return None
+            else:
+                stats.last_error = None
+                if items is not None and result is not None:
+                    stats.last_items, stats.last_failed_items = items(result)
+                return result
+            finally:
+                stats.runs += 1
+                stats.running = False
+                stats.last_duration_seconds = round(time.perf_counter() - started, 3)
+
+        return run
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self._stats.values())
+        return {"running": self.running, "jobs": {job.name: job.as_dict() for job in jobs}}
+
+    async def _shutdown(self) -> None:
+        self.scheduler.shutdown(wait=False)
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for hook in self._on_stop:
+            try:
+                await hook()
+            except Exception as e:
+                logger.error(f"Job runner shutdown hook failed: {str(e)}")
+
+    def stop(self, timeout: float = 30) -> None:
+        if not self.running:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout)
+        except Exception as e:
+            logger.error(f"Job runner did not shut down cleanly: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info("Job runner stopped")
+
+
+job_runner = JobRunner()
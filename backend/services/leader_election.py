@@ -0,0 +1,169 @@
+# services/leader_election.py
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import case, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from database import engine
+from models import LeaderLease
+
+logger = logging.getLogger(__name__)
+
+# A leader that stops heartbeating loses the lease after LEADER_LEASE_SECONDS;
+# another process takes over at its next heartbeat, so failover takes at most
+# LEADER_LEASE_SECONDS + LEADER_HEARTBEAT_SECONDS
+LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", "30"))
+LEADER_HEARTBEAT_SECONDS = float(os.getenv("LEADER_HEARTBEAT_SECONDS", "10"))
+
+
+class LeaderElection:
+    """
+    Picks one process for a singleton role through a lease row in the database.
+    Every candidate heartbeats with a conditional UPDATE that only succeeds for
+    the current holder or once the lease has expired, so at most one process
+    holds it at a time; the holder renews it on every beat.
+    """
+
+    def __init__(self, name: str, candidate_id: str, lease_seconds: float = LEADER_LEASE_SECONDS,
+                 heartbeat_seconds: float = LEADER_HEARTBEAT_SECONDS):
+        self.name = name
+        self.candidate_id = candidate_id
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.is_leader = False
+        self.terms = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def _ensure_row(self, session: Session) -> None:
+        if session.get(LeaderLease, self.name) is not None:
+            return
+        try:
+            session.execute(insert(LeaderLease).values(name=self.name))
+            session.commit()
+        except IntegrityError:
+            # another candidate created it first
+            session.rollback()
+
+    def heartbeat(self) -> bool:
+        """Acquire or renew the lease; returns whether this process now holds it"""
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            self._ensure_row(session)
+            held = LeaderLease.holder == self.candidate_id
+            result = session.execute(
+                update(LeaderLease)
+                .where(LeaderLease.name == self.name,
+                       or_(held, LeaderLease.holder.is_(None), LeaderLease.expires_at < now))
+                .values(
+                    holder=self.candidate_id,
+                    heartbeat_at=now,
+                    expires_at=now + timedelta(seconds=self.lease_seconds),
+                    # a renewal keeps its original term start
+                    acquired_at=case((held, LeaderLease.acquired_at), else_=now),
+                )
+            )
+            session.commit()
+        return result.rowcount == 1
+
+    def release(self) -> None:
+        """Give the lease up so another process can take over without waiting for expiry"""
+        with Session(engine) as session:
+            session.execute(
+                update(LeaderLease)
+                .where(LeaderLease.name == self.name, LeaderLease.holder == self.candidate_id)
+                .values(holder=None, expires_at=datetime.utcnow())
+            )
+            session.commit()
+        self.is_leader = False
+
+    def start(self, on_elected: Callable[[], None], on_deposed: Callable[[], None],
+              on_renewed: Optional[Callable[[], None]] = None) -> None:
+        """
+        Heartbeat on a daemon thread of its own, so the lease does not depend on
+        an event loop that synchronous work (a DB write, an SMTP stall) can hold
+        up for longer than the lease. The callbacks run on that thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self.run, args=(on_elected, on_deposed, on_renewed),
+            name=f"{self.name}-leader-election", daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 30) -> None:
+        """Stop heartbeating; a held lease is released so another process takes over at once"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _callback(self, fn: Optional[Callable[[], None]]) -> None:
+        if fn is None:
+            return
+        try:
+            fn()
+        except Exception as e:
+            logger.error(f"{self.name} leadership callback failed: {str(e)}")
+
+    def run(self, on_elected: Callable[[], None], on_deposed: Callable[[], None],
+            on_renewed: Optional[Callable[[], None]] = None) -> None:
+        """
+        Heartbeat until stop(), calling on_elected/on_deposed as leadership
+        changes and on_renewed on every later beat that keeps it. A failed
+        heartbeat counts as lost leadership: the lease cannot be renewed, so
+        another process may already have it. Stopping releases the lease.
+        """
+        try:
+            while not self._stopping.is_set():
+                try:
+                    leader = self.heartbeat()
+                except Exception as e:
+                    logger.error(f"Leader heartbeat for {self.name} failed: {str(e)}")
+                    leader = False
+                if leader and not self.is_leader:
+                    self.is_leader = True
+                    self.terms += 1
+                    logger.info(f"{self.candidate_id} is now the {self.name} leader")
+                    self._callback(on_elected)
+                elif not leader and self.is_leader:
+                    self.is_leader = False
+                    logger.warning(f"{self.candidate_id} lost the {self.name} lease")
+                    self._callback(on_deposed)
+                elif leader:
+                    self._callback(on_renewed)
+                self._stopping.wait(self.heartbeat_seconds)
+        finally:
+            if self.is_leader:
+                self._callback(on_deposed)
+                try:
+                    self.release()
+                except Exception as e:
+                    logger.error(f"Releasing the {self.name} lease failed: {str(e)}")
+
+    def status(self) -> Dict[str, Any]:
+        """The lease as recorded in the database, seen from this process"""
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            lease = session.get(LeaderLease, self.name)
+        held = lease is not None and lease.holder is not None
+        return {
+            "name": self.name,
+            "leader": lease.holder if held else None,
+            # an expired lease means the leader stopped heartbeating and failover is due
+            "expired": held and (lease.expires_at is None or lease.expires_at <= now),
+            "acquired_at": lease.acquired_at.isoformat() if held and lease.acquired_at else None,
+            "heartbeat_at": lease.heartbeat_at.isoformat() if held and lease.heartbeat_at else None,
+            "heartbeat_age_seconds": round((now - lease.heartbeat_at).total_seconds(), 1) if held and lease.heartbeat_at else None,
+            "lease_seconds": self.lease_seconds,
+            "heartbeat_seconds": self.heartbeat_seconds,
+            "this_process": self.candidate_id,
+            "is_leader": self.is_leader,
+        }
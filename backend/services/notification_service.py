@@ -1,3 +1,4 @@
+import asyncio
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -8,11 +9,14 @@ from fastapi import HTTPException
 import firebase_admin
 from firebase_admin import credentials, messaging
 import json
+import threading
 from models import Notification
 import logging
 
 logger = logging.getLogger(__name__)
 
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+
 # Initialize Firebase Admin SDK (non-fatal)
 _FIREBASE_AVAILABLE = False
 try:
@@ -43,7 +47,7 @@ class NotificationService:
         self.smtp_server: str = os.getenv("SMTP_SERVER", "smtp.gmail.com")
         self.smtp_port: int = int(os.getenv("SMTP_PORT", "587"))
         self.push_notification_key: str = os.getenv("PUSH_NOTIFICATION_KEY", "")
-            if not self.push_notification_key:
+        if not self.push_notification_key:
                 logger.warning("PUSH_NOTIFICATION_KEY not set; push notifications disabled until configured")
         
         # Rate limiting settings
@@ -55,6 +59,10 @@ class NotificationService:
         self.email_count = 0
         self.push_count = 0
         self.last_reset = datetime.utcnow()
+
+        # One SMTP session reused across sends (and alert check runs), opened on first use
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_lock = threading.Lock()
     
     def _check_rate_limits(self) -> None:
         """Check and reset rate limits if needed"""
@@ -66,6 +74,36 @@ class NotificationService:
             self.push_count = 0
             self.last_reset = now
 
+    def _smtp_connection(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=SMTP_TIMEOUT_SECONDS)
+            server.starttls()
+            server.login(self.email_sender, self.email_password)
+            self._smtp = server
+        return self._smtp
+
+    def _send_smtp(self, message: MIMEMultipart) -> None:
+        """Send over the kept-open SMTP session, reconnecting once if the server dropped it"""
+        with self._smtp_lock:
+            try:
+                self._smtp_connection().send_message(message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self._discard_smtp()
+                self._smtp_connection().send_message(message)
+
+    def _discard_smtp(self) -> None:
+        server, self._smtp = self._smtp, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+    def close(self) -> None:
+        """Log out of the SMTP session kept between sends"""
+        with self._smtp_lock:
+            self._discard_smtp()
+
     async def send_email_notification(self, recipient: str, subject: str, body: str) -> bool:
         try:
             # Check if email is configured
@@ -90,10 +128,8 @@ class NotificationService:
             
             message.attach(MIMEText(body, "html"))
             
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.email_sender, self.email_password)
-                server.send_message(message)
+            # smtplib blocks (up to SMTP_TIMEOUT_SECONDS); keep it off the event loop
+            await asyncio.to_thread(self._send_smtp, message)
             
             self.email_count += 1
             logger.info(f"Email sent successfully to {recipient}")
@@ -129,10 +165,10 @@ class NotificationService:
             )
 
             # Send message
-            response = messaging.send(push_message)
-                self.push_count += 1
+            response = await asyncio.to_thread(messaging.send, push_message)
+            self.push_count += 1
             logger.info(f"Successfully sent push notification: {response}")
-                return True
+            return True
                 
         except NotificationError as ne:
             logger.error(f"Notification error: {str(ne)}")
@@ -0,0 +1,169 @@
+# services/price_check_rollups.py
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import delete, insert, update
+from sqlmodel import Session, select
+
+from database import engine
+from models import PriceCheckJobLog, PriceCheckRollup
+
+logger = logging.getLogger(__name__)
+
+# Raw check logs older than this are folded into rollups and deleted
+PRICE_LOG_RETENTION_DAYS = int(os.getenv("PRICE_LOG_RETENTION_DAYS", "7"))
+PRICE_LOG_ROLLUP_GRANULARITY = os.getenv("PRICE_LOG_ROLLUP_GRANULARITY", "day")
+# Raw rows compacted per transaction; each chunk is a short write, then the job yields
+PRICE_LOG_COMPACTION_CHUNK = int(os.getenv("PRICE_LOG_COMPACTION_CHUNK", "2000"))
+PRICE_LOG_COMPACTION_PAUSE_SECONDS = float(os.getenv("PRICE_LOG_COMPACTION_PAUSE_SECONDS", "0.05"))
+
+GRANULARITIES = ("hour", "day")
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_logs(rows: Iterable[tuple], granularity: str) -> Dict[Tuple[int, datetime], Dict[str, Any]]:
+    """
+    Fold (alert_id, ran_at, checked_price, currency, matched) rows into one
+    rollup per alert and bucket. Rows without an alert or a price are dropped.
+    """
+    buckets: Dict[Tuple[int, datetime], Dict[str, Any]] = {}
+    for alert_id, ran_at, price, currency, matched in rows:
+        if alert_id is None or price is None:
+            continue
+        key = (alert_id, bucket_start(ran_at, granularity))
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = {
+                "alert_id": alert_id, "granularity": granularity, "bucket_start": key[1], "checks": 1,
+                "min_price": price, "max_price": price, "last_price": price, "last_checked_at": ran_at,
+                "currency": currency, "match_count": int(bool(matched)),
+            }
+            continue
+        merge_bucket(bucket, {"checks": 1, "min_price": price, "max_price": price, "last_price": price,
+                              "last_checked_at": ran_at, "currency": currency, "match_count": int(bool(matched))})
+    return buckets
+
+
+def merge_bucket(into: Dict[str, Any], other: Dict[str, Any]) -> None:
+    into["checks"] += other["checks"]
+    into["match_count"] += other["match_count"]
+    into["min_price"] = min(p for p in (into["min_price"], other["min_price"]) if p is not None)
+    into["max_price"] = max(p for p in (into["max_price"], other["max_price"]) if p is not None)
+    if other["last_checked_at"] >= into["last_checked_at"]:
+        into["last_price"] = other["last_price"]
+        into["last_checked_at"] = other["last_checked_at"]
+        into["currency"] = other["currency"]
+
+
+def _rollup_dict(rollup: PriceCheckRollup) -> Dict[str, Any]:
+    return {
+        "alert_id": rollup.alert_id, "granularity": rollup.granularity, "bucket_start": rollup.bucket_start,
+        "checks": rollup.checks, "min_price": rollup.min_price, "max_price": rollup.max_price,
+        "last_price": rollup.last_price, "last_checked_at": rollup.last_checked_at,
+        "currency": rollup.currency, "match_count": rollup.match_count,
+    }
+
+
+def _store_rollups(session: Session, buckets: Dict[Tuple[int, datetime], Dict[str, Any]], granularity: str) -> int:
+    """Insert new buckets and merge into ones an earlier chunk or run already wrote"""
+    alert_ids = {alert_id for alert_id, _ in buckets}
+    starts = [start for _, start in buckets]
+    existing = session.exec(
+        select(PriceCheckRollup).where(
+            PriceCheckRollup.alert_id.in_(alert_ids),
+            PriceCheckRollup.granularity == granularity,
+            PriceCheckRollup.bucket_start >= min(starts),
+            PriceCheckRollup.bucket_start <= max(starts),
+        )
+    ).all()
+    updates = []
+    for rollup in existing:
+        bucket = buckets.pop((rollup.alert_id, rollup.bucket_start), None)
+        if bucket is None:
+            continue
+        merged = _rollup_dict(rollup)
+        merge_bucket(merged, bucket)
+        merged["id"] = rollup.id
+        updates.append(merged)
+    if updates:
+        session.execute(update(PriceCheckRollup), updates)
+    if buckets:
+        session.execute(insert(PriceCheckRollup), list(buckets.values()))
+    return len(updates) + len(buckets)
+
+
+async def compact_price_check_logs(retention_days: int = PRICE_LOG_RETENTION_DAYS,
+                                   granularity: str = PRICE_LOG_ROLLUP_GRANULARITY,
+                                   chunk_size: int = PRICE_LOG_COMPACTION_CHUNK) -> Dict[str, Any]:
+    """
+    Fold raw PriceCheckJobLog rows older than `retention_days` into per-alert
+    rollups and delete them, oldest first, `chunk_size` rows per transaction.
+    The cutoff is aligned to a bucket boundary, so a bucket is either entirely
+    rolled up or entirely raw. Each chunk deletes its raw rows before writing
+    their rollups; if another compactor already took some of them the chunk is
+    rolled back, so no row is ever counted twice. Returns the run's counters.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown rollup granularity {granularity!r}")
+    cutoff = bucket_start(datetime.utcnow() - timedelta(days=retention_days), granularity)
+    stats = {"cutoff": cutoff.isoformat(), "granularity": granularity, "rows_compacted": 0,
+             "rollups_written": 0, "chunks": 0}
+    while True:
+        with Session(engine) as session:
+            rows = session.exec(
+                select(PriceCheckJobLog.id, PriceCheckJobLog.alert_id, PriceCheckJobLog.ran_at,
+                       PriceCheckJobLog.checked_price, PriceCheckJobLog.currency, PriceCheckJobLog.matched)
+                .where(PriceCheckJobLog.ran_at < cutoff)
+                .order_by(PriceCheckJobLog.ran_at, PriceCheckJobLog.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            ids = [row[0] for row in rows]
+            deleted = session.execute(delete(PriceCheckJobLog).where(PriceCheckJobLog.id.in_(ids))).rowcount
+            if deleted != len(ids):
+                session.rollback()
+                logger.warning("Price check logs are being compacted elsewhere; stopping this run")
+                break
+            buckets = rollup_logs((row[1:] for row in rows), granularity)
+            written = _store_rollups(session, buckets, granularity) if buckets else 0
+            session.commit()
+        stats["rows_compacted"] += len(ids)
+        stats["rollups_written"] += written
+        stats["chunks"] += 1
+        # let checks and heartbeats sharing the loop (and other DB writers) in between chunks
+        await asyncio.sleep(PRICE_LOG_COMPACTION_PAUSE_SECONDS)
+    logger.info(
+        f"[jobs] Compacted {stats['rows_compacted']} price check logs older than {stats['cutoff']} "
+        f"into {stats['rollups_written']} {granularity} rollups"
+    )
+    return stats
+
+
+def alert_price_history(session: Session, alert_id: int, since: datetime,
+                        granularity: str = PRICE_LOG_ROLLUP_GRANULARITY) -> List[Dict[str, Any]]:
+    """
+    Price history buckets for one alert since `since`: compacted rollups, plus
+    the raw logs still inside the retention window folded the same way on read.
+    """
+    rollups = session.exec(
+        select(PriceCheckRollup)
+        .where(PriceCheckRollup.alert_id == alert_id, PriceCheckRollup.bucket_start >= bucket_start(since, granularity))
+        .order_by(PriceCheckRollup.bucket_start)
+    ).all()
+    recent = session.exec(
+        select(PriceCheckJobLog.alert_id, PriceCheckJobLog.ran_at, PriceCheckJobLog.checked_price,
+               PriceCheckJobLog.currency, PriceCheckJobLog.matched)
+        .where(PriceCheckJobLog.alert_id == alert_id, PriceCheckJobLog.ran_at >= since)
+    ).all()
+    buckets = [_rollup_dict(r) for r in rollups] + list(rollup_logs(recent, granularity).values())
+    buckets.sort(key=lambda b: b["bucket_start"])
+    return buckets
@@ -0,0 +1,275 @@
+# services/provider_governor.py
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from providers.amadeus_client import ProviderError
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_RATE_PER_SECOND = float(os.getenv("PROVIDER_RATE_PER_SECOND", "10"))
+PROVIDER_BURST = float(os.getenv("PROVIDER_BURST", "20"))
+# Share of the bucket background work may not dip into, kept for interactive searches
+PROVIDER_BACKGROUND_RESERVE = float(os.getenv("PROVIDER_BACKGROUND_RESERVE", "0.3"))
+PROVIDER_INTERACTIVE_MAX_WAIT_SECONDS = float(os.getenv("PROVIDER_INTERACTIVE_MAX_WAIT_SECONDS", "1"))
+PROVIDER_BACKGROUND_MAX_WAIT_SECONDS = float(os.getenv("PROVIDER_BACKGROUND_MAX_WAIT_SECONDS", "60"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+CIRCUIT_HALF_OPEN_PROBES = int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "1"))
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Callers mark background work (alert checks) with background_priority(); searches are interactive
+provider_priority: contextvars.ContextVar[str] = contextvars.ContextVar("provider_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_priority():
+    token = provider_priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        provider_priority.reset(token)
+
+
+class RateLimited(ProviderError):
+    """Raised by the governor itself when a call's budget wait would be too long"""
+
+    def __init__(self, provider: str):
+        super().__init__(429, f"{provider}: provider call budget exhausted")
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Errors that say the provider is unhealthy, as opposed to a bad request"""
+    if isinstance(error, RateLimited):
+        return False
+    if isinstance(error, ProviderError):
+        return error.status_code >= 500 or error.status_code == 429
+    return isinstance(error, (asyncio.TimeoutError, ConnectionError))
+
+
+class TokenBucket:
+    """Thread-safe token bucket; background takers must leave `reserve` tokens behind"""
+
+    def __init__(self, rate: float, capacity: float, background_reserve: float = PROVIDER_BACKGROUND_RESERVE):
+        self.rate = rate
+        self.capacity = capacity
+        self.reserve = capacity * background_reserve
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self, cost: float, priority: str) -> float:
+        """Take `cost` tokens and return 0, or return seconds until they would be available"""
+        floor = self.reserve if priority == BACKGROUND else 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens - cost >= floor:
+                self._tokens -= cost
+                return 0.0
+            return (cost + floor - self._tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; open fast-fails
+    for `open_seconds`, then half_open lets `half_open_probes` calls through.
+    A probe success closes the circuit, a probe failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, open_seconds: float = CIRCUIT_OPEN_SECONDS,
+                 half_open_probes: int = CIRCUIT_HALF_OPEN_PROBES):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    return False
+                self.state = "half_open"
+                self.probes_in_flight = 0
+            if self.state == "half_open":
+                if self.probes_in_flight >= self.half_open_probes:
+                    return False
+                self.probes_in_flight += 1
+            return True
+
+    def _open(self) -> None:
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == "half_open":
+                self.state = "closed"
+                self.probes_in_flight = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Circuit opened after {self.consecutive_failures} consecutive provider failures")
+                self._open()
+
+    def release_probe(self) -> None:
+        """A probe that ended without a verdict (e.g. cancelled at the aggregation deadline)"""
+        with self._lock:
+            if self.state == "half_open" and self.probes_in_flight > 0:
+                self.probes_in_flight -= 1
+
+    def retry_after(self) -> float:
+        with self._lock:
+            return max(0.0, self.open_seconds - (time.monotonic() - self.opened_at)) if self.state == "open" else 0.0
+
+
+class ProviderGate:
+    """Bucket, breaker and counters for one provider"""
+
+    def __init__(self, name: str, rate: float, burst: float):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker()
+        self.counters: Dict[str, int] = {
+            "admitted_interactive": 0,
+            "admitted_background": 0,
+            "throttled": 0,
+            "rejected_rate_limit": 0,
+            "rejected_circuit_open": 0,
+            "successes": 0,
+            "failures": 0,
+            "cancelled": 0,
+        }
+        self._lock = threading.Lock()
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "circuit": self.breaker.state,
+            "circuit_times_opened": self.breaker.times_opened,
+            "circuit_retry_after_seconds": round(self.breaker.retry_after(), 1),
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "tokens_available": round(self.bucket.available(), 2),
+            "rate_per_second": self.bucket.rate,
+            "burst": self.bucket.capacity,
+        }
+
+
+class ProviderGovernor:
+    """
+    The one admission point for provider calls, shared by searches and alert
+    checks across threads and event loops. Every call takes tokens from its
+    provider's bucket (background calls cannot drain the reserve kept for
+    interactive ones) and passes its circuit breaker, which fast-fails while
+    the provider is unhealthy.
+    """
+
+    def __init__(self):
+        self._gates: Dict[str, ProviderGate] = {}
+        self._lock = threading.Lock()
+
+    def gate(self, name: str, meta: Optional[Dict[str, Any]] = None) -> ProviderGate:
+        with self._lock:
+            gate = self._gates.get(name)
+            if gate is None:
+                meta = meta or {}
+                gate = self._gates[name] = ProviderGate(
+                    name,
+                    rate=float(meta.get("rate_per_second", PROVIDER_RATE_PER_SECOND)),
+                    burst=float(meta.get("burst", PROVIDER_BURST)),
+                )
+            return gate
+
+    async def _admit(self, gate: ProviderGate, cost: float, priority: str, counted: bool = True) -> None:
+        max_wait = PROVIDER_BACKGROUND_MAX_WAIT_SECONDS if priority == BACKGROUND else PROVIDER_INTERACTIVE_MAX_WAIT_SECONDS
+        deadline = time.monotonic() + max_wait
+        throttled = False
+        while True:
+            wait = gate.bucket.try_take(cost, priority)
+            if wait == 0:
+                if counted:
+                    gate.count("admitted_background" if priority == BACKGROUND else "admitted_interactive")
+                return
+            if not throttled:
+                gate.count("throttled")
+                throttled = True
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                gate.count("rejected_rate_limit")
+                raise RateLimited(gate.name)
+            await asyncio.sleep(wait)
+
+    async def call(self, name: str, fn: Callable[..., Awaitable[Any]], *args, cost: float = 1,
+                   meta: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+        gate = self.gate(name, meta)
+        # fast-fail first: an open circuit should not cost tokens or waiting
+        if not gate.breaker.allow():
+            gate.count("rejected_circuit_open")
+            raise ProviderError(503, f"{name} is unavailable (circuit open, retry in {gate.breaker.retry_after():.0f}s)")
+        try:
+            await self._admit(gate, cost, provider_priority.get())
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            gate.count("cancelled")
+            gate.breaker.release_probe()
+            raise
+        except BaseException as e:
+            if is_provider_failure(e):
+                gate.count("failures")
+                gate.breaker.record_failure()
+            elif isinstance(e, RateLimited):
+                gate.breaker.release_probe()
+            else:
+                # the provider answered (e.g. 400 for a bad route); it is healthy
+                gate.breaker.record_success()
+            raise
+        gate.count("successes")
+        gate.breaker.record_success()
+        return result
+
+    async def charge(self, name: str, cost: float = 1, meta: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Take more tokens from inside a call(), for adapters that only learn how
+        many upstream requests a call needs while making it. Waits and rejects
+        like admission does, at the calling context's priority.
+        """
+        await self._admit(self.gate(name, meta), cost, provider_priority.get(), counted=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            gates = list(self._gates.values())
+        return {gate.name: gate.stats() for gate in gates}
+
+
+provider_governor = ProviderGovernor()
@@ -0,0 +1,96 @@
+# services/route_hints.py
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Observations needed before a route's hint is trusted
+ROUTE_HINT_MIN_SAMPLES = int(os.getenv("ROUTE_HINT_MIN_SAMPLES", "3"))
+# Even when a query is being skipped, re-issue it every Nth search to catch schedule changes
+ROUTE_HINT_REPROBE_EVERY = int(os.getenv("ROUTE_HINT_REPROBE_EVERY", "20"))
+
+
+class RouteStats:
+    __slots__ = (
+        "searches", "direct_calls", "direct_wasted", "direct_offers",
+        "connecting_calls", "connecting_wasted", "direct_skipped", "connecting_skipped",
+        "last_seen_at",
+    )
+
+    def __init__(self):
+        self.searches = 0
+        self.direct_calls = 0
+        self.direct_wasted = 0       # nonStop call returned nothing (or failed)
+        self.direct_offers = 0
+        self.connecting_calls = 0
+        self.connecting_wasted = 0   # unfiltered call added no itinerary beyond the direct ones
+        self.direct_skipped = 0
+        self.connecting_skipped = 0
+        self.last_seen_at: Optional[datetime] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class RouteHints:
+    """
+    Learns per route whether the direct-only and the unfiltered provider queries
+    are worth issuing. Unknown routes get both, concurrently.
+    """
+
+    def __init__(self, min_samples: int = ROUTE_HINT_MIN_SAMPLES, reprobe_every: int = ROUTE_HINT_REPROBE_EVERY):
+        self.min_samples = min_samples
+        self.reprobe_every = reprobe_every
+        self._routes: Dict[Tuple[str, str], RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def plan(self, departure: str, arrival: str) -> Tuple[bool, bool]:
+        """Return (query_direct, query_connecting) for the next search on this route"""
+        with self._lock:
+            stats = self._routes.setdefault((departure, arrival), RouteStats())
+            stats.searches += 1
+            reprobe = self.reprobe_every > 0 and stats.searches % self.reprobe_every == 0
+
+            query_direct = query_connecting = True
+            if not reprobe:
+                # Route never has direct service: the nonStop call is pure overhead
+                if stats.direct_calls >= self.min_samples and stats.direct_wasted == stats.direct_calls:
+                    query_direct = False
+                # Unfiltered call never adds anything beyond the direct offers
+                elif stats.connecting_calls >= self.min_samples and stats.connecting_wasted == stats.connecting_calls:
+                    query_connecting = False
+
+            if not query_direct:
+                stats.direct_skipped += 1
+            if not query_connecting:
+                stats.connecting_skipped += 1
+            return query_direct, query_connecting
+
+    def record(self, departure: str, arrival: str, direct_offers: Optional[int], connecting_new: Optional[int]) -> None:
+        """
+        Record one search outcome. `direct_offers` is the nonStop result size and
+        `connecting_new` the number of itineraries only the unfiltered call found;
+        None means that query was not issued.
+        """
+        with self._lock:
+            stats = self._routes.setdefault((departure, arrival), RouteStats())
+            stats.last_seen_at = datetime.utcnow()
+            if direct_offers is not None:
+                stats.direct_calls += 1
+                stats.direct_offers += direct_offers
+                if direct_offers == 0:
+                    stats.direct_wasted += 1
+            if connecting_new is not None:
+                stats.connecting_calls += 1
+                if connecting_new == 0:
+                    stats.connecting_wasted += 1
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"departure": dep, "arrival": arr, **s.as_dict()}
+                for (dep, arr), s in sorted(self._routes.items(), key=lambda kv: -kv[1].searches)
+            ]
+
+
+route_hints = RouteHints()
@@ -0,0 +1,234 @@
+# services/search_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlmodel import Session, select
+
+from models import Search, Flight, SearchResult, FlightLeg
+
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512"))
+SEARCH_CACHE_PARTIAL_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_PARTIAL_TTL_SECONDS", "30"))
+
+
+def canonical_search_params(departure: str, arrival: str, departure_date: Optional[str] = None,
+                            passengers: int = 1, cabin: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Normalize search parameters so equivalent searches produce the same hash.
+    A missing departure date resolves to tomorrow, matching the provider default;
+    a malformed one is a 422 before it reaches the cache tiers or the providers.
+    """
+    if not departure_date:
+        departure_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    try:
+        departure_date = datetime.strptime(departure_date.strip(), '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        raise HTTPException(status_code=422, detail="departureDate must be YYYY-MM-DD")
+    return {
+        "departure": departure.strip().upper(),
+        "arrival": arrival.strip().upper(),
+        "departureDate": departure_date,
+        "passengers": int(passengers or 1),
+        "cabin": cabin.strip().lower() if cabin else None,
+    }
+
+
+def compute_search_hash(params: Dict[str, Any]) -> str:
+    """Deterministic SHA-256 of the canonical search parameters"""
+    payload = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    """Thread-safe in-process LRU of search responses with a per-entry TTL"""
+
+    def __init__(self, ttl_seconds: int = SEARCH_CACHE_TTL_SECONDS, max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def load_legs(session: Session, flight_ids) -> Dict[int, list]:
+    """FlightLegOut dicts per flight id, in one IN query"""
+    legs_by_flight: Dict[int, list] = {}
+    if not flight_ids:
+        return legs_by_flight
+    legs_q = (
+        select(FlightLeg)
+        .where(FlightLeg.flight_id.in_(set(flight_ids)))
+        .order_by(FlightLeg.flight_id, FlightLeg.leg_number)
+    )
+    for leg in session.exec(legs_q).all():
+        legs_by_flight.setdefault(leg.flight_id, []).append({
+            "leg_number": leg.leg_number,
+            "departure_airport": leg.departure_airport,
+            "arrival_airport": leg.arrival_airport,
+            "departure_time": leg.departure_time,
+            "arrival_time": leg.arrival_time,
+            "duration_minutes": leg.duration_minutes,
+            "carrier": leg.carrier,
+            "flight_number": leg.flight_number,
+        })
+    return legs_by_flight
+
+
+def stored_flight_out(flight: Flight, price: Optional[float], currency: Optional[str], legs: list) -> Dict[str, Any]:
+    """FlightOut dict for a catalogue row, with the price quoted to the search"""
+    return {
+        "provider_flight_id": flight.provider_flight_id,
+        "provider_name": flight.provider_name,
+        "airline": flight.airline,
+        "departure_airport_code": flight.departure_airport_code,
+        "arrival_airport_code": flight.arrival_airport_code,
+        "departure_time": flight.departure_time,
+        "arrival_time": flight.arrival_time,
+        "duration_minutes": flight.duration_minutes,
+        "price": price,
+        "currency": currency,
+        "stops": flight.stops,
+        "legs": legs,
+    }
+
+
+def load_stored_search(session: Session, search_hash: str,
+                       max_age_seconds: int = SEARCH_CACHE_TTL_SECONDS) -> Optional[Tuple[Dict[str, Any], float]]:
+    """
+    Rebuild a search response from the most recent fresh Search with this hash,
+    using its SearchResult links into the Flight catalogue. Returns the response
+    and the Search row's age in seconds, or None when nothing fresh exists.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+    q = (
+        select(Search)
+        .where(Search.search_hash == search_hash, Search.created_at >= cutoff)
+        .order_by(Search.created_at.desc())
+    )
+    search = session.exec(q).first()
+    if not search or (search.params or {}).get("partial"):
+        return None
+
+    rows = session.exec(
+        select(Flight, SearchResult.price, SearchResult.currency)
+        .join(SearchResult, SearchResult.flight_id == Flight.id)
+        .where(SearchResult.search_id == search.id)
+        .order_by(SearchResult.position)
+    ).all()
+    if len(rows) != (search.results_count or 0):
+        # Partially written search; let the caller go to the provider
+        return None
+
+    legs_by_flight = load_legs(session, [f.id for f, _, _ in rows])
+    flights_out = [stored_flight_out(f, price, currency, legs_by_flight.get(f.id, []))
+                   for f, price, currency in rows]
+    response = {"search_id": str(search.id), "flights": flights_out, "total_count": len(flights_out)}
+    return response, (datetime.utcnow() - search.created_at).total_seconds()
+
+
+def cheapest_stored_fares(session: Session, search_hashes: List[str], max_age_seconds: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Cheapest fare of the most recent complete Search younger than
+    max_age_seconds, per hash, in the provider check_price result shape.
+    Hashes without such a search (or whose search found nothing) are left out.
+    """
+    if not search_hashes or max_age_seconds <= 0:
+        return {}
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+    searches = session.exec(
+        select(Search.id, Search.search_hash, Search.created_at, Search.params)
+        .where(Search.search_hash.in_(search_hashes), Search.created_at >= cutoff)
+        .order_by(Search.created_at.desc())
+    ).all()
+    latest: Dict[int, tuple] = {}
+    seen = set()
+    for search_id, search_hash, created_at, params in searches:
+        if search_hash in seen or (params or {}).get("partial"):
+            continue
+        seen.add(search_hash)
+        latest[search_id] = (search_hash, created_at)
+    if not latest:
+        return {}
+
+    # (search_id, price) is indexed; the first row per search is its cheapest fare
+    rows = session.exec(
+        select(SearchResult.search_id, SearchResult.price, SearchResult.currency,
+               Flight.provider_name, Flight.provider_flight_id)
+        .join(Flight, Flight.id == SearchResult.flight_id)
+        .where(SearchResult.search_id.in_(list(latest)), SearchResult.price.is_not(None))
+        .order_by(SearchResult.search_id, SearchResult.price)
+    ).all()
+    fares: Dict[str, Dict[str, Any]] = {}
+    for search_id, price, currency, provider_name, provider_flight_id in rows:
+        search_hash, created_at = latest[search_id]
+        if search_hash in fares:
+            continue
+        fares[search_hash] = {
+            "price": float(price),
+            "currency": currency,
+            "provider": provider_name.lower() if provider_name else None,
+            "details": {
+                "flight_id": provider_flight_id,
+                "search_id": search_id,
+                "quoted_at": created_at.isoformat(),
+            },
+        }
+    return fares
+
+
+search_cache = SearchCache()
@@ -0,0 +1,175 @@
+# services/search_results.py
+import base64
+import binascii
+import json
+import os
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import tuple_
+from sqlmodel import Session, select
+
+from models import Search, SearchResult, Flight
+from services.search_cache import load_legs, stored_flight_out
+
+SEARCH_PAGE_DEFAULT_LIMIT = int(os.getenv("SEARCH_PAGE_DEFAULT_LIMIT", "20"))
+SEARCH_PAGE_MAX_LIMIT = int(os.getenv("SEARCH_PAGE_MAX_LIMIT", "100"))
+
+# sort key -> SearchResult column; each has a (search_id, column, id) index
+SORT_COLUMNS = {
+    "relevance": SearchResult.position,
+    "price": SearchResult.price,
+    "departure": SearchResult.departure_time,
+    "duration": SearchResult.duration_minutes,
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class ResultPageQuery:
+    """Filters, sort and keyset position for one page of a stored search"""
+
+    __slots__ = ("min_price", "max_price", "max_stops", "airlines", "depart_after", "depart_before",
+                 "sort", "order", "limit", "limit_given", "cursor")
+
+    def __init__(self, min_price: Optional[float] = None, max_price: Optional[float] = None,
+                 max_stops: Optional[int] = None, airlines: Optional[List[str]] = None,
+                 depart_after: Optional[time] = None, depart_before: Optional[time] = None,
+                 sort: str = "relevance", order: str = "asc", limit: Optional[int] = None,
+                 cursor: Optional[str] = None):
+        self.min_price = min_price
+        self.max_price = max_price
+        self.max_stops = max_stops
+        self.airlines = [a.strip().upper() for a in airlines or [] if a.strip()]
+        self.depart_after = depart_after
+        self.depart_before = depart_before
+        self.sort = sort
+        self.order = order
+        self.limit = min(limit or SEARCH_PAGE_DEFAULT_LIMIT, SEARCH_PAGE_MAX_LIMIT)
+        self.limit_given = limit is not None
+        self.cursor = cursor
+
+    def narrows(self) -> bool:
+        """True when anything beyond the full, provider-ordered list was asked for"""
+        return any((self.min_price is not None, self.max_price is not None, self.max_stops is not None,
+                    self.airlines, self.depart_after, self.depart_before, self.sort != "relevance",
+                    self.order != "asc", self.limit_given, self.cursor))
+
+
+def encode_cursor(query: ResultPageQuery, value: Any, row_id: int) -> str:
+    if isinstance(value, datetime):
+        value = {"dt": value.isoformat()}
+    raw = json.dumps([query.sort, query.order, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(query: ResultPageQuery):
+    """(sort value, row id) the previous page ended on"""
+    try:
+        padded = query.cursor + "=" * (-len(query.cursor) % 4)
+        sort, order, value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["dt"])
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        raise InvalidCursor("Malformed cursor")
+    if sort != query.sort or order != query.order or not isinstance(row_id, int):
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    return value, row_id
+
+
+def _departure_window(search: Search, query: ResultPageQuery):
+    """Turn HH:MM bounds into datetimes on the searched date; a window may wrap past midnight"""
+    try:
+        day = datetime.strptime((search.params or {}).get("departureDate"), "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None, None
+    after = datetime.combine(day, query.depart_after) if query.depart_after else None
+    before = datetime.combine(day, query.depart_before) if query.depart_before else None
+    if after and before and before <= after:
+        before += timedelta(days=1)
+    return after, before
+
+
+def query_search_page(session: Session, search_id: int, query: ResultPageQuery) -> Optional[Dict[str, Any]]:
+    """
+    One page of a stored search's offers, filtered and sorted in SQL. Paging is
+    keyset-based on (sort column, id), so each page is an index range seek of
+    `limit` rows no matter how deep it is. Rows missing the sort value come last
+    in ascending order and first in descending order. Returns None if the search
+    does not exist; total_count is the size of the whole search, not the match count.
+    """
+    search = session.get(Search, search_id)
+    if search is None:
+        return None
+
+    column = SORT_COLUMNS[query.sort]
+    ascending = query.order == "asc"
+    q = select(SearchResult.id, SearchResult.flight_id, SearchResult.price, SearchResult.currency, column) \
+        .where(SearchResult.search_id == search_id)
+
+    if query.min_price is not None:
+        q = q.where(SearchResult.price >= query.min_price)
+    if query.max_price is not None:
+        q = q.where(SearchResult.price <= query.max_price)
+    if query.max_stops is not None:
+        q = q.where(SearchResult.stops <= query.max_stops)
+    if query.airlines:
+        q = q.where(SearchResult.airline.in_(query.airlines))
+    if query.depart_after or query.depart_before:
+        after, before = _departure_window(search, query)
+        if after is not None:
+            q = q.where(SearchResult.departure_time >= after)
+        if before is not None:
+            q = q.where(SearchResult.departure_time <= before)
+
+    fetch = query.limit + 1
+    value, last_id = decode_cursor(query) if query.cursor else (None, None)
+    in_null_segment = query.cursor is not None and value is None
+
+    def valued_rows(n: int):
+        # (column, id) row-value bound: an index range seek, not a scan from the top
+        part = q.where(column.is_not(None))
+        if value is not None:
+            bound = tuple_(column, SearchResult.id)
+            part = part.where(bound > tuple_(value, last_id) if ascending else bound < tuple_(value, last_id))
+        order = (column.asc(), SearchResult.id.asc()) if ascending else (column.desc(), SearchResult.id.desc())
+        return session.exec(part.order_by(*order).limit(n)).all()
+
+    def null_rows(n: int):
+        part = q.where(column.is_(None))
+        if in_null_segment:
+            part = part.where(SearchResult.id > last_id if ascending else SearchResult.id < last_id)
+        order = SearchResult.id.asc() if ascending else SearchResult.id.desc()
+        return session.exec(part.order_by(order).limit(n)).all()
+
+    # NULL sort values trail ascending pages and lead descending ones
+    if ascending:
+        rows = [] if in_null_segment else valued_rows(fetch)
+        if len(rows) < fetch:
+            rows += null_rows(fetch - len(rows))
+    else:
+        rows = null_rows(fetch) if query.cursor is None or in_null_segment else []
+        if len(rows) < fetch:
+            rows += valued_rows(fetch - len(rows))
+
+    next_cursor = None
+    if len(rows) > query.limit:
+        rows = rows[:query.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(query, last[4], last[0])
+
+    flight_ids = [row[1] for row in rows]
+    flights = {f.id: f for f in session.exec(select(Flight).where(Flight.id.in_(flight_ids))).all()} if rows else {}
+    legs_by_flight = load_legs(session, flight_ids)
+    flights_out = [stored_flight_out(flights[flight_id], price, currency, legs_by_flight.get(flight_id, []))
+                   for _, flight_id, price, currency, _ in rows]
+
+    return {
+        "search_id": str(search.id),
+        "flights": flights_out,
+        "total_count": search.results_count or 0,
+        "partial": bool((search.params or {}).get("partial")),
+        "next_cursor": next_cursor,
+    }
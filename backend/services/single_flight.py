@@ -0,0 +1,99 @@
+# services/single_flight.py
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+
+
+class SingleFlight:
+    """
+    Registry of in-flight calls keyed by request identity. Concurrent callers with
+    the same key await the first caller's task instead of repeating the work.
+    The shared task is shielded, so one caller disconnecting does not cancel it
+    for the others.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.max_waiters = 0
+
+    async def do(self, key: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        return await asyncio.shield(self.task(key, fn, *args, **kwargs))
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._tasks
+
+    def task(self, key: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> asyncio.Task:
+        """
+        The in-flight task for `key`, starting fn(*args, **kwargs) if there is
+        none. Registration is synchronous, so a caller can claim several keys
+        without another coroutine slipping in between; await it through
+        asyncio.shield, as do() does.
+        """
+        task = self._tasks.get(key)
+        if task is not None:
+            self.coalesced += 1
+            self._waiters[key] += 1
+            self.max_waiters = max(self.max_waiters, self._waiters[key])
+            return task
+        self.executions += 1
+        task = asyncio.ensure_future(fn(*args, **kwargs))
+        self._tasks[key] = task
+        self._waiters[key] = 0
+        task.add_done_callback(lambda t, key=key: self._finish(key, t))
+        return task
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._tasks.pop(key, None)
+        self._waiters.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            self.failures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._tasks),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "max_waiters": self.max_waiters,
+        }
+
+
+class Broadcast:
+    """
+    Items from one producer, fanned out to any number of subscribers. Each
+    subscriber gets every item from the first, however late it subscribed, so
+    callers that join an in-flight producer see the same sequence as its first.
+    """
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    def publish(self, item: Any) -> None:
+        self.items.append(item)
+        self._wake()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wake()
+
+    def _wake(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        seen = 0
+        while True:
+            while seen < len(self.items):
+                seen += 1
+                yield self.items[seen - 1]
+            if self.closed:
+                return
+            await self._changed.wait()
+
+
+search_flight_group = SingleFlight()
@@ -0,0 +1,62 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# database.engine is built at import time, so point it at a throwaway file first
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir.name, 'test.db')}"
+os.environ.setdefault("PROVIDER_MODE", "replay")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlmodel import SQLModel, Session
+
+import database
+import models  # noqa: F401  registers the tables on SQLModel.metadata
+
+
+@pytest.fixture
+def session():
+    """A session on freshly created tables"""
+    SQLModel.metadata.drop_all(database.engine)
+    database.create_db_and_tables()
+    with Session(database.engine) as session:
+        yield session
+
+
+class FakeClock:
+    """Stands in for the `time` module of code under test; advance() moves monotonic time"""
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def make_alerts(session):
+    """make_alerts(*offsets): one DLA-CDG alert per offset, due that many minutes from now"""
+    from models import Alert
+
+    def make(*due_offsets_minutes, **fields):
+        now = datetime.utcnow()
+        alerts = [Alert(user_id=1, departure="DLA", arrival="CDG", departure_date=datetime(2030, 1, 1),
+                        max_price=100, next_check_at=now + timedelta(minutes=offset), **fields)
+                  for offset in due_offsets_minutes]
+        session.add_all(alerts)
+        session.commit()
+        return [a.id for a in alerts]
+
+    return make
@@ -0,0 +1,43 @@
+# tests/test_alert_claims.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+import jobs
+from models import Alert
+
+
+def claim_as(monkeypatch, session, worker, limit=10):
+    monkeypatch.setattr(jobs, "WORKER_ID", worker)
+    return [a.id for a in jobs.claim_due_alerts(session, datetime.utcnow(), limit)]
+
+
+def test_claims_oldest_due_first_up_to_limit(session, monkeypatch, make_alerts):
+    late, early, future, middle = make_alerts(-1, -10, 30, -5)
+    assert claim_as(monkeypatch, session, "w1", limit=2) == [early, middle]
+    assert claim_as(monkeypatch, session, "w2") == [late]
+
+
+def test_claimed_alerts_are_not_claimed_again(session, monkeypatch, make_alerts):
+    ids = make_alerts(-3, -2, -1)
+    assert claim_as(monkeypatch, session, "w1") == ids
+    assert claim_as(monkeypatch, session, "w2") == []
+    # nor by the holder itself on its next pass
+    assert claim_as(monkeypatch, session, "w1") == []
+
+
+def test_inactive_alerts_are_skipped(session, monkeypatch, make_alerts):
+    make_alerts(-1, active=False)
+    assert claim_as(monkeypatch, session, "w1") == []
+
+
+def test_expired_lease_can_be_taken_over(session, monkeypatch, make_alerts):
+    stale, live = make_alerts(-2, -1)
+    assert claim_as(monkeypatch, session, "crashed") == [stale, live]
+    session.execute(update(Alert).where(Alert.id == stale)
+                    .values(lease_expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    session.commit()
+    assert claim_as(monkeypatch, session, "w2") == [stale]
+    session.expire_all()
+    assert session.get(Alert, stale).claim_owner == "w2"
+    assert session.get(Alert, live).claim_owner == "crashed"
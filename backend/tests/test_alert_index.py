@@ -0,0 +1,114 @@
+# tests/test_alert_index.py
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+import jobs
+from models import Alert
+from services.alert_index import AlertIndex, itinerary_key
+
+TRIP = itinerary_key("DLA", "CDG", date(2030, 1, 1))
+OTHER_TRIP = itinerary_key("DLA", "CDG", date(2030, 1, 2))
+
+
+def alert(alert_id, max_price, day=1, **fields):
+    return Alert(id=alert_id, user_id=1, departure="DLA", arrival="CDG", departure_date=datetime(2030, 1, day),
+                 max_price=max_price, **fields)
+
+
+@pytest.fixture
+def index():
+    index = AlertIndex()
+    for a in (alert(1, 300.0), alert(2, 200.0), alert(3, 200.0), alert(4, 100.0), alert(5, 200.0, day=2)):
+        index.upsert(a)
+    return index
+
+
+def test_match_returns_alerts_at_or_above_the_price(index):
+    assert sorted(index.match(TRIP, 200.0)) == [1, 2, 3]
+    assert sorted(index.match(TRIP, 150.0)) == [1, 2, 3]
+    assert index.match(TRIP, 300.01) == []
+    assert sorted(index.match(TRIP, 0)) == [1, 2, 3, 4]
+    assert index.match(OTHER_TRIP, 200.0) == [5]
+    assert index.match(itinerary_key("dla ", "cdg", date(2030, 1, 3)), 0) == []
+
+
+def test_removing_one_of_duplicate_thresholds_keeps_the_other(index):
+    index.remove(3)
+    assert sorted(index.match(TRIP, 200.0)) == [1, 2]
+    index.remove(2)
+    assert index.match(TRIP, 200.0) == [1]
+    # removing twice, or an id never indexed, is a no-op
+    index.remove(2)
+    index.remove(99)
+    assert index.stats()["alerts"] == 3
+
+
+def test_upsert_moves_an_alert_to_its_new_threshold(index):
+    index.upsert(alert(2, 50.0))
+    assert sorted(index.match(TRIP, 200.0)) == [1, 3]
+    assert sorted(index.match(TRIP, 50.0)) == [1, 2, 3, 4]
+    assert index.stats()["alerts"] == 5
+
+
+def test_upsert_moves_an_alert_to_its_new_trip(index):
+    index.upsert(alert(4, 100.0, day=2))
+    assert sorted(index.match(TRIP, 0)) == [1, 2, 3]
+    assert sorted(index.match(OTHER_TRIP, 0)) == [4, 5]
+
+
+def test_alerts_that_cannot_match_are_dropped(index):
+    index.upsert(alert(1, 300.0, active=False))
+    index.upsert(alert(2, None))
+    assert sorted(index.match(TRIP, 0)) == [3, 4]
+    index.upsert(alert(5, 200.0, day=2, active=False))
+    assert index.stats() == {"alerts": 2, "itineraries": 1, "age_seconds": None}
+
+
+def test_load_and_refresh_read_the_database(session, make_alerts):
+    cheap, = make_alerts(60)
+    make_alerts(60, active=False)
+    index = AlertIndex()
+    assert index.load(session) == 1
+    assert index.match(TRIP, 100.0) == [cheap]
+    later, = make_alerts(60)
+    assert not index.refresh(session, max_age=3600)
+    assert index.refresh(session, max_age=0)
+    assert sorted(index.match(TRIP, 100.0)) == [cheap, later]
+
+
+def test_bring_forward_skips_alerts_already_notified(session, make_alerts):
+    now = datetime.utcnow()
+    fresh, notified, rechecked, due, inactive = make_alerts(60, 60, 60, -5, 60)
+    session.execute(update(Alert).where(Alert.id == notified)
+                    .values(last_checked_at=now - timedelta(minutes=10), last_notified_at=now - timedelta(minutes=10)))
+    # checked again since it notified: the price had gone back over target
+    session.execute(update(Alert).where(Alert.id == rechecked)
+                    .values(last_checked_at=now - timedelta(minutes=5), last_notified_at=now - timedelta(minutes=10)))
+    session.execute(update(Alert).where(Alert.id == inactive).values(active=False))
+    session.commit()
+
+    assert jobs.bring_forward(session, [fresh, notified, rechecked, due, inactive], now) == 2
+    session.commit()
+    session.expire_all()
+    assert session.get(Alert, fresh).next_check_at == now
+    assert session.get(Alert, rechecked).next_check_at == now
+    assert session.get(Alert, notified).next_check_at > now
+    assert session.get(Alert, due).next_check_at < now
+    assert session.get(Alert, inactive).next_check_at > now
+
+
+def test_ingested_price_schedules_a_check_for_met_alerts(session, make_alerts, monkeypatch):
+    met, missed = make_alerts(60, 60)
+    session.execute(update(Alert).where(Alert.id == missed).values(max_price=50))
+    session.commit()
+    scheduled = []
+    monkeypatch.setattr(jobs, "schedule_alert_check", scheduled.append)
+    monkeypatch.setattr(jobs, "alert_index", AlertIndex())
+
+    assert jobs.on_price_ingested(session, TRIP, 80.0) == 1
+    assert len(scheduled) == 1
+    # the same price again is not a new reason to check
+    assert jobs.on_price_ingested(session, TRIP, 80.0) == 0
+    assert len(scheduled) == 1
@@ -0,0 +1,41 @@
+# tests/test_alert_scheduling.py
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+import jobs
+from models import Alert
+
+
+def unschedule(session, alert_ids):
+    # like rows from before the column existed; the model's default would fill None in on insert
+    session.execute(update(Alert).where(Alert.id.in_(alert_ids)).values(next_check_at=None))
+    session.commit()
+
+
+def test_next_due_is_the_earliest_active_alert(session, make_alerts):
+    make_alerts(-30, active=False)
+    make_alerts(90, 45)
+    due = jobs.next_due_at(session)
+    assert due == pytest.approx(datetime.utcnow() + timedelta(minutes=45), abs=timedelta(seconds=5))
+
+
+def test_nothing_due_without_active_alerts(session, make_alerts):
+    assert jobs.next_due_at(session) is None
+    make_alerts(10, active=False)
+    assert jobs.next_due_at(session) is None
+
+
+def test_unscheduled_alert_is_due_now(session, make_alerts):
+    make_alerts(120)
+    assert jobs.next_due_at(session) > datetime.utcnow() + timedelta(minutes=119)
+    unschedule(session, make_alerts(60))
+    assert jobs.next_due_at(session) <= datetime.utcnow()
+
+
+def test_backfill_schedules_unscheduled_alerts(session, make_alerts):
+    unschedule(session, make_alerts(60))
+    due_at = datetime(2030, 1, 1)
+    jobs.backfill_next_check(session, due_at)
+    assert jobs.next_due_at(session) == due_at
@@ -0,0 +1,122 @@
+# tests/test_alert_writer.py
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlmodel import select
+
+import jobs
+from models import Alert, Notification, PriceCheckJobLog, User
+from services.alert_index import AlertIndex, itinerary_key
+
+TRIP = itinerary_key("DLA", "CDG", date(2030, 1, 1))
+UNPRICED_TRIP = itinerary_key("DLA", "CDG", date(2030, 1, 2))
+QUOTE = {"price": 200.0, "currency": "XAF", "provider": "amadeus", "details": {"offer": "1"}}
+
+
+@pytest.fixture
+def batch(session, make_alerts, monkeypatch):
+    """Alerts claimed by this worker: over target, met, unpriced, lost to another worker, and one not yet due"""
+    session.add(User(id=1, email="traveller@example.com", hashed_password="x"))
+    over, met, unpriced, lost, waiting = make_alerts(-5, -5, -5, -5, 60)
+    session.execute(update(Alert).where(Alert.id == met).values(max_price=250, check_frequency_minutes=30))
+    session.execute(update(Alert).where(Alert.id == unpriced).values(departure_date=datetime(2030, 1, 2)))
+    session.execute(update(Alert).where(Alert.id == waiting).values(max_price=300))
+    session.commit()
+    monkeypatch.setattr(jobs, "WORKER_ID", "writer")
+    assert len(jobs.claim_due_alerts(session, datetime.utcnow(), 10)) == 4
+    session.execute(update(Alert).where(Alert.id == lost).values(claim_owner="other"))
+    session.commit()
+
+    index = AlertIndex()
+    index.load(session)
+    monkeypatch.setattr(jobs, "alert_index", index)
+    return {"over": over, "met": met, "unpriced": unpriced, "lost": lost, "waiting": waiting}
+
+
+def test_batch_writes_logs_reschedules_and_notifications(session, batch):
+    metrics = jobs.CheckRunMetrics()
+    before = datetime.utcnow()
+    notifications = jobs.write_checks(session, [
+        (TRIP, [batch["over"], batch["met"], batch["lost"]], QUOTE),
+        (UNPRICED_TRIP, [batch["unpriced"]], None),
+    ], metrics)
+    session.expire_all()
+
+    logs = {log.alert_id: log for log in session.exec(select(PriceCheckJobLog)).all()}
+    assert set(logs) == {batch["over"], batch["met"]}
+    assert not logs[batch["over"]].matched and logs[batch["met"]].matched
+    assert logs[batch["met"]].checked_price == 200.0 and logs[batch["met"]].currency == "XAF"
+
+    over, met = session.get(Alert, batch["over"]), session.get(Alert, batch["met"])
+    for alert in (over, met):
+        assert alert.claim_owner is None and alert.lease_expires_at is None
+        assert alert.last_checked_at >= before
+    assert over.last_notified_at is None
+    assert met.last_notified_at == met.last_checked_at
+    assert met.next_check_at == met.last_checked_at + timedelta(minutes=30)
+    assert over.next_check_at == over.last_checked_at + timedelta(minutes=60)
+
+    unpriced = session.get(Alert, batch["unpriced"])
+    assert unpriced.claim_owner is None and unpriced.last_checked_at is None
+    assert unpriced.next_check_at >= before + timedelta(minutes=jobs.ALERT_CHECK_RETRY_MINUTES)
+
+    lost = session.get(Alert, batch["lost"])
+    assert lost.claim_owner == "other" and lost.last_checked_at is None
+
+    # the quote meets an alert that was not due yet: it is brought forward
+    assert session.get(Alert, batch["waiting"]).next_check_at <= datetime.utcnow()
+
+    stored = session.exec(select(Notification)).all()
+    assert [(n.id, n.alert_id) for n in notifications] == [(n.id, n.alert_id) for n in stored]
+    assert [n.alert_id for n in stored] == [batch["met"]]
+    assert stored[0].recipient_address == "traveller@example.com"
+    assert stored[0].payload["price"] == 200.0 and stored[0].payload["target_price"] == 250
+
+    assert (metrics.matched, metrics.unpriced, metrics.lost_leases, metrics.price_triggers) == (1, 1, 1, 1)
+
+
+def test_alert_delivered_twice_in_a_batch_is_written_once(session, batch):
+    metrics = jobs.CheckRunMetrics()
+    notifications = jobs.write_checks(session, [
+        (TRIP, [batch["met"]], QUOTE),
+        (TRIP, [batch["met"], batch["over"]], QUOTE),
+    ], metrics)
+    session.expire_all()
+
+    assert sorted(log.alert_id for log in session.exec(select(PriceCheckJobLog)).all()) == \
+        sorted([batch["met"], batch["over"]])
+    stored = session.exec(select(Notification)).all()
+    assert len(stored) == 1 and [n.id for n in notifications] == [stored[0].id]
+    assert metrics.matched == 1
+
+
+def test_writer_commits_off_the_event_loop(monkeypatch):
+    def slow_write(session, items, metrics):
+        time.sleep(0.2)
+        return []
+
+    monkeypatch.setattr(jobs, "write_checks", slow_write)
+
+    async def main():
+        results: asyncio.Queue = asyncio.Queue()
+        ticks = []
+
+        async def quote_in_flight():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.ensure_future(quote_in_flight())
+        await results.put((TRIP, [1], QUOTE))
+        await results.put(None)
+        await jobs.write_results(results, jobs.CheckRunMetrics())
+        ticker.cancel()
+        return ticks
+
+    ticks = asyncio.run(main())
+    # the loop kept turning while the batch was being written
+    assert len(ticks) >= 10
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.1
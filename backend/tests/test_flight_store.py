@@ -0,0 +1,95 @@
+# tests/test_flight_store.py
+from datetime import datetime, timedelta
+
+from sqlmodel import func, select
+
+from models import Flight, FlightLeg, FlightPriceHistory, Search, SearchResult
+from providers.offers import FlightLegRecord, FlightRecord
+from services import flight_store
+from services.flight_store import persist_search_results, upsert_catalogue
+
+
+def offer(price, flight_number="901"):
+    dep = datetime(2030, 1, 1, 8, 0)
+    legs = [FlightLegRecord(1, "DLA", "ADD", dep, dep + timedelta(hours=5), 300, "ET", flight_number),
+            FlightLegRecord(2, "ADD", "CDG", dep + timedelta(hours=7), dep + timedelta(hours=14), 420, "ET", "704")]
+    return FlightRecord(flight_number, "Amadeus", "ET", "DLA", "CDG", dep, legs[-1].arrival_time, 840,
+                        price, "XAF", stops=1, legs=legs)
+
+
+def search(session, *results, passengers=1):
+    params = {"departure": "DLA", "arrival": "CDG", "departureDate": "2030-01-01", "passengers": passengers}
+    row = Search(params=params, search_hash=f"pax-{passengers}", results_count=len(results))
+    return persist_search_results(session, row, list(results))
+
+
+def count(session, model):
+    return session.exec(select(func.count()).select_from(model)).one()
+
+
+def history(session):
+    return [h.price for h in session.exec(select(FlightPriceHistory).order_by(FlightPriceHistory.id)).all()]
+
+
+def test_repeat_sighting_reuses_the_catalogue_row(session):
+    _, first = search(session, offer(250.0), offer(300.0, "902"))
+    _, again = search(session, offer(250.0), offer(300.0, "902"))
+    assert again == first
+    assert count(session, Flight) == 2
+    assert count(session, FlightLeg) == 4
+    # each search still gets its own links
+    assert count(session, SearchResult) == 4
+
+
+def test_unchanged_price_writes_no_history(session):
+    _, (flight_id,) = search(session, offer(250.0))
+    search(session, offer(250.0))
+    assert history(session) == [250.0]
+    session.expire_all()
+    assert session.get(Flight, flight_id).last_seen_at is not None
+
+
+def test_changed_price_writes_one_history_row(session):
+    _, (flight_id,) = search(session, offer(250.0))
+    search(session, offer(275.0))
+    search(session, offer(275.0))
+    assert history(session) == [250.0, 275.0]
+    session.expire_all()
+    assert session.get(Flight, flight_id).price == 275.0
+
+
+def test_duplicate_offers_in_one_search_share_a_row(session):
+    _, ids = search(session, offer(250.0), offer(250.0))
+    assert ids[0] == ids[1]
+    assert count(session, Flight) == 1 and history(session) == [250.0]
+
+
+def test_party_sizes_keep_separate_rows(session):
+    _, (one_pax,) = search(session, offer(250.0), passengers=1)
+    _, (two_pax,) = search(session, offer(500.0), passengers=2)
+    assert one_pax != two_pax
+    session.expire_all()
+    assert session.get(Flight, one_pax).price == 250.0
+    assert session.get(Flight, two_pax).price == 500.0
+    assert (session.get(Flight, one_pax).passengers, session.get(Flight, two_pax).passengers) == (1, 2)
+    # alternating party sizes do not look like price moves
+    search(session, offer(250.0), passengers=1)
+    search(session, offer(500.0), passengers=2)
+    assert sorted(history(session)) == [250.0, 500.0]
+
+
+def test_insert_race_is_retried_as_an_update(session, monkeypatch):
+    _, (flight_id,) = search(session, offer(250.0))
+    real_load = flight_store._load_catalogue
+    calls = []
+
+    def stale_load(session, keys):
+        # the first lookup misses a row another writer has already committed
+        calls.append(keys)
+        return {} if len(calls) == 1 else real_load(session, keys)
+
+    monkeypatch.setattr(flight_store, "_load_catalogue", stale_load)
+    assert upsert_catalogue(session, [offer(260.0)]) == [flight_id]
+    assert len(calls) == 2
+    assert count(session, Flight) == 1
+    assert history(session) == [250.0, 260.0]
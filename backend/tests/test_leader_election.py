@@ -0,0 +1,50 @@
+# tests/test_leader_election.py
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlmodel import select
+
+from models import LeaderLease
+from services.leader_election import LeaderElection
+
+
+@pytest.fixture
+def candidates(session):
+    return (LeaderElection("test-role", "a", lease_seconds=30, heartbeat_seconds=10),
+            LeaderElection("test-role", "b", lease_seconds=30, heartbeat_seconds=10))
+
+
+def lease_row(session):
+    session.expire_all()
+    return session.exec(select(LeaderLease).where(LeaderLease.name == "test-role")).one()
+
+
+def test_one_leader_at_a_time(session, candidates):
+    a, b = candidates
+    assert a.heartbeat()
+    assert not b.heartbeat()
+    # renewing keeps the term start
+    acquired = lease_row(session).acquired_at
+    assert a.heartbeat()
+    assert lease_row(session).acquired_at == acquired
+
+
+def test_expired_leader_lease_is_taken_over(session, candidates):
+    a, b = candidates
+    assert a.heartbeat()
+    session.execute(update(LeaderLease).where(LeaderLease.name == "test-role")
+                    .values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    session.commit()
+    assert b.heartbeat()
+    assert lease_row(session).holder == "b"
+    assert not a.heartbeat()
+
+
+def test_release_hands_over_without_waiting(session, candidates):
+    a, b = candidates
+    assert a.heartbeat()
+    b.release()
+    assert lease_row(session).holder == "a"
+    a.release()
+    assert b.heartbeat()
@@ -0,0 +1,106 @@
+# tests/test_price_check_rollups.py
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select
+
+from models import PriceCheckJobLog, PriceCheckRollup
+from services import price_check_rollups
+from services.price_check_rollups import alert_price_history, compact_price_check_logs, rollup_logs
+
+
+@pytest.fixture(autouse=True)
+def no_pause(monkeypatch):
+    monkeypatch.setattr(price_check_rollups, "PRICE_LOG_COMPACTION_PAUSE_SECONDS", 0)
+
+
+def test_rollup_folds_min_max_last_and_matches():
+    day = datetime(2030, 1, 1)
+    rows = [
+        (1, day.replace(hour=9), 120.0, "USD", False),
+        (1, day.replace(hour=7), 90.0, "USD", True),
+        (1, day.replace(hour=8), 150.0, "USD", False),
+        (1, day.replace(hour=10), None, "USD", False),
+        (None, day.replace(hour=11), 80.0, "USD", True),
+        (2, day.replace(hour=8), 300.0, "EUR", True),
+    ]
+    buckets = rollup_logs(rows, "day")
+    assert set(buckets) == {(1, day), (2, day)}
+    bucket = buckets[(1, day)]
+    assert (bucket["checks"], bucket["min_price"], bucket["max_price"], bucket["match_count"]) == (3, 90.0, 150.0, 1)
+    # last is by check time, not by row order
+    assert bucket["last_price"] == 120.0 and bucket["last_checked_at"] == day.replace(hour=9)
+
+
+def test_hour_buckets():
+    day = datetime(2030, 1, 1)
+    buckets = rollup_logs([(1, day.replace(hour=7, minute=59), 1.0, "USD", False),
+                           (1, day.replace(hour=8, minute=0), 2.0, "USD", False)], "hour")
+    assert set(buckets) == {(1, day.replace(hour=7)), (1, day.replace(hour=8))}
+
+
+def add_logs(session, *rows):
+    session.add_all(PriceCheckJobLog(alert_id=alert_id, ran_at=ran_at, checked_price=price, matched=matched)
+                    for alert_id, ran_at, price, matched in rows)
+    session.commit()
+
+
+def test_compaction_merges_buckets_split_across_chunks(session):
+    old_day = (datetime.utcnow() - timedelta(days=10)).replace(hour=0, minute=0, second=0, microsecond=0)
+    recent = datetime.utcnow() - timedelta(hours=1)
+    add_logs(session,
+             *[(1, old_day + timedelta(hours=h), 100.0 + h, h == 3) for h in range(5)],
+             (1, old_day + timedelta(days=1), 80.0, False),
+             (2, old_day, 500.0, True),
+             (1, recent, 60.0, True))
+
+    stats = asyncio.run(compact_price_check_logs(retention_days=7, granularity="day", chunk_size=2))
+    assert stats["rows_compacted"] == 7 and stats["chunks"] == 4
+
+    session.expire_all()
+    rollups = {(r.alert_id, r.bucket_start): r for r in session.exec(select(PriceCheckRollup)).all()}
+    assert set(rollups) == {(1, old_day), (1, old_day + timedelta(days=1)), (2, old_day)}
+    first = rollups[(1, old_day)]
+    assert (first.checks, first.min_price, first.max_price, first.last_price, first.match_count) == \
+        (5, 100.0, 104.0, 104.0, 1)
+    remaining = session.exec(select(PriceCheckJobLog)).all()
+    assert [log.ran_at for log in remaining] == [recent]
+
+    # nothing left to fold: a second run changes nothing
+    again = asyncio.run(compact_price_check_logs(retention_days=7, granularity="day", chunk_size=2))
+    assert again["rows_compacted"] == 0
+    session.expire_all()
+    assert session.get(PriceCheckRollup, first.id).checks == 5
+
+
+def test_late_rows_merge_into_an_existing_rollup(session):
+    old_day = (datetime.utcnow() - timedelta(days=10)).replace(hour=0, minute=0, second=0, microsecond=0)
+    add_logs(session, (1, old_day + timedelta(hours=2), 100.0, False))
+    asyncio.run(compact_price_check_logs(retention_days=7, granularity="day"))
+    add_logs(session, (1, old_day + timedelta(hours=1), 70.0, True))
+    asyncio.run(compact_price_check_logs(retention_days=7, granularity="day"))
+
+    session.expire_all()
+    (rollup,) = session.exec(select(PriceCheckRollup)).all()
+    assert (rollup.checks, rollup.min_price, rollup.max_price, rollup.match_count) == (2, 70.0, 100.0, 1)
+    # the late row was checked earlier, so it does not become the last price
+    assert rollup.last_price == 100.0
+
+
+def test_unknown_granularity_is_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(compact_price_check_logs(granularity="week"))
+
+
+def test_history_combines_rollups_and_raw_logs(session):
+    old_day = (datetime.utcnow() - timedelta(days=10)).replace(hour=0, minute=0, second=0, microsecond=0)
+    recent = datetime.utcnow() - timedelta(hours=1)
+    add_logs(session, (1, old_day, 100.0, False), (1, recent, 90.0, True), (2, recent, 10.0, True))
+    asyncio.run(compact_price_check_logs(retention_days=7, granularity="day"))
+
+    history = alert_price_history(session, 1, old_day - timedelta(days=1), granularity="day")
+    assert [(b["bucket_start"], b["checks"], b["last_price"]) for b in history] == [
+        (old_day, 1, 100.0),
+        (recent.replace(hour=0, minute=0, second=0, microsecond=0), 1, 90.0),
+    ]
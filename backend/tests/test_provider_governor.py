@@ -0,0 +1,118 @@
+# tests/test_provider_governor.py
+import asyncio
+
+import pytest
+
+from providers.amadeus_client import ProviderError
+from services import provider_governor as governor
+from services.provider_governor import (
+    BACKGROUND, INTERACTIVE, CircuitBreaker, ProviderGovernor, RateLimited, TokenBucket, is_provider_failure,
+)
+
+
+@pytest.fixture
+def breaker(monkeypatch, clock):
+    monkeypatch.setattr(governor, "time", clock)
+    return CircuitBreaker(failure_threshold=3, open_seconds=30, half_open_probes=1)
+
+
+def test_opens_after_consecutive_failures_only(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.times_opened == 1
+    assert not breaker.allow()
+
+
+def test_half_open_admits_limited_probes_after_cooldown(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.advance(29)
+    assert not breaker.allow()
+    assert breaker.retry_after() == pytest.approx(1)
+    clock.advance(1)
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # the probe is still out: nobody else gets through
+    assert not breaker.allow()
+
+
+def test_probe_success_closes(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.consecutive_failures == 0
+    assert breaker.allow() and breaker.allow()
+
+
+def test_probe_failure_reopens_for_a_full_period(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.times_opened == 2
+    clock.advance(29)
+    assert not breaker.allow()
+
+
+def test_released_probe_frees_its_slot(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def test_bucket_keeps_reserve_from_background_callers(monkeypatch, clock):
+    monkeypatch.setattr(governor, "time", clock)
+    bucket = TokenBucket(rate=1, capacity=10, background_reserve=0.3)
+    for _ in range(7):
+        assert bucket.try_take(1, BACKGROUND) == 0
+    assert bucket.try_take(1, BACKGROUND) == pytest.approx(1)
+    for _ in range(3):
+        assert bucket.try_take(1, INTERACTIVE) == 0
+    assert bucket.try_take(1, INTERACTIVE) == pytest.approx(1)
+    clock.advance(100)
+    assert bucket.available() == 10
+
+
+def test_failure_classification():
+    assert is_provider_failure(ProviderError(503, "down"))
+    assert is_provider_failure(ProviderError(429, "slow down"))
+    assert is_provider_failure(asyncio.TimeoutError())
+    assert not is_provider_failure(ProviderError(400, "bad route"))
+    # the governor's own throttling says nothing about the provider's health
+    assert not is_provider_failure(RateLimited("Amadeus"))
+
+
+def test_governor_fast_fails_while_open():
+    gov = ProviderGovernor()
+    gov.gate("Amadeus").breaker = CircuitBreaker(failure_threshold=2, open_seconds=60)
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        raise ProviderError(502, "bad gateway")
+
+    async def main():
+        for _ in range(2):
+            with pytest.raises(ProviderError):
+                await gov.call("Amadeus", failing)
+        with pytest.raises(ProviderError) as rejected:
+            await gov.call("Amadeus", failing)
+        return rejected.value
+
+    rejected = asyncio.run(main())
+    assert rejected.status_code == 503
+    assert len(calls) == 2
+    stats = gov.stats()["Amadeus"]
+    assert stats["circuit"] == "open" and stats["rejected_circuit_open"] == 1 and stats["failures"] == 2
@@ -0,0 +1,128 @@
+# tests/test_search_cache.py
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from main import app
+from models import Search
+from providers.offers import FlightRecord
+from routes import flights
+from services import search_cache
+from services.flight_store import persist_search_results
+from services.search_cache import SearchCache, canonical_search_params, compute_search_hash
+
+
+@pytest.fixture(autouse=True)
+def fake_time(monkeypatch, clock):
+    monkeypatch.setattr(search_cache, "time", clock)
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = SearchCache(ttl_seconds=60, max_entries=10)
+    cache.set("a", 1)
+    clock.advance(59)
+    assert cache.get("a") == 1
+    clock.advance(1)
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["size"] == 0
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_per_entry_ttl_overrides_default(clock):
+    cache = SearchCache(ttl_seconds=600, max_entries=10)
+    cache.set("partial", 1, ttl_seconds=30)
+    cache.set("full", 2)
+    clock.advance(30)
+    assert cache.get("partial") is None
+    assert cache.get("full") == 2
+
+
+def test_reading_an_entry_protects_it_from_eviction():
+    cache = SearchCache(ttl_seconds=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_overwriting_refreshes_recency_and_expiry(clock):
+    cache = SearchCache(ttl_seconds=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    clock.advance(50)
+    cache.set("a", 10)
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    clock.advance(20)
+    assert cache.get("a") == 10
+
+
+def test_invalidate_one_or_all():
+    cache = SearchCache(ttl_seconds=60, max_entries=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert cache.get("a") is None and cache.get("b") == 2
+    cache.invalidate()
+    assert cache.stats()["size"] == 0
+
+
+def test_equivalent_searches_hash_alike():
+    a = canonical_search_params(" dla ", "cdg", "2030-01-01", passengers=None, cabin=" Economy ")
+    b = canonical_search_params("DLA", "CDG", "2030-01-01", passengers=1, cabin="economy")
+    assert compute_search_hash(a) == compute_search_hash(b)
+    c = canonical_search_params("DLA", "CDG", "2030-01-01", passengers=2, cabin="economy")
+    assert compute_search_hash(a) != compute_search_hash(c)
+
+
+def stored_search(session, age_seconds, search_hash="stored"):
+    dep = datetime(2030, 1, 1, 8, 0)
+    offer = FlightRecord("1", "Amadeus", "ET", "DLA", "CDG", dep, dep + timedelta(hours=7), 420, 250.0, "XAF")
+    search = Search(params={"passengers": 1}, search_hash=search_hash, results_count=1,
+                    created_at=datetime.utcnow() - timedelta(seconds=age_seconds))
+    persist_search_results(session, search, [offer])
+
+
+def test_stored_search_reports_its_age(session):
+    stored_search(session, 540)
+    response, age = search_cache.load_stored_search(session, "stored", max_age_seconds=600)
+    assert response["total_count"] == 1
+    assert age == pytest.approx(540, abs=5)
+    assert search_cache.load_stored_search(session, "stored", max_age_seconds=500) is None
+
+
+def test_stored_hit_is_cached_only_until_the_row_goes_stale(session, clock, monkeypatch):
+    cache = SearchCache(ttl_seconds=600, max_entries=10)
+    monkeypatch.setattr(flights, "search_cache", cache)
+    stored_search(session, 540)
+    response = flights.cache_stored_search("stored", search_cache.load_stored_search(session, "stored", 600))
+    assert cache.get("stored") is response
+    clock.advance(55)
+    assert cache.get("stored") is response
+    clock.advance(10)
+    assert cache.get("stored") is None
+
+
+def test_malformed_departure_date_is_rejected():
+    with pytest.raises(HTTPException) as rejected:
+        canonical_search_params("DLA", "CDG", "bad")
+    assert rejected.value.status_code == 422
+    with pytest.raises(HTTPException):
+        canonical_search_params("DLA", "CDG", "2030-02-30")
+
+
+def test_departure_date_is_normalized():
+    assert canonical_search_params("DLA", "CDG", " 2030-1-5 ")["departureDate"] == "2030-01-05"
+
+
+@pytest.mark.parametrize("path", ["/api/flights", "/api/flights/stream"])
+def test_search_endpoints_reject_malformed_dates(session, path):
+    response = TestClient(app).get(path, params={"departure": "DLA", "arrival": "CDG", "departureDate": "bad"})
+    assert response.status_code == 422
+    assert response.json()["detail"] == "departureDate must be YYYY-MM-DD"
@@ -0,0 +1,93 @@
+# tests/test_search_results.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import Search
+from providers.offers import FlightRecord
+from services.flight_store import persist_search_results
+from services.search_results import InvalidCursor, ResultPageQuery, query_search_page
+
+# ties and missing prices are where keyset paging goes wrong
+PRICES = [300.0, 100.0, None, 200.0, 100.0, None, 300.0, 150.0, 100.0, None, 250.0]
+
+
+@pytest.fixture
+def search_id(session):
+    base = datetime(2030, 1, 1, 6, 0)
+    results = [
+        FlightRecord(str(i), "Amadeus", "ET", "DLA", "CDG", base + timedelta(hours=i),
+                     base + timedelta(hours=i + 7), 420, price, "XAF")
+        for i, price in enumerate(PRICES)
+    ]
+    search = Search(params={"departure": "DLA", "arrival": "CDG", "departureDate": "2030-01-01", "passengers": 1},
+                    search_hash="keyset", results_count=len(results))
+    search_id, _ = persist_search_results(session, search, results)
+    return search_id
+
+
+def walk(session, search_id, **kwargs):
+    """Every page of a query, following next_cursor until it runs out"""
+    pages = []
+    cursor = None
+    while True:
+        page = query_search_page(session, search_id, ResultPageQuery(cursor=cursor, **kwargs))
+        pages.append(page["flights"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def flight_ids(pages):
+    return [f["provider_flight_id"] for page in pages for f in page]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 11, 20])
+def test_price_ascending_pages_cover_every_offer_once(session, search_id, limit):
+    pages = walk(session, search_id, sort="price", order="asc", limit=limit)
+    ids = flight_ids(pages)
+    assert len(ids) == len(PRICES) and len(set(ids)) == len(PRICES)
+    prices = [f["price"] for page in pages for f in page]
+    valued = [p for p in prices if p is not None]
+    # missing prices come last in ascending order
+    assert valued == sorted(valued) and prices[len(valued):] == [None] * PRICES.count(None)
+    assert all(len(page) <= limit for page in pages)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4, 20])
+def test_price_descending_puts_missing_prices_first(session, search_id, limit):
+    pages = walk(session, search_id, sort="price", order="desc", limit=limit)
+    prices = [f["price"] for page in pages for f in page]
+    assert len(set(flight_ids(pages))) == len(PRICES)
+    nulls = PRICES.count(None)
+    assert prices[:nulls] == [None] * nulls
+    assert prices[nulls:] == sorted((p for p in PRICES if p is not None), reverse=True)
+
+
+def test_departure_sort_round_trips_datetime_cursor(session, search_id):
+    pages = walk(session, search_id, sort="departure", order="asc", limit=4)
+    assert flight_ids(pages) == [str(i) for i in range(len(PRICES))]
+
+
+def test_filters_apply_on_every_page(session, search_id):
+    pages = walk(session, search_id, sort="price", max_price=200, limit=2)
+    prices = [f["price"] for page in pages for f in page]
+    assert prices == [100.0, 100.0, 100.0, 150.0, 200.0]
+
+
+def test_cursor_from_another_sort_is_rejected(session, search_id):
+    page = query_search_page(session, search_id, ResultPageQuery(sort="price", limit=2))
+    with pytest.raises(InvalidCursor):
+        query_search_page(session, search_id, ResultPageQuery(sort="duration", limit=2, cursor=page["next_cursor"]))
+    with pytest.raises(InvalidCursor):
+        query_search_page(session, search_id, ResultPageQuery(sort="price", order="desc", limit=2,
+                                                              cursor=page["next_cursor"]))
+
+
+def test_malformed_cursor_is_rejected(session, search_id):
+    with pytest.raises(InvalidCursor):
+        query_search_page(session, search_id, ResultPageQuery(sort="price", cursor="not-a-cursor"))
+
+
+def test_unknown_search_returns_none(session, search_id):
+    assert query_search_page(session, search_id + 1, ResultPageQuery()) is None
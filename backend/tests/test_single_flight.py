@@ -0,0 +1,122 @@
+# tests/test_single_flight.py
+import asyncio
+
+import pytest
+
+from services.single_flight import Broadcast, SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    group = SingleFlight()
+    calls = []
+
+    async def search(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return {"key": key}
+
+    async def main():
+        return await asyncio.gather(*(group.do("a", search, "a") for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert calls == ["a"]
+    assert all(r is results[0] for r in results)
+    assert group.stats() == {"in_flight": 0, "executions": 1, "coalesced": 4, "failures": 0, "max_waiters": 4}
+
+
+def test_distinct_keys_run_separately():
+    group = SingleFlight()
+    calls = []
+
+    async def search(key):
+        calls.append(key)
+        await asyncio.sleep(0)
+        return key
+
+    async def main():
+        return await asyncio.gather(group.do("a", search, "a"), group.do("b", search, "b"))
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    group = SingleFlight()
+
+    async def search():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(group.do("a", search))
+        second = asyncio.ensure_future(group.do("a", search))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
+    assert group.stats()["failures"] == 0
+
+
+def test_failure_reaches_every_waiter_and_frees_the_key():
+    group = SingleFlight()
+    calls = []
+
+    async def search():
+        calls.append(1)
+        await asyncio.sleep(0)
+        if len(calls) == 1:
+            raise RuntimeError("provider down")
+        return "ok"
+
+    async def main():
+        results = await asyncio.gather(group.do("a", search), group.do("a", search), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert not group.in_flight("a")
+        # the failed call is not cached: the next caller runs it again
+        return await group.do("a", search)
+
+    assert asyncio.run(main()) == "ok"
+    assert len(calls) == 2
+    assert group.stats()["failures"] == 1
+
+
+def test_task_registers_synchronously():
+    group = SingleFlight()
+
+    async def search(key):
+        await asyncio.sleep(0)
+        return key
+
+    async def main():
+        tasks = [group.task(key, search, key) for key in ("a", "b")]
+        # claimed before either coroutine has started
+        assert group.in_flight("a") and group.in_flight("b")
+        assert group.task("a", search, "other") is tasks[0]
+        return await asyncio.gather(*(asyncio.shield(t) for t in tasks))
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert group.stats()["executions"] == 2
+
+
+def test_broadcast_replays_from_the_start_to_late_subscribers():
+    async def main():
+        broadcast = Broadcast()
+
+        async def collect():
+            return [item async for item in broadcast.subscribe()]
+
+        early = asyncio.ensure_future(collect())
+        broadcast.publish(1)
+        await asyncio.sleep(0)
+        broadcast.publish(2)
+        late = asyncio.ensure_future(collect())
+        await asyncio.sleep(0)
+        broadcast.publish(3)
+        broadcast.close()
+        after_close = await collect()
+        return await early, await late, after_close
+
+    assert asyncio.run(main()) == ([1, 2, 3], [1, 2, 3], [1, 2, 3])